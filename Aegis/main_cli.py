@@ -2,18 +2,33 @@ import sys
 import os
 import time
 import logging
+import argparse
 
 # Ensure src is in path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.core.system_interface import SystemInterface
-from src.core.metrics import SystemMetrics
-
 # Setup basic logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("Aegis.CLI")
 
 def main():
+    parser = argparse.ArgumentParser(description="Aegis core logic verification")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Report import times of a cold start instead of running the checks")
+    parser.add_argument("--startup-only", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        from src.core.startup_profile import profile
+        print(profile([os.path.abspath(__file__), "--startup-only"]))
+        return
+
+    # Imported here so --profile-startup and --help stay fast
+    from src.core.system_interface import SystemInterface
+    from src.core.metrics import SystemMetrics
+    if args.startup_only:
+        return
+
     print("🛡️  Aegis Security System - Core Logic Verification")
     print("------------------------------------------------")
     
@@ -34,6 +49,8 @@ def main():
     res1 = sys_int.run_command(cmd1)
     print(f"    > Result Code: {res1.return_code}")
     print(f"    > Output Preview: {res1.stdout[:50]}...")
+    print(f"    > Wall: {res1.duration:.2f}s | CPU: {(res1.cpu_user or 0) + (res1.cpu_system or 0):.2f}s | "
+          f"Peak RSS: {res1.max_rss_kb or 0} KB | Output: {res1.output_bytes} B")
     
     # Test 2: Sudo command (Simulated on macOS/Windows, Real on Linux)
     cmd2 = ["apt", "update"]
@@ -46,14 +63,15 @@ def main():
     print("\n[*] Testing Metrics Collection (5 samples)...")
     try:
         for i in range(5):
-            metrics = SystemMetrics.get_realtime_metrics()
-            print(f"    [{i+1}/5] CPU: {metrics['cpu']['usage']}% | "
-                  f"RAM: {metrics['memory']['percent']}% | "
-                  f"Disk: {metrics['disk']['percent']}% ")
+            snapshot = SystemMetrics.snapshot(("cpu", "memory", "disk"))
+            print(f"    [{i+1}/5] CPU: {snapshot.cpu_percent}% | "
+                  f"RAM: {snapshot.mem_percent}% | "
+                  f"Disk: {snapshot.disk_percent}% ")
             time.sleep(1)
     except KeyboardInterrupt:
         print("\nStopped.")
 
+    sys_int.stats.save()
     print("\n✅ Core Logic Verification Complete.")
 
 if __name__ == "__main__":
@@ -0,0 +1,220 @@
+import os
+import logging
+from typing import Dict, Optional, Set, Tuple
+
+logger = logging.getLogger("Aegis.Collectors")
+
+SECTOR_SIZE = 512  # /proc/diskstats always counts 512-byte sectors
+
+
+class PsutilCollector:
+    """
+    Metrics backend built on psutil (portable, used off Linux).
+    """
+    name = "psutil"
+
+    def __init__(self):
+        import psutil
+        self._psutil = psutil
+
+    def boot_time(self) -> float:
+        return self._psutil.boot_time()
+
+    def fill(self, snap, groups: Set[str]):
+        psutil = self._psutil
+        if "cpu" in groups:
+            snap.cpu_percent = psutil.cpu_percent(interval=None) # Non-blocking if called repeatedly
+            cpu_freq = psutil.cpu_freq()
+            snap.cpu_freq_mhz = cpu_freq.current if cpu_freq else None
+
+        if "memory" in groups:
+            mem = psutil.virtual_memory()
+            snap.mem_total, snap.mem_used, snap.mem_percent = mem.total, mem.used, mem.percent
+
+        if "swap" in groups:
+            swap = psutil.swap_memory()
+            snap.swap_total, snap.swap_used, snap.swap_percent = swap.total, swap.used, swap.percent
+
+        if "disk" in groups:
+            disk_usage = psutil.disk_usage('/')
+            snap.disk_total, snap.disk_free, snap.disk_percent = disk_usage.total, disk_usage.free, disk_usage.percent
+
+        if "disk_io" in groups:
+            io = psutil.disk_io_counters()
+            if io:
+                snap.disk_read_bytes, snap.disk_write_bytes = io.read_bytes, io.write_bytes
+
+        if "network" in groups:
+            net_io = psutil.net_io_counters()
+            snap.net_bytes_sent, snap.net_bytes_recv = net_io.bytes_sent, net_io.bytes_recv
+
+    def close(self):
+        pass
+
+
+class ProcCollector:
+    """
+    psutil-free Linux backend reading /proc directly.
+
+    The /proc files are opened once and re-read with os.pread on every
+    sample, avoiding an open/close pair per file per tick. CPU usage is the
+    delta between consecutive samples (like psutil.cpu_percent(None)), not
+    the average since boot.
+    """
+    name = "proc"
+
+    FILES = {
+        "stat": "stat",
+        "meminfo": "meminfo",
+        "net": "net/dev",
+        "diskstats": "diskstats",
+    }
+    CPU_FREQ_PATH = "/sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq"
+
+    def __init__(self, proc_root: str = "/proc"):
+        self._fds: Dict[str, int] = {}
+        self._buf_size: Dict[str, int] = {}
+        try:
+            for key, rel in self.FILES.items():
+                self._fds[key] = os.open(os.path.join(proc_root, rel), os.O_RDONLY)
+                self._buf_size[key] = 16 * 1024
+        except OSError:
+            self.close()
+            raise
+        self._freq_fd: Optional[int] = None
+        try:
+            self._freq_fd = os.open(self.CPU_FREQ_PATH, os.O_RDONLY)
+        except OSError:
+            pass
+        self._prev_cpu: Optional[Tuple[int, int]] = None
+        self._whole_disk: Dict[bytes, bool] = {}
+        self._boot_time: Optional[float] = None
+
+    def _read(self, key: str) -> bytes:
+        fd = self._fds[key]
+        while True:
+            size = self._buf_size[key]
+            data = os.pread(fd, size, 0)
+            if len(data) < size:
+                return data
+            # Buffer was filled completely; the file may be longer
+            self._buf_size[key] = size * 2
+
+    def boot_time(self) -> float:
+        if self._boot_time is None:
+            for line in self._read("stat").splitlines():
+                if line.startswith(b"btime "):
+                    self._boot_time = float(line.split()[1])
+                    break
+        return self._boot_time or 0.0
+
+    def cpu_percent(self) -> float:
+        """Busy percentage since the previous call (0.0 on the first one)."""
+        line = self._read("stat").split(b"\n", 1)[0]
+        # cpu user nice system idle iowait irq softirq steal [guest guest_nice]
+        values = [int(v) for v in line.split()[1:9]]
+        idle = values[3] + values[4]
+        total = sum(values)
+        prev, self._prev_cpu = self._prev_cpu, (idle, total)
+        if prev is None or total == prev[1]:
+            return 0.0
+        busy = (total - prev[1]) - (idle - prev[0])
+        return round(100.0 * busy / (total - prev[1]), 1)
+
+    def meminfo(self) -> Dict[bytes, int]:
+        """/proc/meminfo values in bytes."""
+        info = {}
+        for line in self._read("meminfo").splitlines():
+            key, _, rest = line.partition(b":")
+            parts = rest.split()
+            if parts:
+                info[key] = int(parts[0]) * 1024
+        return info
+
+    def net_counters(self) -> Tuple[int, int]:
+        """(bytes_sent, bytes_recv) summed over all interfaces."""
+        sent = recv = 0
+        for line in self._read("net").splitlines()[2:]:
+            _, _, data = line.partition(b":")
+            fields = data.split()
+            if len(fields) >= 9:
+                recv += int(fields[0])
+                sent += int(fields[8])
+        return sent, recv
+
+    def disk_io(self) -> Tuple[int, int]:
+        """(read_bytes, write_bytes) over whole disks, partitions excluded."""
+        read = written = 0
+        for line in self._read("diskstats").splitlines():
+            fields = line.split()
+            if len(fields) < 10:
+                continue
+            name = fields[2]
+            if name not in self._whole_disk:
+                self._whole_disk[name] = (
+                    not name.startswith((b"loop", b"ram"))
+                    and os.path.exists(b"/sys/block/" + name)
+                )
+            if not self._whole_disk[name]:
+                continue
+            read += int(fields[5]) * SECTOR_SIZE
+            written += int(fields[9]) * SECTOR_SIZE
+        return read, written
+
+    def fill(self, snap, groups: Set[str]):
+        if "cpu" in groups:
+            snap.cpu_percent = self.cpu_percent()
+            if self._freq_fd is not None:
+                snap.cpu_freq_mhz = int(os.pread(self._freq_fd, 32, 0)) / 1000.0
+
+        if "memory" in groups or "swap" in groups:
+            info = self.meminfo()
+            if "memory" in groups:
+                total = info.get(b"MemTotal", 0)
+                available = info.get(b"MemAvailable", info.get(b"MemFree", 0))
+                snap.mem_total = total
+                snap.mem_used = total - available
+                snap.mem_percent = round(100.0 * (total - available) / total, 1) if total else 0.0
+            if "swap" in groups:
+                total = info.get(b"SwapTotal", 0)
+                used = total - info.get(b"SwapFree", 0)
+                snap.swap_total, snap.swap_used = total, used
+                snap.swap_percent = round(100.0 * used / total, 1) if total else 0.0
+
+        if "disk" in groups:
+            st = os.statvfs('/')
+            total = st.f_blocks * st.f_frsize
+            free = st.f_bavail * st.f_frsize
+            used = (st.f_blocks - st.f_bfree) * st.f_frsize
+            snap.disk_total, snap.disk_free = total, free
+            # Same definition as psutil/df: used / (used + available to non-root)
+            snap.disk_percent = round(100.0 * used / (used + free), 1) if used + free else 0.0
+
+        if "disk_io" in groups:
+            snap.disk_read_bytes, snap.disk_write_bytes = self.disk_io()
+
+        if "network" in groups:
+            snap.net_bytes_sent, snap.net_bytes_recv = self.net_counters()
+
+    def close(self):
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds = {}
+        if getattr(self, "_freq_fd", None) is not None:
+            os.close(self._freq_fd)
+            self._freq_fd = None
+
+
+def create_collector(name: str = "auto"):
+    """
+    Returns a metrics backend: "proc", "psutil", or "auto" (/proc on Linux,
+    psutil elsewhere).
+    """
+    if name == "proc":
+        return ProcCollector()
+    if name == "auto" and os.path.isdir("/proc/self"):
+        try:
+            return ProcCollector()
+        except OSError as e:
+            logger.warning(f"/proc collector unavailable, falling back to psutil: {e}")
+    return PsutilCollector()
@@ -0,0 +1,133 @@
+import json
+import logging
+import os
+import platform
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, Optional
+
+from src.core.tool_registry import KNOWN_TOOLS, ToolRegistry
+
+logger = logging.getLogger("Aegis.HostFacts")
+
+DEFAULT_CACHE_PATH = os.path.expanduser("~/.aegis/host_facts.json")
+OS_RELEASE = "/etc/os-release"
+PACKAGE_MANAGERS = ("apt", "dnf", "yum", "pacman", "zypper", "apk")
+_CACHE_VERSION = 1
+
+
+@dataclass
+class HostFacts:
+    """Slow-changing facts about the host, detected once and persisted."""
+    os_name: str
+    distro: str
+    pkg_mgr: Optional[str]
+    init_system: str
+    has_sudo: bool
+    tool_paths: Dict[str, Optional[str]] = field(default_factory=dict)
+
+
+def detect_distro(os_name: str, os_release: str = OS_RELEASE) -> str:
+    """
+    Returns 'macos', 'windows', or the linux distro ID (e.g., 'ubuntu', 'centos').
+    """
+    if os_name == "Darwin":
+        return "macos"
+    if os_name == "Windows":
+        return "windows"
+    if os_name != "Linux":
+        return os_name.lower()
+    try:
+        with open(os_release) as f:
+            for line in f:
+                if line.startswith("ID="):
+                    return line.split("=", 1)[1].strip().strip('"')
+    except OSError as e:
+        logger.debug(f"Could not read {os_release}: {e}")
+    try:
+        import distro
+        return distro.id() or "unknown_linux"
+    except ImportError:
+        return "unknown_linux"
+
+
+def detect_init_system() -> str:
+    if os.path.isdir("/run/systemd/system"):
+        return "systemd"
+    try:
+        with open("/proc/1/comm") as f:
+            return f.read().strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def detect(tools: Iterable[str] = KNOWN_TOOLS, os_release: str = OS_RELEASE) -> HostFacts:
+    """Probes the host from scratch."""
+    os_name = platform.system()
+    tools = list(dict.fromkeys(list(tools) + list(PACKAGE_MANAGERS) + ["sudo"]))
+    paths = ToolRegistry(tools).warm()
+    return HostFacts(
+        os_name=os_name,
+        distro=detect_distro(os_name, os_release),
+        pkg_mgr=next((mgr for mgr in PACKAGE_MANAGERS if paths.get(mgr)), None),
+        init_system=detect_init_system(),
+        has_sudo=bool(paths.get("sudo")),
+        tool_paths=paths,
+    )
+
+
+def simulated_facts() -> HostFacts:
+    # Simulation mode probes nothing and caches nothing
+    os_name = platform.system()
+    return HostFacts(os_name=os_name, distro=detect_distro(os_name), pkg_mgr="apt",
+                     init_system="systemd", has_sudo=True)
+
+
+def _cache_key(tools: Iterable[str], os_release: str) -> Dict:
+    path_env = os.environ.get("PATH", os.defpath)
+    mtimes = {}
+    for path in [os_release] + [d for d in path_env.split(os.pathsep) if d]:
+        try:
+            mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            mtimes[path] = None
+    return {
+        "version": _CACHE_VERSION,
+        "euid": os.geteuid() if hasattr(os, "geteuid") else None,
+        "path": path_env,
+        "tools": sorted(set(tools)),
+        "mtimes": mtimes,
+    }
+
+
+def load_host_facts(cache_path: Optional[str] = DEFAULT_CACHE_PATH, tools: Iterable[str] = KNOWN_TOOLS,
+                    os_release: str = OS_RELEASE) -> HostFacts:
+    """
+    Returns cached facts if the host looks unchanged, otherwise detects
+    them again and rewrites the cache. Pass cache_path=None to skip caching.
+    """
+    tools = list(tools)
+    if not cache_path:
+        return detect(tools, os_release)
+    cache_path = os.path.expanduser(cache_path)
+    key = _cache_key(tools, os_release)
+
+    try:
+        with open(cache_path) as f:
+            data = json.load(f)
+        if data.get("key") == key:
+            return HostFacts(**data["facts"])
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, TypeError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable host facts cache {cache_path}: {e}")
+
+    facts = detect(tools, os_release)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"key": key, "facts": asdict(facts)}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not write host facts cache {cache_path}: {e}")
+    return facts
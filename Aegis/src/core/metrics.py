@@ -1,13 +1,97 @@
-import psutil
 import platform
+import threading
 import time
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+from src.core.collectors import create_collector
+
+# Collectable groups; each one costs its own syscalls
+METRIC_GROUPS = ("cpu", "memory", "swap", "disk", "disk_io", "network")
+
+def format_bytes(num: Optional[float]) -> str:
+    """Human readable size in GB (the unit used across the dashboard)."""
+    if num is None:
+        return "N/A"
+    return f"{num / (1024**3):.1f} GB"
+
+class MetricsSnapshot:
+    """
+    A single numeric metrics sample.
+    
+    Values are raw ints/floats (bytes, percent, MHz); groups that were not
+    requested stay None. Formatting for display is done on demand.
+    """
+    __slots__ = (
+        "timestamp",
+        "cpu_percent", "cpu_freq_mhz",
+        "mem_total", "mem_used", "mem_percent",
+        "swap_total", "swap_used", "swap_percent",
+        "disk_total", "disk_free", "disk_percent",
+        "disk_read_bytes", "disk_write_bytes",
+        "net_bytes_sent", "net_bytes_recv",
+    )
+
+    def __init__(self, timestamp: float):
+        for name in self.__slots__:
+            setattr(self, name, None)
+        self.timestamp = timestamp
+
+    def net_rates(self, previous: "MetricsSnapshot") -> Tuple[float, float]:
+        """Bytes/s (sent, received) since an earlier snapshot."""
+        elapsed = self.timestamp - previous.timestamp
+        if elapsed <= 0 or self.net_bytes_sent is None or previous.net_bytes_sent is None:
+            return 0.0, 0.0
+        return (
+            (self.net_bytes_sent - previous.net_bytes_sent) / elapsed,
+            (self.net_bytes_recv - previous.net_bytes_recv) / elapsed,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Formatted view in the layout returned by get_realtime_metrics."""
+        return {
+            "cpu": {
+                "usage": self.cpu_percent,
+                "freq_current": f"{self.cpu_freq_mhz:.0f}Mhz" if self.cpu_freq_mhz is not None else "N/A"
+            },
+            "memory": {
+                "total": format_bytes(self.mem_total),
+                "used": format_bytes(self.mem_used),
+                "percent": self.mem_percent
+            },
+            "disk": {
+                "total": format_bytes(self.disk_total),
+                "free": format_bytes(self.disk_free),
+                "percent": self.disk_percent
+            },
+            "network": {
+                "bytes_sent": self.net_bytes_sent,
+                "bytes_recv": self.net_bytes_recv
+            }
+        }
 
 class SystemMetrics:
     """
-    Real-time system monitoring using psutil.
+    Real-time system monitoring.
+    Samples come from a pluggable collector backend (see src/core/collectors.py).
     """
+    _collector = None
+    _collector_lock = threading.Lock()
+
+    @classmethod
+    def use_collector(cls, name: str = "auto"):
+        """Selects the backend: "auto", "proc" or "psutil"."""
+        with cls._collector_lock:
+            if cls._collector is not None:
+                cls._collector.close()
+            cls._collector = create_collector(name)
+
+    @classmethod
+    def collector(cls):
+        with cls._collector_lock:
+            if cls._collector is None:
+                cls._collector = create_collector()
+            return cls._collector
     
     @staticmethod
     def get_static_info() -> Dict[str, str]:
@@ -20,46 +104,28 @@ class SystemMetrics:
             "version": uname.version,
             "machine": uname.machine,
             "processor": uname.processor,
-            "boot_time": datetime.fromtimestamp(psutil.boot_time()).strftime("%Y-%m-%d %H:%M:%S")
+            "boot_time": datetime.fromtimestamp(SystemMetrics.collector().boot_time()).strftime("%Y-%m-%d %H:%M:%S")
         }
 
     @staticmethod
-    def get_realtime_metrics() -> Dict[str, Any]:
+    def snapshot(groups: Iterable[str] = METRIC_GROUPS) -> MetricsSnapshot:
         """
-        Fetches current resource usage.
-        Blocking call (cpu_percent intervals).
+        Collects the requested metric groups as raw numbers.
+        Only the syscalls for those groups are made, e.g. snapshot(("cpu",)).
         """
-        # CPU
-        cpu_percent = psutil.cpu_percent(interval=None) # Non-blocking if called repeatedly
-        cpu_freq = psutil.cpu_freq()
-        
-        # Memory
-        mem = psutil.virtual_memory()
-        swap = psutil.swap_memory()
-        
-        # Disk
-        disk_usage = psutil.disk_usage('/')
-        
-        # Network (Bytes since boot, calculate delta in the consumer/UI)
-        net_io = psutil.net_io_counters()
+        groups = set(groups)
+        unknown = groups.difference(METRIC_GROUPS)
+        if unknown:
+            raise ValueError(f"Unknown metric groups: {sorted(unknown)}")
         
-        return {
-            "cpu": {
-                "usage": cpu_percent,
-                "freq_current": f"{cpu_freq.current:.0f}Mhz" if cpu_freq else "N/A"
-            },
-            "memory": {
-                "total": f"{mem.total / (1024**3):.1f} GB",
-                "used": f"{mem.used / (1024**3):.1f} GB",
-                "percent": mem.percent
-            },
-            "disk": {
-                "total": f"{disk_usage.total / (1024**3):.1f} GB",
-                "free": f"{disk_usage.free / (1024**3):.1f} GB",
-                "percent": disk_usage.percent
-            },
-            "network": {
-                "bytes_sent": net_io.bytes_sent,
-                "bytes_recv": net_io.bytes_recv
-            }
-        }
+        snap = MetricsSnapshot(time.time())
+        SystemMetrics.collector().fill(snap, groups)
+        return snap
+
+    @staticmethod
+    def get_realtime_metrics() -> Dict[str, Any]:
+        """
+        Fetches current resource usage as formatted values.
+        Prefer snapshot() when numbers are needed.
+        """
+        return SystemMetrics.snapshot(("cpu", "memory", "disk", "network")).to_dict()
@@ -0,0 +1,55 @@
+import subprocess
+import sys
+import time
+from typing import List, NamedTuple, Sequence
+
+STARTUP_BUDGET_MS = 100
+
+
+class ImportTiming(NamedTuple):
+    self_us: int
+    cumulative_us: int
+    module: str
+    depth: int
+
+
+def parse_importtime(stderr: str) -> List[ImportTiming]:
+    """Parses `-X importtime` lines: "import time: self [us] | cumulative | imported package"."""
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        timings.append(ImportTiming(int(parts[0]), int(parts[1]), stripped, depth))
+    return timings
+
+
+def profile(command: Sequence[str], top: int = 15, budget_ms: int = STARTUP_BUDGET_MS) -> str:
+    """
+    Runs `command` (a Python script plus its arguments) under -X importtime
+    in a fresh interpreter and renders a report of the slowest imports.
+    """
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime"] + list(command), capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    timings = parse_importtime(proc.stderr)
+    imports_ms = sum(t.cumulative_us for t in timings if t.depth == 0) / 1000
+    verdict = "within" if wall_ms <= budget_ms else "OVER"
+    lines = [
+        f"Startup profile: {' '.join(command)}",
+        f"Wall time: {wall_ms:.1f} ms ({verdict} the {budget_ms} ms budget) | Imports: {imports_ms:.1f} ms in {len(timings)} modules",
+        "",
+        f"{'cumulative':>12} {'self':>10}  module",
+    ]
+    for t in sorted(timings, key=lambda t: t.cumulative_us, reverse=True)[:top]:
+        lines.append(f"{t.cumulative_us / 1000:>10.1f}ms {t.self_us / 1000:>8.1f}ms  {'  ' * t.depth}{t.module}")
+    if proc.returncode != 0:
+        lines.append("")
+        lines.append(f"Command exited with code {proc.returncode}")
+    return "\n".join(lines)
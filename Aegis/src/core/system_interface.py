@@ -2,12 +2,18 @@ import subprocess
 import platform
 import logging
 import shlex
-import shutil
 import os
-from typing import List, Tuple, Union, Optional
+import threading
+from collections import deque
+from typing import List, Tuple, Union, Optional, Callable, Iterator
 from dataclasses import dataclass
 import time
 
+from src.core.tool_registry import ToolRegistry
+from src.core.host_facts import load_host_facts, simulated_facts
+from src.core.command_stats import CommandStats, DEFAULT_STATS_PATH
+from src.core.process_watch import CancellationToken, ProcessWatch
+
 # Configure logging
 logger = logging.getLogger("Aegis.System")
 
@@ -17,7 +23,98 @@ class CommandResult:
     stdout: str
     stderr: str
     command: str
-    duration: float
+    duration: float  # Monotonic clock; `started` is the wall-clock start time
+    started: Optional[float] = None
+    # From wait4() and /proc/<pid>/io; None where unavailable (simulation, non-POSIX)
+    cpu_user: Optional[float] = None
+    cpu_system: Optional[float] = None
+    max_rss_kb: Optional[int] = None
+    output_bytes: Optional[int] = None  # stdout + stderr produced, including lines not retained
+    io_read_bytes: Optional[int] = None
+    io_write_bytes: Optional[int] = None
+
+    def __post_init__(self):
+        if self.output_bytes is None:
+            self.output_bytes = len(self.stdout.encode(errors="replace")) + len(self.stderr.encode(errors="replace"))
+
+class CommandStream:
+    """
+    Iterates over a command's output lines while it runs.
+    Keeps only the last `max_lines` lines; `result` is set once iteration ends.
+    """
+    def __init__(self, process: Optional[subprocess.Popen], command: str, timeout: int,
+                 max_lines: int = 1000, result: Optional[CommandResult] = None,
+                 token: Optional[CancellationToken] = None,
+                 on_result: Optional[Callable[[CommandResult], None]] = None):
+        self._process = process
+        self.command = command
+        self.timeout = timeout
+        self.token = token
+        self.result = result
+        self.on_result = on_result
+        # One counter per reader thread; summed once both are done
+        self._stdout_bytes = 0
+        self._stderr_bytes = 0
+        self._watch: Optional[ProcessWatch] = None
+        self._stdout_tail = deque(maxlen=max_lines)
+        self._stderr_tail = deque(maxlen=max_lines)
+        self._started = time.time()
+        self._start_time = time.monotonic()
+
+    @classmethod
+    def completed(cls, result: CommandResult) -> "CommandStream":
+        return cls(None, result.command, 0, result=result)
+
+    @property
+    def timed_out(self) -> bool:
+        return self._watch is not None and self._watch.timed_out
+
+    def _drain_stderr(self):
+        for line in self._process.stderr:
+            self._stderr_bytes += len(line.encode(errors="replace"))
+            self._stderr_tail.append(line)
+
+    def __iter__(self) -> Iterator[str]:
+        if self._process is None:
+            yield from self.result.stdout.splitlines()
+            return
+
+        self._watch = ProcessWatch(self._process, self.timeout, self.token)
+        stderr_reader = threading.Thread(target=self._drain_stderr, daemon=True)
+        stderr_reader.start()
+        try:
+            for line in self._process.stdout:
+                self._stdout_bytes += len(line.encode(errors="replace"))
+                self._stdout_tail.append(line)
+                yield line.rstrip("\n")
+        except BaseException:
+            # Consumer stopped early; don't leave the process group behind
+            self._watch.kill()
+            raise
+        finally:
+            self._process.stdout.close()
+            self._watch.reap()
+            stderr_reader.join(timeout=1)
+            self._process.stderr.close()
+            duration = time.monotonic() - self._start_time
+            usage = dict(self._watch.usage(), started=self._started, output_bytes=self._stdout_bytes + self._stderr_bytes)
+            if self._watch.timed_out:
+                logger.error(f"Command timed out: {self.command}")
+                self.result = CommandResult(124, "".join(self._stdout_tail), "Command timed out", self.command, duration, **usage)
+            elif self._watch.cancelled:
+                logger.warning(f"Command cancelled: {self.command}")
+                self.result = CommandResult(130, "".join(self._stdout_tail), "Command cancelled", self.command, duration, **usage)
+            else:
+                self.result = CommandResult(
+                    return_code=self._process.returncode,
+                    stdout="".join(self._stdout_tail),
+                    stderr="".join(self._stderr_tail),
+                    command=self.command,
+                    duration=duration,
+                    **usage
+                )
+            if self.on_result:
+                self.on_result(self.result)
 
 class SystemInterface:
     """
@@ -25,9 +122,15 @@ class SystemInterface:
     Handles command execution, simulation mode, and safety checks.
     """
     
-    def __init__(self, simulation_mode: str = "auto"):
+    def __init__(self, simulation_mode: str = "auto", stats_path: Optional[str] = DEFAULT_STATS_PATH):
         self.os_type = platform.system()
+        # Resource usage of executed commands, per operation (see command_stats.operation)
+        self.stats = CommandStats(stats_path)
         self._set_simulation_mode(simulation_mode)
+        # Tool paths and sudo availability are cached between runs (simulation leaves the host alone)
+        self.facts = simulated_facts() if self.simulation_mode else load_host_facts()
+        self.tools = ToolRegistry()
+        self.tools.seed(self.facts.tool_paths)
         self.sudo_prefix = self._detect_sudo()
         
     def _set_simulation_mode(self, mode: str):
@@ -53,7 +156,7 @@ class SystemInterface:
             return []
         
         # Check if sudo is available
-        if shutil.which("sudo"):
+        if self.facts.has_sudo:
             return ["sudo", "-S"] # -S reads password from stdin, useful for GUI
         
         return []
@@ -62,19 +165,9 @@ class SystemInterface:
         """Check if a command exists in the system path."""
         if self.simulation_mode:
             return True # Assume all tools exist in sim mode
-        return shutil.which(cmd) is not None
+        return self.tools.resolve(cmd) is not None
 
-    def run_command(self, command: Union[str, List[str]], require_sudo: bool = False, timeout: int = 30) -> CommandResult:
-        """
-        Execute a command safely.
-        
-        Args:
-            command: Command string or list. Strings are safely split using shlex.
-            require_sudo: Whether to prepend sudo.
-            timeout: Execution timeout in seconds.
-        """
-        start_time = time.time()
-        
+    def _build_command(self, command: Union[str, List[str]], require_sudo: bool) -> List[str]:
         # Normalize command to list
         if isinstance(command, str):
             cmd_list = shlex.split(command)
@@ -86,7 +179,77 @@ class SystemInterface:
             # Avoid double sudo
             if cmd_list[0] != "sudo":
                 cmd_list = self.sudo_prefix + cmd_list
+        return cmd_list
+
+    def stream_command(self, command: Union[str, List[str]], require_sudo: bool = False, timeout: int = 30,
+                       max_lines: int = 1000, token: Optional[CancellationToken] = None) -> CommandStream:
+        """
+        Start a command and return a CommandStream over its output lines.
+        
+        Args:
+            command: Command string or list. Strings are safely split using shlex.
+            require_sudo: Whether to prepend sudo.
+            timeout: Execution timeout in seconds.
+            max_lines: Trailing lines of output retained for the final result.
+            token: Cancelling it terminates the command's process group.
+        """
+        cmd_list = self._build_command(command, require_sudo)
+        cmd_str = " ".join(cmd_list)
+
+        # SIMULATION PATH
+        if self.simulation_mode:
+            logger.info(f"[SIM] Executing: {cmd_str}")
+            return CommandStream.completed(CommandResult(
+                0, f"[SIMULATION OUTPUT] Successfully executed: {cmd_str}", "", cmd_str, 0.0
+            ))
+
+        # REAL EXECUTION PATH
+        try:
+            logger.debug(f"Streaming: {cmd_str}")
+            process = subprocess.Popen(
+                cmd_list,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+                start_new_session=True
+            )
+            return CommandStream(process, cmd_str, timeout, max_lines=max_lines, token=token,
+                                 on_result=self.stats.record)
+        except FileNotFoundError:
+            logger.error(f"Command not found: {cmd_list[0]}")
+            return CommandStream.completed(CommandResult(127, "", f"Command not found: {cmd_list[0]}", cmd_str, 0.0))
+        except Exception as e:
+            logger.exception(f"Unexpected error executing {cmd_str}")
+            return CommandStream.completed(CommandResult(1, "", str(e), cmd_str, 0.0))
+
+    def run_command_streaming(self, command: Union[str, List[str]], on_line: Callable[[str], None],
+                              require_sudo: bool = False, timeout: int = 30, max_lines: int = 1000,
+                              token: Optional[CancellationToken] = None) -> CommandResult:
+        """Execute a command, calling `on_line` for every output line as it arrives."""
+        stream = self.stream_command(command, require_sudo=require_sudo, timeout=timeout, max_lines=max_lines,
+                                     token=token)
+        for line in stream:
+            on_line(line)
+        return stream.result
 
+    def run_command(self, command: Union[str, List[str]], require_sudo: bool = False, timeout: int = 30,
+                    token: Optional[CancellationToken] = None) -> CommandResult:
+        """
+        Execute a command safely.
+        
+        The command runs in its own process group; on timeout or cancel the
+        whole group is terminated (SIGTERM, then SIGKILL), grandchildren included.
+        
+        Args:
+            command: Command string or list. Strings are safely split using shlex.
+            require_sudo: Whether to prepend sudo.
+            timeout: Execution timeout in seconds.
+            token: Cancelling it terminates the command's process group.
+        """
+        started = time.time()
+        start_time = time.monotonic()
+        cmd_list = self._build_command(command, require_sudo)
         cmd_str = " ".join(cmd_list)
         
         # SIMULATION PATH
@@ -98,37 +261,50 @@ class SystemInterface:
                 stdout=f"[SIMULATION OUTPUT] Successfully executed: {cmd_str}",
                 stderr="",
                 command=cmd_str,
-                duration=time.time() - start_time
+                duration=time.monotonic() - start_time,
+                started=started
             )
 
         # REAL EXECUTION PATH
         try:
             logger.debug(f"Executing: {cmd_str}")
             
+            if token and token.cancelled:
+                return CommandResult(130, "", "Command cancelled", cmd_str, 0.0)
             # Security: shell=False is the default and enforced here by passing a list
-            result = subprocess.run(
+            process = subprocess.Popen(
                 cmd_list,
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 text=True,
-                timeout=timeout,
-                check=False
+                start_new_session=True
             )
+            watch = ProcessWatch(process, timeout, token)
+            stdout, stderr = watch.communicate()
             
-            duration = time.time() - start_time
-            return CommandResult(
-                return_code=result.returncode,
-                stdout=result.stdout,
-                stderr=result.stderr,
-                command=cmd_str,
-                duration=duration
-            )
+            duration = time.monotonic() - start_time
+            usage = dict(watch.usage(), started=started)
+            if watch.timed_out:
+                logger.error(f"Command timed out: {cmd_str}")
+                result = CommandResult(124, "", "Command timed out", cmd_str, duration, **usage)
+            elif watch.cancelled:
+                logger.warning(f"Command cancelled: {cmd_str}")
+                result = CommandResult(130, stdout, "Command cancelled", cmd_str, duration, **usage)
+            else:
+                result = CommandResult(
+                    return_code=process.returncode,
+                    stdout=stdout,
+                    stderr=stderr,
+                    command=cmd_str,
+                    duration=duration,
+                    **usage
+                )
+            self.stats.record(result)
+            return result
             
-        except subprocess.TimeoutExpired:
-            logger.error(f"Command timed out: {cmd_str}")
-            return CommandResult(124, "", "Command timed out", cmd_str, time.time() - start_time)
         except FileNotFoundError:
             logger.error(f"Command not found: {cmd_list[0]}")
-            return CommandResult(127, "", f"Command not found: {cmd_list[0]}", cmd_str, time.time() - start_time)
+            return CommandResult(127, "", f"Command not found: {cmd_list[0]}", cmd_str, time.monotonic() - start_time, started)
         except Exception as e:
             logger.exception(f"Unexpected error executing {cmd_str}")
-            return CommandResult(1, "", str(e), cmd_str, time.time() - start_time)
+            return CommandResult(1, "", str(e), cmd_str, time.monotonic() - start_time, started)
@@ -0,0 +1,201 @@
+import os
+import struct
+import threading
+import time
+import logging
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("Aegis.TimeSeries")
+
+# Column layout of every record (timestamp is stored in front of these)
+FIELDS = ("cpu_percent", "mem_percent", "disk_percent", "net_bytes_sent", "net_bytes_recv")
+
+# Gauges are averaged inside a bucket, cumulative counters keep their last value
+COUNTER_FIELDS = {"net_bytes_sent", "net_bytes_recv"}
+_COUNTER_MASK = tuple(f in COUNTER_FIELDS for f in FIELDS)
+
+# resolution (seconds) -> number of buckets retained
+DEFAULT_RETENTION = {
+    1: 3600,        # 1 hour of 1s samples
+    60: 1440,       # 1 day of 1m averages
+    3600: 24 * 30,  # 30 days of 1h averages
+}
+
+_MAGIC = b"AGTS"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHH")     # magic, version, record width, tier count
+_TIER_HEADER = struct.Struct("<IIII")  # resolution, capacity, count, head
+
+
+class _Tier:
+    """
+    Fixed-capacity ring buffer of fixed-width records at one resolution.
+    All records live in a single flat array('d'): [ts, field0, field1, ...] * capacity.
+    """
+
+    def __init__(self, resolution: int, capacity: int, width: int):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.width = width
+        self.data = array("d", bytes(8 * capacity * width))
+        self.count = 0
+        self.head = 0  # next slot to write
+
+        # Bucket currently being accumulated
+        self._bucket = None
+        self._samples = 0
+        self._acc = [0.0] * (width - 1)
+
+    def add(self, ts: float, values: Sequence[float]):
+        bucket = int(ts // self.resolution)
+        if self._bucket is not None and bucket != self._bucket:
+            self._close_bucket()
+        if self._bucket is None:
+            self._bucket = bucket
+        self._samples += 1
+        for i, value in enumerate(values):
+            if _COUNTER_MASK[i]:
+                self._acc[i] = value
+            else:
+                self._acc[i] += value
+
+    def _close_bucket(self):
+        record = [float(self._bucket * self.resolution)]
+        for i, value in enumerate(self._acc):
+            record.append(value if _COUNTER_MASK[i] else value / self._samples)
+        self._write(record)
+        self._bucket = None
+        self._samples = 0
+        self._acc = [0.0] * (self.width - 1)
+
+    def _write(self, record: Sequence[float]):
+        offset = self.head * self.width
+        self.data[offset:offset + self.width] = array("d", record)
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def records(self) -> List[Tuple[float, ...]]:
+        """All retained records, oldest first."""
+        start = (self.head - self.count) % self.capacity
+        out = []
+        for n in range(self.count):
+            offset = ((start + n) % self.capacity) * self.width
+            out.append(tuple(self.data[offset:offset + self.width]))
+        return out
+
+    def oldest_timestamp(self) -> Optional[float]:
+        if not self.count:
+            return None
+        return self.data[((self.head - self.count) % self.capacity) * self.width]
+
+    def range(self, start: float, end: float) -> List[Tuple[float, ...]]:
+        return [r for r in self.records() if start <= r[0] <= end]
+
+
+class MetricsStore:
+    """
+    Embedded time-series store for system metrics.
+
+    Each sample is rolled up into every configured resolution (1s/1m/1h by
+    default). Each resolution keeps a bounded number of buckets in a compact
+    array-backed ring, so memory use is fixed regardless of uptime.
+    The store can be saved to and loaded from a small binary file.
+    """
+
+    def __init__(self, retention: Optional[Dict[int, int]] = None):
+        retention = retention or DEFAULT_RETENTION
+        width = len(FIELDS) + 1
+        self._tiers = [_Tier(res, cap, width) for res, cap in sorted(retention.items())]
+        self._lock = threading.Lock()
+
+    @property
+    def resolutions(self) -> List[int]:
+        return [t.resolution for t in self._tiers]
+
+    def append(self, values: Sequence[float], timestamp: Optional[float] = None):
+        """Adds one sample; `values` must follow the FIELDS order."""
+        if len(values) != len(FIELDS):
+            raise ValueError(f"Expected {len(FIELDS)} values, got {len(values)}")
+        ts = time.time() if timestamp is None else timestamp
+        values = [float(v) for v in values]
+        with self._lock:
+            for tier in self._tiers:
+                tier.add(ts, values)
+
+    def record(self, snapshot: Any):
+        """Adds a MetricsSnapshot (its attributes are named after FIELDS)."""
+        self.append([getattr(snapshot, f) or 0.0 for f in FIELDS], snapshot.timestamp)
+
+    def query(self, start: float, end: Optional[float] = None, resolution: Optional[int] = None) -> List[Tuple[float, ...]]:
+        """
+        Returns closed buckets with start <= timestamp <= end as
+        (timestamp, *FIELDS) tuples.
+
+        Without an explicit resolution the result is stitched together:
+        each part of the range comes from the finest tier that still holds it.
+        """
+        end = time.time() if end is None else end
+        with self._lock:
+            if resolution is not None:
+                return self._tier(resolution).range(start, end)
+            result = []
+            covered_from = None  # oldest timestamp held by a finer tier
+            for tier in self._tiers:
+                oldest = tier.oldest_timestamp()
+                if oldest is None:
+                    continue
+                # Coarser tiers only fill in what finer ones no longer retain:
+                # a bucket must end before the finer data begins, not merely start before it
+                last = end if covered_from is None else min(end, covered_from - tier.resolution)
+                result = tier.range(max(start, oldest), last) + result
+                covered_from = oldest if covered_from is None else min(covered_from, oldest)
+                if oldest <= start:
+                    break
+            return result
+
+    def _tier(self, resolution: int) -> _Tier:
+        for tier in self._tiers:
+            if tier.resolution == resolution:
+                return tier
+        raise ValueError(f"No tier with resolution {resolution}s (have {self.resolutions})")
+
+    def save(self, path: str):
+        """Writes closed buckets to `path` atomically (open buckets are not persisted)."""
+        tmp_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._lock:
+            with open(tmp_path, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION, len(FIELDS) + 1, len(self._tiers)))
+                for tier in self._tiers:
+                    f.write(_TIER_HEADER.pack(tier.resolution, tier.capacity, tier.count, tier.head))
+                    tier.data.tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MetricsStore":
+        with open(path, "rb") as f:
+            magic, version, width, tier_count = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or version != _VERSION or width != len(FIELDS) + 1:
+                raise ValueError(f"Incompatible metrics store: {path}")
+            retention, tiers = {}, []
+            for _ in range(tier_count):
+                resolution, capacity, count, head = _TIER_HEADER.unpack(f.read(_TIER_HEADER.size))
+                data = array("d")
+                data.fromfile(f, capacity * width)
+                retention[resolution] = capacity
+                tiers.append((count, head, data))
+        store = cls(retention)
+        for tier, (count, head, data) in zip(store._tiers, tiers):
+            tier.count, tier.head, tier.data = count, head, data
+        return store
+
+    @classmethod
+    def open(cls, path: str, retention: Optional[Dict[int, int]] = None) -> "MetricsStore":
+        """Loads the store at `path`, or starts an empty one if missing or unreadable."""
+        if os.path.exists(path):
+            try:
+                return cls.load(path)
+            except (OSError, ValueError, EOFError, struct.error) as e:
+                logger.warning(f"Discarding unreadable metrics history {path}: {e}")
+        return cls(retention)
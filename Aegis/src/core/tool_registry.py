@@ -0,0 +1,107 @@
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, FrozenSet, Iterable, Optional
+
+logger = logging.getLogger("Aegis.Tools")
+
+# Everything Aegis shells out to
+KNOWN_TOOLS = (
+    "sudo", "systemctl", "apt", "apt-get", "dnf", "yum", "pacman", "zypper",
+    "lynis", "clamscan", "rkhunter", "nmap", "ufw", "ss", "ip",
+)
+
+
+def _list_dir(directory: str) -> FrozenSet[str]:
+    try:
+        return frozenset(os.listdir(directory))
+    except OSError:
+        return frozenset()
+
+
+class ToolRegistry:
+    """Thread-safe cache of tool name -> absolute path (None if not installed)."""
+
+    def __init__(self, tools: Iterable[str] = KNOWN_TOOLS, max_workers: int = 8):
+        self.tools = tuple(tools)
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._paths: Dict[str, Optional[str]] = {}
+        self._path_env: Optional[str] = None
+
+    def _check_path_env(self):
+        """Drops every cached entry if PATH changed since they were resolved."""
+        path_env = os.environ.get("PATH", os.defpath)
+        if path_env != self._path_env:
+            if self._path_env is not None:
+                logger.debug("PATH changed; tool cache invalidated.")
+            self._paths = {}
+            self._path_env = path_env
+
+    def seed(self, paths: Dict[str, Optional[str]]):
+        """Pre-fills the cache, e.g. from persisted host facts, for the current PATH."""
+        with self._lock:
+            self._check_path_env()
+            self._paths.update(paths)
+
+    def warm(self) -> Dict[str, Optional[str]]:
+        """Resolves all known tools at once (call at startup)."""
+        return self.resolve_many(self.tools)
+
+    def resolve(self, tool: str) -> Optional[str]:
+        """Absolute path of `tool`, or None if it is not installed."""
+        return self.resolve_many([tool])[tool]
+
+    def resolve_many(self, tools: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Resolves several tools with one listing per PATH directory."""
+        tools = list(dict.fromkeys(tools))
+        with self._lock:
+            self._check_path_env()
+            path_env = self._path_env
+            missing = [t for t in tools if t not in self._paths]
+        if missing:
+            resolved = self._lookup(missing, path_env)
+            with self._lock:
+                if self._path_env == path_env:
+                    self._paths.update(resolved)
+        else:
+            resolved = {}
+        with self._lock:
+            return {t: self._paths.get(t, resolved.get(t)) for t in tools}
+
+    def _lookup(self, tools: Iterable[str], path_env: str) -> Dict[str, Optional[str]]:
+        result: Dict[str, Optional[str]] = {}
+        bare = []
+        for tool in tools:
+            if os.sep in tool:
+                result[tool] = shutil.which(tool)
+            else:
+                bare.append(tool)
+        if not bare:
+            return result
+
+        directories = [d for d in dict.fromkeys(path_env.split(os.pathsep)) if d]
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(directories)))) as pool:
+            listings = list(pool.map(_list_dir, directories))
+
+        for tool in bare:
+            result[tool] = None
+            for directory, names in zip(directories, listings):
+                if tool not in names:
+                    continue
+                candidate = os.path.join(directory, tool)
+                if os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+                    result[tool] = candidate
+                    break
+        return result
+
+    def invalidate(self, tools: Optional[Iterable[str]] = None):
+        """Forgets cached results (all of them by default), e.g. after installing packages."""
+        with self._lock:
+            if tools is None:
+                self._paths = {}
+            else:
+                for tool in tools:
+                    self._paths.pop(tool, None)
@@ -2,6 +2,8 @@ import customtkinter as ctk
 from typing import Optional, Callable
 import time
 
+from src.ui.console_history import ConsoleHistory, VirtualConsole
+
 class MetricCard(ctk.CTkFrame):
     """
     A dashboard card displaying a single metric (e.g., CPU Usage).
@@ -46,8 +48,10 @@ class MetricCard(ctk.CTkFrame):
 class ConsoleWidget(ctk.CTkTextbox):
     """
     A read-only console output widget with timestamping.
+    Keeps at most `max_lines` lines on screen; the full history is spilled
+    to disk and paged back in when scrolling up.
     """
-    def __init__(self, master, **kwargs):
+    def __init__(self, master, max_lines: int = 2000, history_path: Optional[str] = None, **kwargs):
         super().__init__(master, font=("Consolas", 12), activate_scrollbars=True, **kwargs)
         self.configure(state="disabled")
         self.tag_config("info", foreground="cyan")
@@ -55,18 +59,11 @@ class ConsoleWidget(ctk.CTkTextbox):
         self.tag_config("success", foreground="#2cc985")
         self.tag_config("warning", foreground="orange")
         
-    def log(self, message: str, level: str = "info"):
-        self.configure(state="normal")
-        timestamp = time.strftime("[%H:%M:%S]")
-        
-        # Insert timestamp
-        self.insert("end", f"{timestamp} ", "timestamp")
+        # CTkTextbox.insert takes a single chunk, so drive the underlying tk.Text directly
+        self.view = VirtualConsole(self._textbox, ConsoleHistory(max_lines, history_path))
         
-        # Insert message with color tag
-        self.insert("end", f"{message}\n", level)
-        
-        self.see("end")
-        self.configure(state="disabled")
+    def log(self, message: str, level: str = "info"):
+        self.view.append(message, level, time.strftime("[%H:%M:%S]"))
 
 class ActionButton(ctk.CTkButton):
     """
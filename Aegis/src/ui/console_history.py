@@ -0,0 +1,198 @@
+"""
+Console History Module
+----------------------
+Bounded-memory backing store for the Aegis console widget.
+
+Every line written to a console is appended to a spill file on disk. Only the
+most recent `max_lines` lines are kept in the Text widget, and older lines are
+paged back in from the spill file when the user scrolls to the top. Insert cost
+stays constant and memory stays flat no matter how long the session runs.
+"""
+
+import logging
+import tempfile
+from array import array
+from collections import deque
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger("Aegis.Console")
+
+# (timestamp, text, tag) as rendered by VirtualConsole
+HistoryLine = Tuple[str, str, str]
+
+
+class ConsoleHistory:
+    """
+    Append-only line history with a bounded in-memory window.
+
+    Lines are written to `spill_path` (an anonymous temp file by default) and
+    indexed by byte offset, so any range can be read back without keeping it
+    in memory. The last `max_lines` lines are also cached in RAM.
+    """
+
+    def __init__(self, max_lines: int = 5000, spill_path: Optional[str] = None):
+        self.max_lines = max(1, max_lines)
+        self._recent = deque(maxlen=self.max_lines)
+        self._offsets = array("Q")
+        self._end = 0
+        if spill_path:
+            self._file = open(spill_path, "w+b")
+        else:
+            self._file = tempfile.TemporaryFile()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def append(self, text: str, tag: str = "", timestamp: str = ""):
+        """Records a single line (embedded newlines are flattened)."""
+        line = (timestamp, text.replace("\n", " "), tag)
+        record = "\t".join((tag, timestamp, line[1])).encode("utf-8", errors="replace") + b"\n"
+        self._file.seek(self._end)
+        self._file.write(record)
+        self._offsets.append(self._end)
+        self._end += len(record)
+        self._recent.append(line)
+
+    def read(self, start: int, count: int) -> List[HistoryLine]:
+        """Returns up to `count` lines starting at absolute line `start`."""
+        total = len(self._offsets)
+        start = max(0, start)
+        stop = min(total, start + max(0, count))
+        if start >= stop:
+            return []
+
+        # Served from memory when the range is still in the recent window
+        first_cached = total - len(self._recent)
+        if start >= first_cached:
+            return [self._recent[i - first_cached] for i in range(start, stop)]
+
+        self._file.flush()
+        self._file.seek(self._offsets[start])
+        end_offset = self._offsets[stop] if stop < total else self._end
+        chunk = self._file.read(end_offset - self._offsets[start])
+        lines = []
+        # Only "\n" ends a record; text may still hold "\r" and other separators splitlines() would break on
+        for raw in chunk.rstrip(b"\n").split(b"\n"):
+            tag, timestamp, text = raw.decode("utf-8", errors="replace").split("\t", 2)
+            lines.append((timestamp, text, tag))
+        return lines
+
+    def tail(self, count: int) -> List[HistoryLine]:
+        """Returns the last `count` lines."""
+        return self.read(len(self) - count, count)
+
+    def close(self):
+        try:
+            self._file.close()
+        except OSError as e:
+            logger.error(f"Failed to close console history: {e}")
+
+
+class VirtualConsole:
+    """
+    Keeps a Text-like widget showing a bounded window over a ConsoleHistory.
+
+    While following the tail, new lines are appended and the oldest ones are
+    evicted from the widget. Scrolling to the top pages older lines back in
+    from disk; scrolling back to the bottom resumes following.
+    """
+
+    def __init__(self, widget, history: ConsoleHistory, page_size: int = 500, readonly: bool = True):
+        self.widget = widget
+        self.history = history
+        self.page_size = page_size
+        self.readonly = readonly
+        self.following = True
+        self._first = 0   # absolute history index of the first displayed line
+        self._shown = 0   # number of lines currently in the widget
+
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>", "<Prior>", "<Next>", "<Home>", "<End>"):
+            widget.bind(sequence, self._on_scroll, add="+")
+
+    def _set_writable(self, writable: bool):
+        if self.readonly:
+            self.widget.configure(state="normal" if writable else "disabled")
+
+    def _insert_lines(self, index: str, lines: List[HistoryLine]):
+        args = []
+        for timestamp, text, tag in lines:
+            if timestamp:
+                args.extend((f"{timestamp} ", "timestamp"))
+            args.extend((f"{text}\n", tag))
+        if args:
+            self.widget.insert(index, *args)
+
+    def append(self, text: str, tag: str = "", timestamp: str = ""):
+        """Records one or more lines and shows them if the view is at the tail."""
+        lines = text.split("\n")
+        if len(lines) > 1 and lines[-1] == "":
+            lines.pop()
+        new = []
+        for i, line in enumerate(lines):
+            self.history.append(line, tag, timestamp if i == 0 else "")
+            new.append((timestamp if i == 0 else "", line, tag))
+        if not self.following:
+            return
+
+        self._set_writable(True)
+        self._insert_lines("end", new)
+        self._shown += len(new)
+        excess = self._shown - self.history.max_lines
+        if excess > 0:
+            self.widget.delete("1.0", f"{excess + 1}.0")
+            self._first += excess
+            self._shown -= excess
+        self.widget.see("end")
+        self._set_writable(False)
+
+    def clear(self):
+        """Empties the widget; the lines stay in the history."""
+        self._set_writable(True)
+        self.widget.delete("1.0", "end")
+        self._set_writable(False)
+        self._first = len(self.history)
+        self._shown = 0
+        self.following = True
+
+    def page_back(self) -> int:
+        """Loads the page preceding the displayed window. Returns lines loaded."""
+        start = max(0, self._first - self.page_size)
+        lines = self.history.read(start, self._first - start)
+        if not lines:
+            return 0
+
+        self._set_writable(True)
+        self._insert_lines("1.0", lines)
+        self._first = start
+        self._shown += len(lines)
+        if self._shown > self.history.max_lines:
+            # Drop the newest lines to stay within the cap; we are no longer at the tail
+            self.widget.delete(f"{self.history.max_lines + 1}.0", "end")
+            self._shown = self.history.max_lines
+            self.following = False
+        self._set_writable(False)
+        self.widget.yview(f"{len(lines) + 1}.0")
+        return len(lines)
+
+    def follow_tail(self):
+        """Reloads the newest lines and resumes following."""
+        lines = self.history.tail(self.history.max_lines)
+        self._set_writable(True)
+        self.widget.delete("1.0", "end")
+        self._insert_lines("end", lines)
+        self._set_writable(False)
+        self._first = len(self.history) - len(lines)
+        self._shown = len(lines)
+        self.following = True
+        self.widget.see("end")
+
+    def _on_scroll(self, event=None):
+        # Let the widget apply the scroll first, then look at where we ended up
+        self.widget.after_idle(self._check_position)
+
+    def _check_position(self):
+        top, bottom = self.widget.yview()
+        if top <= 0.0 and self._first > 0:
+            self.page_back()
+        elif bottom >= 1.0 and not self.following:
+            self.follow_tail()
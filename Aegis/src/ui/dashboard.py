@@ -1,18 +1,25 @@
 import customtkinter as ctk
+import os
 import threading
 import time
 from typing import Dict, Any
 
+from src.core.command_stats import operation
 from src.core.system_interface import SystemInterface
-from src.core.metrics import SystemMetrics
+from src.core.metrics import SystemMetrics, format_bytes
+from src.core.timeseries import MetricsStore
 from src.ui.components import MetricCard, ConsoleWidget, ActionButton
 
+METRICS_HISTORY_PATH = os.path.expanduser("~/.aegis/metrics.tsdb")
+METRICS_SAVE_INTERVAL = 60  # seconds
+
 class DashboardWindow(ctk.CTk):
     def __init__(self):
         super().__init__()
         
         # Core Systems
         self.sys_interface = SystemInterface(simulation_mode="auto")
+        self.metrics_store = MetricsStore.open(METRICS_HISTORY_PATH)
         
         # Window Setup
         self.title(f"Aegis Security Control [{'SIMULATION' if self.sys_interface.simulation_mode else 'ACTIVE'}]")
@@ -113,42 +120,57 @@ class DashboardWindow(ctk.CTk):
 
     def _update_metrics_loop(self):
         """Background thread for metrics"""
+        last_save = time.monotonic()
         while self.running:
             try:
-                metrics = SystemMetrics.get_realtime_metrics()
+                snapshot = SystemMetrics.snapshot(("cpu", "memory", "disk", "network"))
+                self.metrics_store.record(snapshot)
                 
                 # Update UI from main thread
-                self.after(0, self._update_cards, metrics)
+                self.after(0, self._update_cards, snapshot)
+                
+                if time.monotonic() - last_save >= METRICS_SAVE_INTERVAL:
+                    self.metrics_store.save(METRICS_HISTORY_PATH)
+                    last_save = time.monotonic()
                 
                 time.sleep(1)
             except Exception as e:
                 print(f"Metrics Error: {e}")
 
-    def _update_cards(self, metrics):
-        self.card_cpu.update_metric(metrics["cpu"]["usage"])
-        self.card_ram.update_metric(metrics["memory"]["percent"], metrics["memory"]["used"])
-        self.card_disk.update_metric(metrics["disk"]["percent"], metrics["disk"]["free"] + " Free")
+    def _update_cards(self, snapshot):
+        self.card_cpu.update_metric(snapshot.cpu_percent)
+        self.card_ram.update_metric(snapshot.mem_percent, format_bytes(snapshot.mem_used))
+        self.card_disk.update_metric(snapshot.disk_percent, format_bytes(snapshot.disk_free) + " Free")
 
     # --- Actions ---
     
-    def _run_threaded_action(self, func, name):
+    def _run_threaded_action(self, func, name, streamed: bool = False):
         def task():
             self.after(0, lambda: self.console.log(f"Starting {name}...", "info"))
-            result = func()
+            with operation(name):
+                result = func()
             
-            # Show output
-            if result.return_code == 0:
+            # Show output (streamed actions have already printed it line by line)
+            if result.return_code == 0 and streamed:
+                self.after(0, lambda: self.console.log(f"{name} completed.", "success"))
+            elif result.return_code == 0:
                 self.after(0, lambda: self.console.log(result.stdout.strip(), "success"))
             else:
                 self.after(0, lambda: self.console.log(f"Error: {result.stderr}", "error"))
                 
         threading.Thread(target=task, daemon=True).start()
 
+    def _stream_to_console(self, line: str):
+        self.after(0, self.console.log, line, "info")
+
     def _action_scan(self):
-        # Example: Run lynis (simulated)
+        # Example: Run lynis (simulated); output is streamed as the audit progresses
         self._run_threaded_action(
-            lambda: self.sys_interface.run_command(["lynis", "audit", "system"], require_sudo=True),
-            "Security Audit"
+            lambda: self.sys_interface.run_command_streaming(
+                ["lynis", "audit", "system"], self._stream_to_console, require_sudo=True, timeout=600
+            ),
+            "Security Audit",
+            streamed=True
         )
 
     def _action_clean(self):
@@ -171,6 +193,12 @@ class DashboardWindow(ctk.CTk):
 
     def on_closing(self):
         self.running = False
+        try:
+            self.metrics_store.save(METRICS_HISTORY_PATH)
+        except OSError as e:
+            print(f"Could not save metrics history: {e}")
+        self.sys_interface.stats.save()
+        self.console.view.history.close()
         self.destroy()
 
 if __name__ == "__main__":
@@ -0,0 +1,142 @@
+import os
+import struct
+import sys
+import tempfile
+import unittest
+
+# Ensure the src package resolves when run from any directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.core.collectors import ProcCollector
+from src.core.metrics import MetricsSnapshot
+from src.core.timeseries import FIELDS, MetricsStore
+from src.ui.console_history import ConsoleHistory
+
+
+def fill(store, first, last, cpu=10.0):
+    """One sample per second for first..last inclusive; net counters count up."""
+    for ts in range(first, last + 1):
+        store.append([cpu, 50.0, 60.0, ts * 10, ts * 20], timestamp=ts)
+
+
+class TestMetricsStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "metrics.tsdb")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rollup(self):
+        store = MetricsStore({1: 10, 60: 10})
+        for ts in range(0, 121):
+            store.append([ts % 2 * 100, 50.0, 60.0, ts * 10, ts * 20], timestamp=ts)
+        minutes = store.query(0, 200, resolution=60)
+        self.assertEqual([r[0] for r in minutes], [0.0, 60.0])
+        # Gauges are averaged, counters keep the bucket's last value
+        self.assertEqual(minutes[0][1], 50.0)
+        self.assertEqual(minutes[0][FIELDS.index("net_bytes_sent") + 1], 590.0)
+        self.assertEqual(len(store.query(0, 200, resolution=1)), 10)
+
+    def test_stitched_tiers_do_not_overlap(self):
+        store = MetricsStore({1: 60, 60: 10})
+        fill(store, 900, 1060)
+        records = store.query(0, 2000)
+        timestamps = [r[0] for r in records]
+        # 1s data starts at 1000, so the 1m bucket at 960 (covering 960-1019) is left out
+        self.assertEqual(timestamps[0], 900.0)
+        self.assertEqual(timestamps[1], 1000.0)
+        self.assertNotIn(960.0, timestamps)
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertEqual(len(records), 61)
+
+    def test_save_and_load(self):
+        store = MetricsStore({1: 5, 60: 3})
+        fill(store, 0, 200)
+        store.save(self.path)
+        with open(self.path, "rb") as f:
+            magic, version, width, tiers = struct.unpack("<4sHHH", f.read(10))
+        self.assertEqual((magic, version, width, tiers), (b"AGTS", 1, len(FIELDS) + 1, 2))
+        # Header, then per tier a 16-byte header and capacity * width doubles
+        self.assertEqual(os.path.getsize(self.path), 10 + 2 * 16 + (5 + 3) * (len(FIELDS) + 1) * 8)
+
+        loaded = MetricsStore.load(self.path)
+        self.assertEqual(loaded.resolutions, [1, 60])
+        self.assertEqual(loaded.query(0, 1000, resolution=1), store.query(0, 1000, resolution=1))
+        self.assertEqual(loaded.query(0, 1000), store.query(0, 1000))
+
+    def test_unreadable_file_starts_empty(self):
+        MetricsStore({1: 5}).save(self.path)
+        with open(self.path, "r+b") as f:
+            f.truncate(20)
+        self.assertEqual(MetricsStore.open(self.path).query(0, 1000), [])
+        with open(self.path, "wb") as f:
+            f.write(b"nonsense")
+        self.assertEqual(MetricsStore.open(self.path, {1: 5}).resolutions, [1])
+
+
+class TestProcCollector(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.proc = self.tmp.name
+        os.makedirs(os.path.join(self.proc, "net"))
+        self.write("stat", "cpu  100 0 100 700 100 0 0 0 0 0\ncpu0 100 0 100 700 100 0 0 0 0 0\nbtime 1700000000\n")
+        self.write("meminfo", "MemTotal:       1000 kB\nMemFree:         100 kB\nMemAvailable:    250 kB\n"
+                              "SwapTotal:       400 kB\nSwapFree:        300 kB\n")
+        self.write("net/dev", "Inter-|   Receive |  Transmit\n face |bytes packets|bytes\n"
+                              "    lo: 1000 10 0 0 0 0 0 0 1000 10 0 0 0 0 0 0\n"
+                              "  eth0: 5000 50 0 0 0 0 0 0 3000 30 0 0 0 0 0 0\n")
+        self.write("diskstats", "   7       0 loop0 100 0 800 0 100 0 800 0 0 0 0\n")
+        self.collector = ProcCollector(self.proc)
+
+    def tearDown(self):
+        self.collector.close()
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.proc, name), "w") as f:
+            f.write(text)
+
+    def test_cpu_is_delta_between_samples(self):
+        self.assertEqual(self.collector.cpu_percent(), 0.0)
+        # 100 more busy jiffies, 300 more idle: 25% busy
+        self.write("stat", "cpu  150 0 150 1000 100 0 0 0 0 0\nbtime 1700000000\n")
+        self.assertEqual(self.collector.cpu_percent(), 25.0)
+        self.assertEqual(self.collector.boot_time(), 1700000000.0)
+
+    def test_fill(self):
+        snap = MetricsSnapshot(0.0)
+        self.collector.fill(snap, {"memory", "swap", "network", "disk_io"})
+        self.assertEqual((snap.mem_total, snap.mem_used, snap.mem_percent), (1024000, 768000, 75.0))
+        self.assertEqual((snap.swap_used, snap.swap_percent), (102400, 25.0))
+        self.assertEqual((snap.net_bytes_sent, snap.net_bytes_recv), (4000, 6000))
+        # Loop devices are not disks
+        self.assertEqual((snap.disk_read_bytes, snap.disk_write_bytes), (0, 0))
+        self.assertIsNone(snap.cpu_percent)
+
+    def test_files_longer_than_the_buffer(self):
+        self.collector._buf_size["meminfo"] = 16
+        self.assertEqual(self.collector.meminfo()[b"SwapFree"], 300 * 1024)
+
+    def test_net_rates(self):
+        earlier, later = MetricsSnapshot(10.0), MetricsSnapshot(12.0)
+        earlier.net_bytes_sent, earlier.net_bytes_recv = 1000, 2000
+        later.net_bytes_sent, later.net_bytes_recv = 3000, 6000
+        self.assertEqual(later.net_rates(earlier), (1000.0, 2000.0))
+        self.assertEqual(MetricsSnapshot(13.0).net_rates(later), (0.0, 0.0))
+
+
+
+class TestConsoleHistory(unittest.TestCase):
+    def test_read_spilled_carriage_returns(self):
+        history = ConsoleHistory(max_lines=3)
+        self.addCleanup(history.close)
+        history.append("progress 10%\rprogress 20%", "info")
+        history.append("form\x0cfeed\u2028separator", "info")
+        for i in range(5):
+            history.append(f"line {i}", "info")
+        self.assertEqual(history.read(0, 2), [("", "progress 10%\rprogress 20%", "info"),
+                                              ("", "form\x0cfeed\u2028separator", "info")])
+
+if __name__ == '__main__':
+    unittest.main()
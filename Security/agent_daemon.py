@@ -0,0 +1,559 @@
+"""
+Agent Daemon Module
+-------------------
+Headless agent for servers without a display. One process samples system
+metrics and runs scanner/hardener jobs (on demand or on a schedule); any
+number of local clients talk to it over a UNIX socket instead of each
+starting its own sampler and scans.
+
+Protocol: newline-delimited JSON over the socket. A client sends
+    {"id": 1, "method": "run", "params": {"job": "scan.lynis"}}
+and receives any number of streamed messages
+    {"id": 1, "event": "line" | "sample", "data": ...}
+followed by exactly one
+    {"id": 1, "event": "result" | "error", "data": ...}
+Requests on one connection are answered in order.
+
+Methods: ping, jobs, run {job, follow}, job {id, follow}, cancel {id},
+metrics, subscribe {count}, stats.
+"""
+
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from command_stats import CommandStats, operation
+from job_scheduler import CancellationToken, using_token
+
+logger = logging.getLogger("SecurityDashboard")
+
+DEFAULT_SOCKET_PATH = os.path.expanduser("~/.cache/security-dashboard/agent.sock")
+METRIC_GROUPS = ("cpu", "memory", "disk", "network")
+JOB_HISTORY = 50  # Finished jobs kept for late clients
+
+Event = Tuple[str, Any]
+
+
+class AgentError(Exception):
+    """Raised by AgentClient when the agent reports an error or cannot be reached."""
+
+
+class Job:
+    """
+    One run of a named job. Output lines are retained (bounded) so clients
+    that connect while it runs can still follow it.
+    """
+    ACTIVE = ("pending", "running")
+
+    def __init__(self, job_id: int, name: str, retain_lines: int = 1000):
+        self.id = job_id
+        self.name = name
+        self.state = "pending"  # pending, running, done, failed, cancelled
+        self.result = ""
+        self.token = CancellationToken()
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._lines = deque(maxlen=retain_lines)
+        self._count = 0
+        self._cond = threading.Condition()
+
+    @property
+    def active(self) -> bool:
+        return self.state in self.ACTIVE
+
+    def append(self, line: str):
+        with self._cond:
+            self._lines.append(line)
+            self._count += 1
+            self._cond.notify_all()
+
+    def start(self):
+        with self._cond:
+            self.state = "running"
+            self.started = time.time()
+
+    def finish(self, state: str, result: str):
+        with self._cond:
+            self.state = state
+            self.result = result
+            self.finished = time.time()
+            self._cond.notify_all()
+
+    def follow(self, offset: int = 0) -> Iterator[str]:
+        """Yields output from line `offset` on (or the oldest retained line) until the job ends."""
+        while True:
+            with self._cond:
+                while self._count <= offset and self.active:
+                    self._cond.wait()
+                first = self._count - len(self._lines)
+                offset = max(offset, first)
+                new = list(self._lines)[offset - first:]
+                offset = self._count
+                done = not self.active
+            yield from new
+            if done:
+                return
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: not self.active, timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "state": self.state,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+            "lines": self._count,
+            "result": None if self.active else self.result,
+        }
+
+
+class JobRunner:
+    """
+    Runs named jobs on a small worker pool. Submitting a job that is
+    already pending or running returns the in-flight run instead of
+    starting a second one.
+    """
+
+    def __init__(self, jobs: Dict[str, Callable[..., str]], max_workers: int = 2, retain_lines: int = 1000):
+        self.jobs = jobs
+        self.retain_lines = retain_lines
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent-job")
+        self._lock = threading.Lock()
+        self._recent: "OrderedDict[int, Job]" = OrderedDict()
+        self._next_id = 1
+
+    def submit(self, name: str) -> Job:
+        if name not in self.jobs:
+            raise ValueError(f"Unknown job: {name}")
+        with self._lock:
+            for job in self._recent.values():
+                if job.name == name and job.active:
+                    return job
+            job = Job(self._next_id, name, self.retain_lines)
+            self._next_id += 1
+            self._recent[job.id] = job
+            finished = [j.id for j in self._recent.values() if not j.active]
+            for job_id in finished[:max(0, len(finished) - JOB_HISTORY)]:
+                del self._recent[job_id]
+        logger.info(f"Agent job {job.id} ({name}) submitted")
+        self._pool.submit(self._run, job)
+        return job
+
+    def _run(self, job: Job):
+        if job.token.cancelled:
+            job.finish("cancelled", "Cancelled before it started.")
+            return
+        job.start()
+        try:
+            with using_token(job.token), operation(job.name):
+                result = self.jobs[job.name](progress_callback=job.append)
+            if job.token.cancelled:
+                job.finish("cancelled", result)
+            else:
+                job.finish("failed" if result.startswith("Error") else "done", result)
+        except Exception as e:
+            logger.exception(f"Agent job {job.name} crashed")
+            job.finish("failed", f"Error: {e}")
+        logger.info(f"Agent job {job.id} ({job.name}) {job.state}")
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with self._lock:
+            return self._recent.get(job_id)
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancels a pending or running job, killing the commands it started."""
+        job = self.get(job_id)
+        if job is None or not job.active:
+            return False
+        job.token.cancel()
+        return True
+
+    def recent(self) -> List[Job]:
+        with self._lock:
+            return list(self._recent.values())
+
+    def shutdown(self):
+        for job in self.recent():
+            job.token.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class MetricsFeed(threading.Thread):
+    """
+    Samples metrics at a fixed interval on behalf of every client, so the
+    host pays for one sampler no matter how many dashboards are attached.
+    """
+
+    def __init__(self, sample: Callable[[], Dict[str, Any]], interval: float = 5.0):
+        super().__init__(name="MetricsFeed", daemon=True)
+        self._sample = sample
+        self.interval = interval
+        self._cond = threading.Condition()
+        self._latest: Optional[Dict[str, Any]] = None
+        self._seq = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                sample = self._sample()
+            except Exception as e:
+                logger.warning(f"Error sampling system metrics: {e}")
+            else:
+                with self._cond:
+                    self._latest = sample
+                    self._seq += 1
+                    self._cond.notify_all()
+            self._stop_event.wait(self.interval)
+
+    def latest(self, timeout: Optional[float] = None) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """(sequence number, sample); waits up to `timeout` for the first sample."""
+        return self.wait_next(0, timeout)
+
+    def wait_next(self, seq: int, timeout: Optional[float] = None) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Blocks until a sample newer than `seq` exists (or timeout); returns the newest one."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq or self._stop_event.is_set(), timeout)
+            return self._seq, self._latest
+
+    def stop(self):
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+
+
+class Scheduler(threading.Thread):
+    """Submits jobs at fixed intervals (agent.schedule: job name -> seconds)."""
+
+    def __init__(self, runner: JobRunner, schedule: Dict[str, float]):
+        super().__init__(name="AgentScheduler", daemon=True)
+        self.runner = runner
+        self.schedule = {}
+        for name, interval in (schedule or {}).items():
+            if name not in runner.jobs:
+                logger.warning(f"Ignoring schedule for unknown job {name}")
+            elif interval and interval > 0:
+                self.schedule[name] = float(interval)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        # The first run of each job is one interval after startup, so restarts don't trigger a burst of scans
+        now = time.monotonic()
+        due = {name: now + interval for name, interval in self.schedule.items()}
+        while due and not self._stop_event.is_set():
+            name = min(due, key=due.get)
+            if self._stop_event.wait(max(0.0, due[name] - time.monotonic())):
+                break
+            self.runner.submit(name)
+            due[name] = time.monotonic() + self.schedule[name]
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def build_jobs(config, detector) -> Dict[str, Callable[..., str]]:
+    """Job table for the agent: every scanner, hardener and monitor operation by name."""
+    from security_core import Scanner, Hardener, Monitor
+    from scan_orchestrator import ScanOrchestrator
+
+    scanner = Scanner(detector, config)
+    hardener = Hardener(detector, config)
+    monitor = Monitor(detector, config)
+    orchestrator = ScanOrchestrator(scanner, config.get("concurrency.scan_budgets"))
+    return {
+        "scan.lynis": scanner.run_lynis,
+        "scan.clamav": scanner.run_clamav,
+        "scan.rkhunter": scanner.run_rkhunter,
+        "scan.nmap": scanner.run_nmap,
+        "scan.all": orchestrator.run_report,
+        "lynis.findings": scanner.lynis_findings,
+        "harden.ssh": lambda progress_callback=None: hardener.harden_ssh(),
+        "harden.firewall": lambda progress_callback=None: hardener.setup_firewall(),
+        "monitor.resources": lambda progress_callback=None: monitor.check_resources(),
+        "monitor.ports": monitor.check_ports,
+        "monitor.services": monitor.check_services,
+    }
+
+
+def metrics_sampler(groups=METRIC_GROUPS, proc: str = "/proc") -> Optional[Callable[[], Dict[str, Any]]]:
+    """
+    Sampler reading /proc (see proc_collectors.py), with psutil as the
+    fallback off Linux; None when neither is available. CPU usage is the
+    busy share since the previous sample.
+    """
+    import proc_collectors
+    try:
+        previous = [proc_collectors.read_cpu_times(proc)]
+    except OSError:
+        try:
+            import psutil
+        except ImportError:
+            logger.warning("Neither /proc nor psutil is available; the metrics API is disabled")
+            return None
+        return lambda: _psutil_sample(psutil, groups)
+
+    def sample() -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        if "cpu" in groups:
+            idle, total = proc_collectors.read_cpu_times(proc)
+            prev_idle, prev_total = previous[0]
+            previous[0] = (idle, total)
+            elapsed = total - prev_total
+            data["cpu_percent"] = round(100.0 * (elapsed - (idle - prev_idle)) / elapsed, 1) if elapsed else 0.0
+        if "memory" in groups:
+            mem = proc_collectors.read_meminfo(proc)
+            total = mem.get("MemTotal", 0)
+            used = total - mem.get("MemAvailable", mem.get("MemFree", 0))
+            data.update(mem_total=total, mem_used=used, mem_percent=round(100.0 * used / total, 1) if total else 0.0)
+        if "disk" in groups:
+            disk = proc_collectors.disk_usage("/")
+            data.update(disk_total=disk.total, disk_free=disk.free, disk_percent=disk.percent)
+        if "network" in groups:
+            interfaces = proc_collectors.read_net_dev(proc)
+            data.update(net_bytes_sent=sum(i.tx_bytes for i in interfaces),
+                        net_bytes_recv=sum(i.rx_bytes for i in interfaces))
+        return data
+    return sample
+
+
+def _psutil_sample(psutil, groups) -> Dict[str, Any]:
+    data: Dict[str, Any] = {}
+    if "cpu" in groups:
+        data["cpu_percent"] = psutil.cpu_percent(interval=None)
+    if "memory" in groups:
+        mem = psutil.virtual_memory()
+        data.update(mem_total=mem.total, mem_used=mem.used, mem_percent=mem.percent)
+    if "disk" in groups:
+        disk = psutil.disk_usage("/")
+        data.update(disk_total=disk.total, disk_free=disk.free, disk_percent=disk.percent)
+    if "network" in groups:
+        net = psutil.net_io_counters()
+        data.update(net_bytes_sent=net.bytes_sent, net_bytes_recv=net.bytes_recv)
+    return data
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        agent = self.server.agent
+        for raw in self.rfile:
+            if not raw.strip():
+                continue
+            req_id = None
+            try:
+                request = json.loads(raw)
+                req_id = request.get("id")
+                for event, data in agent.dispatch(request["method"], request.get("params") or {}):
+                    self._send(req_id, event, data)
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                self._send(req_id, "error", f"Bad request: {e}")
+            except Exception as e:
+                logger.exception("Agent request failed")
+                self._send(req_id, "error", str(e))
+
+    def _send(self, req_id, event: str, data: Any):
+        self.wfile.write((json.dumps({"id": req_id, "event": event, "data": data}) + "\n").encode())
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class AgentDaemon:
+    """
+    Serves a JobRunner and a MetricsFeed on a UNIX socket. The socket is
+    owner-only (0600): clients can run hardening steps with the agent's
+    privileges.
+    """
+
+    def __init__(self, jobs: Dict[str, Callable[..., str]], socket_path: str = DEFAULT_SOCKET_PATH,
+                 sampler: Optional[Callable[[], Dict[str, Any]]] = None, sample_interval: float = 5.0,
+                 schedule: Optional[Dict[str, float]] = None, max_workers: int = 2, retain_lines: int = 1000,
+                 stats: Optional[CommandStats] = None):
+        self.socket_path = os.path.expanduser(socket_path)
+        self.stats = stats  # CommandStats of the detector running the jobs
+        self.runner = JobRunner(jobs, max_workers, retain_lines)
+        self.feed = MetricsFeed(sampler, sample_interval) if sampler else None
+        self.scheduler = Scheduler(self.runner, schedule or {})
+        self.started = time.time()
+        self._server: Optional[_Server] = None
+        self._stop_event = threading.Event()
+
+    @classmethod
+    def from_config(cls, config, detector, socket_path: Optional[str] = None) -> "AgentDaemon":
+        return cls(
+            build_jobs(config, detector),
+            socket_path=socket_path or config.get("agent.socket") or DEFAULT_SOCKET_PATH,
+            sampler=metrics_sampler(),
+            sample_interval=config.get("agent.sample_interval", 5),
+            schedule=config.get("agent.schedule") or {},
+            max_workers=config.get("agent.workers", 2),
+            retain_lines=config.get("limits.stream_retain_lines", 1000),
+            stats=detector.stats,
+        )
+
+    # --- Requests ---
+
+    def dispatch(self, method: str, params: Dict[str, Any]) -> Iterator[Event]:
+        """Answers one request as a stream of (event, data) pairs ending in a result."""
+        if method == "ping":
+            yield "result", {"pid": os.getpid(), "uptime": time.time() - self.started}
+        elif method == "jobs":
+            yield "result", {"available": sorted(self.runner.jobs), "recent": [j.to_dict() for j in self.runner.recent()]}
+        elif method == "run":
+            job = self.runner.submit(params["job"])
+            yield from self._job_events(job, params.get("follow", True))
+        elif method == "job":
+            job = self.runner.get(int(params["id"]))
+            if job is None:
+                raise ValueError(f"Unknown job id: {params['id']}")
+            yield from self._job_events(job, params.get("follow", False))
+        elif method == "cancel":
+            yield "result", {"cancelled": self.runner.cancel(int(params["id"]))}
+        elif method == "stats":
+            if self.stats is None:
+                raise ValueError("Command statistics are not available on this agent")
+            yield "result", {op: asdict(stats) for op, stats in self.stats.snapshot().items()}
+        elif method == "metrics":
+            _, sample = self._require_feed().latest(timeout=self.feed.interval * 2)
+            yield "result", sample
+        elif method == "subscribe":
+            yield from self._subscribe(params.get("count"))
+        else:
+            raise ValueError(f"Unknown method: {method}")
+
+    @staticmethod
+    def _job_events(job: Job, follow: bool) -> Iterator[Event]:
+        if follow:
+            for line in job.follow():
+                yield "line", line
+        yield "result", job.to_dict()
+
+    def _require_feed(self) -> MetricsFeed:
+        if self.feed is None:
+            raise ValueError("Metrics are not available on this agent")
+        return self.feed
+
+    def _subscribe(self, count: Optional[int]) -> Iterator[Event]:
+        feed = self._require_feed()
+        seq, sent = 0, 0
+        while count is None or sent < count:
+            seq, sample = feed.wait_next(seq)
+            if self._stop_event.is_set():
+                break
+            yield "sample", sample
+            sent += 1
+        yield "result", {"samples": sent}
+
+    # --- Lifecycle ---
+
+    def _claim_socket(self):
+        """Removes a stale socket file, refusing to start if another agent is listening on it."""
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except OSError:
+                os.unlink(self.socket_path)
+            else:
+                raise RuntimeError(f"An agent is already listening on {self.socket_path}")
+            finally:
+                probe.close()
+        os.makedirs(os.path.dirname(self.socket_path) or ".", mode=0o700, exist_ok=True)
+
+    def start(self):
+        self._claim_socket()
+        # Created owner-only; a chmod after bind() would leave a window in which anyone could connect
+        umask = os.umask(0o177)
+        try:
+            self._server = _Server(self.socket_path, _Handler)
+        finally:
+            os.umask(umask)
+        self._server.agent = self
+        threading.Thread(target=self._server.serve_forever, name="AgentServer", daemon=True).start()
+        if self.feed:
+            self.feed.start()
+        self.scheduler.start()
+        logger.info(f"Agent listening on {self.socket_path}")
+
+    def serve_forever(self):
+        """Runs until stop(), Ctrl+C or SIGTERM."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: self._stop_event.set())
+        self.start()
+        try:
+            while not self._stop_event.wait(1):
+                pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stop_event.set()
+        self.scheduler.stop()
+        if self.feed:
+            self.feed.stop()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+        self.runner.shutdown()
+        if self.stats is not None:
+            self.stats.save()
+        logger.info("Agent stopped")
+
+
+class AgentClient:
+    """Talks to a running agent; one connection per request."""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout: Optional[float] = None):
+        self.socket_path = os.path.expanduser(socket_path)
+        self.timeout = timeout
+        self._next_id = 1
+
+    def stream(self, method: str, **params) -> Iterator[Tuple[str, Any]]:
+        """Yields (event, data) for every message up to and including the result."""
+        req_id = self._next_id
+        self._next_id += 1
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+        except OSError as e:
+            raise AgentError(f"Cannot reach agent at {self.socket_path}: {e}") from e
+        with sock, sock.makefile("rb") as replies:
+            sock.sendall((json.dumps({"id": req_id, "method": method, "params": params}) + "\n").encode())
+            for raw in replies:
+                message = json.loads(raw)
+                if message["event"] == "error":
+                    raise AgentError(message["data"])
+                yield message["event"], message["data"]
+                if message["event"] == "result":
+                    return
+        raise AgentError("Agent closed the connection")
+
+    def call(self, method: str, on_event: Optional[Callable[[str, Any], None]] = None, **params) -> Any:
+        """Sends one request and returns its result; streamed messages go to `on_event`."""
+        for event, data in self.stream(method, **params):
+            if event == "result":
+                return data
+            if on_event:
+                on_event(event, data)
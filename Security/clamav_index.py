@@ -0,0 +1,126 @@
+"""
+ClamAV Scan Index Module
+------------------------
+Persistent fingerprint index that lets ClamAV scans skip unchanged files.
+
+For every file that scanned clean we remember (inode, size, mtime) together
+with the signature database version used. On the next run only new or
+modified files are handed to the scanner. When the signature database
+changes, every file is rescanned.
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("SecurityDashboard")
+
+DEFAULT_INDEX_PATH = os.path.expanduser("~/.cache/security-dashboard/clamav_index.json")
+
+Fingerprint = Tuple[int, int, int]  # inode, size, mtime_ns
+
+
+def parse_db_version(version_output: str) -> str:
+    """
+    Extracts engine and signature versions from `clamscan --version`,
+    e.g. "ClamAV 0.103.8/26980/Mon Jul 24 07:51:04 2023" -> "ClamAV 0.103.8/26980".
+    """
+    parts = version_output.strip().split("/")
+    return "/".join(p.strip() for p in parts[:2])
+
+
+class ScanIndex:
+    """
+    (path -> inode, size, mtime) fingerprints of files that scanned clean.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = os.path.expanduser(path)
+        self.db_version: Optional[str] = None
+        self.files: Dict[str, Fingerprint] = {}
+        self._pending: Dict[str, Fingerprint] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.db_version = data.get("db_version")
+            self.files = {p: tuple(fp) for p, fp in data.get("files", {}).items()}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable ClamAV index {self.path}: {e}")
+            self.db_version, self.files = None, {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"db_version": self.db_version, "files": self.files}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def _walk(self, root: str, errors: List[str]) -> Iterable[Tuple[str, os.stat_result]]:
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                yield entry.path, entry.stat(follow_symlinks=False)
+                        except OSError as e:
+                            errors.append(f"{entry.path}: {e}")
+            except OSError as e:
+                errors.append(f"{directory}: {e}")
+
+    def changed_files(self, root: str, db_version: str) -> Tuple[List[str], bool]:
+        """
+        Walks `root` and returns (files needing a scan, walk_complete).
+
+        walk_complete is False when some directories could not be read;
+        callers should then fall back to a full scan rather than silently
+        skipping files they cannot see.
+        """
+        full_rescan = db_version != self.db_version
+        if full_rescan:
+            logger.info(f"ClamAV signatures changed ({self.db_version} -> {db_version}); rescanning everything.")
+
+        errors: List[str] = []
+        seen = set()
+        changed = []
+        self._pending = {}
+        for path, st in self._walk(root, errors):
+            if "\n" in path:
+                # clamscan --file-list is line based
+                errors.append(f"{path!r}: newline in file name")
+                continue
+            seen.add(path)
+            fingerprint = (st.st_ino, st.st_size, st.st_mtime_ns)
+            if full_rescan or self.files.get(path) != fingerprint:
+                changed.append(path)
+                self._pending[path] = fingerprint
+
+        # Forget files that disappeared from under root
+        prefix = os.path.join(root, "")
+        for path in [p for p in self.files if p.startswith(prefix) and p not in seen]:
+            del self.files[path]
+
+        if errors:
+            logger.warning(f"ClamAV index walk of {root} skipped {len(errors)} entries (first: {errors[0]})")
+        return changed, not errors
+
+    def commit(self, db_version: str, clean_paths: Iterable[str]):
+        """Records files from the last changed_files() call that scanned clean."""
+        if db_version != self.db_version:
+            self.files = {}
+            self.db_version = db_version
+        for path in clean_paths:
+            fingerprint = self._pending.get(path)
+            if fingerprint is not None:
+                self.files[path] = fingerprint
+        self._pending = {}
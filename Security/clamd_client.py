@@ -0,0 +1,274 @@
+"""
+Clamd Client Module
+-------------------
+Scans files through a running clamd daemon instead of spawning clamscan.
+
+clamscan loads the whole signature database on every start (tens of seconds
+and around a gigabyte of RAM). clamd keeps it loaded, so scans only pay for
+the bytes being scanned. Connections are opened in IDSESSION mode and kept
+in a small pool, so consecutive requests reuse the same sockets.
+"""
+
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("SecurityDashboard")
+
+# Where distributions put the clamd socket (Debian/Ubuntu, Fedora/RHEL, Arch)
+DEFAULT_SOCKETS = (
+    "/var/run/clamav/clamd.ctl",
+    "/run/clamav/clamd.ctl",
+    "/run/clamd.scan/clamd.sock",
+    "/var/run/clamd.scan/clamd.sock",
+    "/run/clamav/clamd.sock",
+)
+
+CHUNK_SIZE = 64 * 1024
+
+# Called with (path, signature or None, error or None) for every scanned file
+ResultCallback = Callable[[str, Optional[str], Optional[str]], None]
+
+
+class ClamdError(Exception):
+    """clamd could not be reached or returned an error reply."""
+
+
+class ClamdTimeout(ClamdError):
+    """clamd did not finish within the client's timeout."""
+
+
+def find_socket(candidates: Iterable[str] = DEFAULT_SOCKETS) -> Optional[str]:
+    """Returns the first existing clamd socket path, if any."""
+    for path in candidates:
+        if path and os.path.exists(path):
+            return path
+    return None
+
+
+def parse_reply(reply: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """
+    Splits a scan reply into (path, signature, error), e.g.
+    "/tmp/x: Eicar-Test-Signature FOUND" -> ("/tmp/x", "Eicar-Test-Signature", None).
+    """
+    path, _, status = reply.rpartition(": ")
+    if status.endswith(" FOUND"):
+        return path, status[:-len(" FOUND")], None
+    if status.endswith(" ERROR"):
+        return path, None, status[:-len(" ERROR")]
+    if status == "OK":
+        return path, None, None
+    return path, None, reply
+
+
+class _Session:
+    """One IDSESSION connection; requests are numbered and replies matched by id."""
+
+    def __init__(self, socket_path: str, timeout: float):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(socket_path)
+            self.sock.sendall(b"zIDSESSION\0")
+        except OSError:
+            self.sock.close()
+            raise
+        self._next_id = 1
+        self._buffer = b""
+
+    def _read_reply(self) -> str:
+        while b"\0" not in self._buffer:
+            data = self.sock.recv(4096)
+            if not data:
+                raise ConnectionError("clamd closed the connection")
+            self._buffer += data
+        reply, self._buffer = self._buffer.split(b"\0", 1)
+        return reply.decode("utf-8", errors="replace")
+
+    def request(self, command: str, stream=None) -> str:
+        request_id = self._next_id
+        self._next_id += 1
+        self.sock.sendall(b"z" + command.encode("utf-8") + b"\0")
+        if stream is not None:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                self.sock.sendall(struct.pack("!L", len(chunk)) + chunk)
+            self.sock.sendall(struct.pack("!L", 0))
+        reply = self._read_reply()
+        prefix, _, body = reply.partition(": ")
+        if prefix != str(request_id):
+            raise ConnectionError(f"Unexpected clamd reply: {reply!r}")
+        return body
+
+    def close(self):
+        try:
+            self.sock.sendall(b"zEND\0")
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class ClamdClient:
+    """
+    Pooled client for clamd's UNIX socket.
+
+    Up to `pool_size` session connections are kept open and shared between
+    threads. A connection that clamd dropped (e.g. after its IdleTimeout) is
+    replaced transparently on the next request.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, pool_size: int = 4, timeout: float = 60.0):
+        self.socket_path = socket_path or find_socket()
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self._idle: List[_Session] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+
+    @contextmanager
+    def _session(self):
+        if not self.socket_path:
+            raise ClamdError("No clamd socket found")
+        with self._slots:
+            with self._lock:
+                session = self._idle.pop() if self._idle else None
+            try:
+                if session is None:
+                    session = _Session(self.socket_path, self.timeout)
+                yield session
+            except BaseException:
+                # Never hand a half-used connection to the next caller
+                if session is not None:
+                    session.close()
+                raise
+            with self._lock:
+                self._idle.append(session)
+
+    def _request(self, command: str, path: Optional[str] = None) -> str:
+        for attempt in (1, 2):
+            try:
+                with self._session() as session:
+                    if path is None:
+                        return session.request(command)
+                    with open(path, "rb") as stream:
+                        return session.request(command, stream)
+            except (ConnectionError, socket.timeout) as e:
+                # A pooled connection may have been closed by clamd; retry once on a fresh one
+                if attempt == 2:
+                    raise ClamdError(f"clamd request failed: {e}") from e
+            except OSError as e:
+                if path is not None and e.filename == path:
+                    raise
+                raise ClamdError(f"clamd unavailable at {self.socket_path}: {e}") from e
+
+    def ping(self) -> bool:
+        try:
+            return self._request("PING") == "PONG"
+        except ClamdError:
+            return False
+
+    def version(self) -> str:
+        """Engine and signature version, in `clamscan --version` format."""
+        return self._request("VERSION")
+
+    def scan_file(self, path: str) -> Optional[str]:
+        """Streams one file to clamd (INSTREAM). Returns the signature name or None if clean."""
+        _, signature, error = parse_reply(self._request("INSTREAM", path))
+        if error:
+            raise ClamdError(f"{path}: {error}")
+        return signature
+
+    def scan_files(self, paths: Iterable[str], on_result: Optional[ResultCallback] = None) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        Streams many files concurrently over the pooled connections.
+        Returns ({path: signature} for infected files, {path: error} for failures).
+        """
+        infected: Dict[str, str] = {}
+        errors: Dict[str, str] = {}
+
+        def scan(path: str):
+            signature = error = None
+            try:
+                signature = self.scan_file(path)
+            except (ClamdError, OSError) as e:
+                error = str(e)
+            if on_result:
+                on_result(path, signature, error)
+            return path, signature, error
+
+        with ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="clamd") as pool:
+            for path, signature, error in pool.map(scan, paths):
+                if error:
+                    errors[path] = error
+                elif signature:
+                    infected[path] = signature
+        return infected, errors
+
+    def multiscan(self, path: str, on_result: Optional[ResultCallback] = None,
+                  timeout: Optional[float] = None) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        Has clamd walk `path` itself with its own thread pool (MULTISCAN).
+        clamd opens the files, so they must be readable by the clamd user.
+        The whole scan must finish within `timeout` seconds (the client's
+        timeout by default), else ClamdTimeout is raised.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        infected: Dict[str, str] = {}
+        errors: Dict[str, str] = {}
+        if not self.socket_path:
+            raise ClamdError("No clamd socket found")
+        # MULTISCAN is not allowed inside a session, so it gets its own connection
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # clamd only replies for infected files and errors, so a clean tree is silent until the end:
+        # the timeout covers the whole scan, not each read
+        deadline = time.monotonic() + timeout
+        try:
+            sock.settimeout(timeout)
+            sock.connect(self.socket_path)
+            sock.sendall(f"zMULTISCAN {os.path.abspath(path)}\0".encode("utf-8"))
+            buffer = b""
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise socket.timeout()
+                sock.settimeout(remaining)
+                data = sock.recv(4096)
+                if not data:
+                    break
+                buffer += data
+                *replies, buffer = buffer.split(b"\0")
+                for raw in replies:
+                    file_path, signature, error = parse_reply(raw.decode("utf-8", errors="replace"))
+                    if error:
+                        errors[file_path] = error
+                    elif signature:
+                        infected[file_path] = signature
+                    if on_result and (signature or error):
+                        on_result(file_path, signature, error)
+        except socket.timeout as e:
+            raise ClamdTimeout(f"clamd MULTISCAN of {path} did not finish within {timeout:g}s") from e
+        except OSError as e:
+            raise ClamdError(f"clamd unavailable at {self.socket_path}: {e}") from e
+        finally:
+            sock.close()
+        return infected, errors
+
+    def close(self):
+        with self._lock:
+            sessions, self._idle = self._idle, []
+        for session in sessions:
+            session.close()
+
+
+def connect(socket_path: Optional[str] = None, pool_size: int = 4, timeout: float = 60.0) -> Optional[ClamdClient]:
+    """Returns a client for a responsive clamd, or None so callers can fall back to clamscan."""
+    client = ClamdClient(socket_path, pool_size, timeout)
+    if client.socket_path and client.ping():
+        return client
+    client.close()
+    return None
@@ -0,0 +1,151 @@
+"""
+Command Stats Module
+--------------------
+Aggregates the resource usage of every command (CommandResult) per
+operation, e.g. "scan.lynis" or a dashboard button, so the expensive scans
+on a host are easy to spot and schedules can be tuned around them.
+
+The operation is taken from the calling thread (see `operation()`); job
+runners set it around each job. Commands run outside any operation are
+filed under their program name. Totals persist across runs as JSON.
+"""
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger("SecurityDashboard")
+
+DEFAULT_STATS_PATH = os.path.expanduser("~/.cache/security-dashboard/command_stats.json")
+
+_local = threading.local()
+
+
+def current_operation() -> Optional[str]:
+    return getattr(_local, "operation", None)
+
+
+@contextmanager
+def operation(name: Optional[str]) -> Iterator[Optional[str]]:
+    """Files commands run on this thread under `name` (None keeps the enclosing operation)."""
+    previous = current_operation()
+    _local.operation = name or previous
+    try:
+        yield _local.operation
+    finally:
+        _local.operation = previous
+
+
+@dataclass
+class OperationStats:
+    """Running totals for one operation."""
+    commands: int = 0
+    failures: int = 0
+    wall_time: float = 0.0
+    max_wall_time: float = 0.0
+    cpu_user: float = 0.0
+    cpu_system: float = 0.0
+    max_rss_kb: int = 0
+    output_bytes: int = 0
+    io_read_bytes: int = 0
+    io_write_bytes: int = 0
+
+    @property
+    def cpu_time(self) -> float:
+        return self.cpu_user + self.cpu_system
+
+    def add(self, result):
+        self.commands += 1
+        self.failures += result.return_code != 0
+        self.wall_time += result.duration
+        self.max_wall_time = max(self.max_wall_time, result.duration)
+        self.cpu_user += result.cpu_user or 0.0
+        self.cpu_system += result.cpu_system or 0.0
+        self.max_rss_kb = max(self.max_rss_kb, result.max_rss_kb or 0)
+        self.output_bytes += result.output_bytes or 0
+        self.io_read_bytes += result.io_read_bytes or 0
+        self.io_write_bytes += result.io_write_bytes or 0
+
+
+class CommandStats:
+    """Thread-safe per-operation totals, optionally persisted to `path`."""
+
+    def __init__(self, path: Optional[str] = DEFAULT_STATS_PATH):
+        self.path = os.path.expanduser(path) if path else None
+        self._lock = threading.Lock()
+        self._ops: Dict[str, OperationStats] = {}
+        self._dirty = False
+        if self.path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            known = {f.name for f in fields(OperationStats)}
+            self._ops = {op: OperationStats(**{k: v for k, v in totals.items() if k in known})
+                         for op, totals in data.items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable command stats {self.path}: {e}")
+
+    def record(self, result, operation_name: Optional[str] = None):
+        """Adds a finished command to its operation's totals."""
+        name = operation_name or current_operation() or os.path.basename(result.command.split(" ", 1)[0]) or "?"
+        with self._lock:
+            self._ops.setdefault(name, OperationStats()).add(result)
+            self._dirty = True
+
+    def get(self, operation_name: str) -> Optional[OperationStats]:
+        with self._lock:
+            stats = self._ops.get(operation_name)
+            return OperationStats(**asdict(stats)) if stats else None
+
+    def snapshot(self) -> Dict[str, OperationStats]:
+        with self._lock:
+            return {op: OperationStats(**asdict(stats)) for op, stats in self._ops.items()}
+
+    def reset(self):
+        with self._lock:
+            self._ops = {}
+            self._dirty = True
+
+    def save(self):
+        """Writes the totals if anything changed since the last save."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {op: asdict(stats) for op, stats in self._ops.items()}
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write command stats {self.path}: {e}")
+
+    def render(self, top: int = 20) -> str:
+        """Operations by total CPU time, most expensive first."""
+        ops = sorted(self.snapshot().items(), key=lambda item: (item[1].cpu_time, item[1].wall_time), reverse=True)
+        if not ops:
+            return "No commands recorded yet."
+        lines = [
+            f"{'Operation':<28} {'Runs':>5} {'Fail':>4} {'Wall s':>8} {'Max s':>7} {'CPU s':>8} {'Peak MB':>8} {'Out KB':>8} {'Read MB':>8} {'Write MB':>8}",
+            "-" * 104,
+        ]
+        for name, s in ops[:top]:
+            lines.append(
+                f"{name[:28]:<28} {s.commands:>5} {s.failures:>4} {s.wall_time:>8.1f} {s.max_wall_time:>7.1f} "
+                f"{s.cpu_time:>8.1f} {s.max_rss_kb / 1024:>8.1f} {s.output_bytes / 1024:>8.1f} "
+                f"{s.io_read_bytes / 1024**2:>8.1f} {s.io_write_bytes / 1024**2:>8.1f}"
+            )
+        return "\n".join(lines)
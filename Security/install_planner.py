@@ -0,0 +1,131 @@
+"""
+Install Planner Module
+----------------------
+Collects the tools every module needs, works out which are missing and
+installs them in one package manager transaction.
+
+Installing tools one at a time costs an index refresh and a package lock
+per tool. Bootstrapping a fresh host through the planner pays for both
+once.
+"""
+
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger("SecurityDashboard")
+
+# Binary -> package, where the names differ (anything unlisted is its own package)
+TOOL_PACKAGES = {
+    "clamscan": "clamav",
+    "freshclam": "clamav",
+    "fail2ban-client": "fail2ban",
+    "netstat": "net-tools",
+    "ifconfig": "net-tools",
+    "ss": "iproute2",
+    "ip": "iproute2",
+}
+
+# Per package manager exceptions to TOOL_PACKAGES
+MANAGER_PACKAGES = {
+    "apt": {"freshclam": "clamav-freshclam"},
+    "dnf": {"freshclam": "clamav-update", "ss": "iproute", "ip": "iproute"},
+    "yum": {"freshclam": "clamav-update", "ss": "iproute", "ip": "iproute"},
+}
+
+# Touched by the package manager whenever its metadata is refreshed (by anyone)
+INDEX_PATHS = {
+    "apt": "/var/lib/apt/lists",
+    "dnf": "/var/cache/dnf",
+    "yum": "/var/cache/yum",
+    "pacman": "/var/lib/pacman/sync",
+    "zypper": "/var/cache/zypp/raw",
+    "apk": "/var/cache/apk",
+}
+
+
+def index_age(index_path: Optional[str], refreshed_at: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds since package metadata was last refreshed: by us (`refreshed_at`)
+    or by anyone else (mtime of `index_path`). None if unknown.
+    """
+    stamps = [refreshed_at] if refreshed_at else []
+    if index_path:
+        try:
+            stamps.append(os.stat(index_path).st_mtime)
+        except OSError:
+            pass
+    return time.time() - max(stamps) if stamps else None
+
+
+def package_for(tool: str, pkg_mgr: Optional[str] = None) -> str:
+    """Package that provides `tool` under the given package manager."""
+    return MANAGER_PACKAGES.get(pkg_mgr, {}).get(tool) or TOOL_PACKAGES.get(tool, tool)
+
+
+def missing_packages(resolved: Dict[str, Optional[str]], pkg_mgr: Optional[str] = None) -> List[str]:
+    """Packages to install for the unresolved tools in a ToolRegistry.resolve_many() result."""
+    return list(dict.fromkeys(package_for(tool, pkg_mgr) for tool, path in resolved.items() if not path))
+
+
+@dataclass
+class InstallPlan:
+    """Missing tools and the packages that provide them."""
+    pkg_mgr: Optional[str]
+    missing: Dict[str, str] = field(default_factory=dict)  # tool -> package
+
+    @property
+    def packages(self) -> List[str]:
+        return list(dict.fromkeys(self.missing.values()))
+
+    def __bool__(self) -> bool:
+        return bool(self.missing)
+
+
+class InstallPlanner:
+    """
+    Gathers required tools (from modules' REQUIRED_TOOLS or explicit lists)
+    and installs whatever is missing through SystemDetector.install_packages.
+    """
+
+    def __init__(self, detector, modules: Iterable = ()):
+        self.detector = detector
+        self.tools: List[str] = []
+        for module in modules:
+            self.require(getattr(module, "REQUIRED_TOOLS", ()))
+
+    def require(self, tools: Iterable[str]):
+        for tool in tools:
+            if tool not in self.tools:
+                self.tools.append(tool)
+
+    def plan(self, tools: Optional[Iterable[str]] = None) -> InstallPlan:
+        tools = list(tools) if tools is not None else self.tools
+        pkg_mgr = self.detector.pkg_mgr
+        if self.detector.simulation_mode:
+            resolved = {tool: tool for tool in tools}
+        else:
+            resolved = self.detector.tools.resolve_many(tools)
+        return InstallPlan(pkg_mgr, {t: package_for(t, pkg_mgr) for t, path in resolved.items() if not path})
+
+    def install(self, tools: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """Installs every missing tool in one batch. Returns tool -> available afterwards."""
+        plan = self.plan(tools)
+        if not plan:
+            return {}
+        logger.info(f"Installing {len(plan.packages)} packages for {len(plan.missing)} missing tools in one batch")
+        self.detector.install_packages(plan.packages)
+        resolved = self.detector.tools.resolve_many(plan.missing)
+        return {tool: bool(resolved[tool]) for tool in plan.missing}
+
+    def install_report(self) -> str:
+        """Dashboard entry point: installs all missing tools and summarises the outcome."""
+        results = self.install()
+        if not results:
+            return "All required tools are already installed."
+        lines = [f"{tool}: {'installed' if ok else 'FAILED'}" for tool, ok in sorted(results.items())]
+        failed = [tool for tool, ok in results.items() if not ok]
+        header = f"Installed {len(results) - len(failed)} of {len(results)} missing tools."
+        return "\n".join([header] + lines)
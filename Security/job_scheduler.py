@@ -0,0 +1,303 @@
+"""
+Job Scheduler Module
+--------------------
+Runs dashboard operations on a small worker pool, highest priority first.
+
+Submitting a job whose key matches one that is already queued or running
+returns the in-flight job instead of starting a duplicate. Every job
+carries a CancellationToken; commands that SystemDetector starts while the
+job runs register with it, so cancelling a job kills their process groups
+rather than just raising a flag the subprocess never sees.
+
+One worker is reserved for high-priority jobs, so quick checks never queue
+behind long scans.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from command_stats import operation
+
+logger = logging.getLogger("SecurityDashboard")
+
+PRIORITY_HIGH = 0     # Quick checks (resources, findings)
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20     # Long scans
+JOB_HISTORY = 100     # Finished jobs kept for inspection
+
+
+class JobCancelled(Exception):
+    """Raised by CancellationToken.raise_if_cancelled() inside a cancelled job."""
+
+
+class CancellationToken:
+    """
+    Cancellation flag plus callbacks that run when it is set (e.g. killing
+    a child process). Callbacks run on the cancelling thread.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._handles = itertools.count()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Cancellation callback failed")
+
+    def register(self, callback: Callable[[], None]) -> Optional[int]:
+        """
+        Calls `callback` on cancel, or right away if already cancelled.
+        Returns a handle for unregister().
+        """
+        with self._lock:
+            if not self._event.is_set():
+                handle = next(self._handles)
+                self._callbacks[handle] = callback
+                return handle
+        callback()
+        return None
+
+    def unregister(self, handle: Optional[int]):
+        with self._lock:
+            self._callbacks.pop(handle, None)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise JobCancelled()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._event.wait(timeout)
+
+
+_local = threading.local()
+
+
+def current_token() -> Optional[CancellationToken]:
+    """Token of the job running on this thread, if any."""
+    return getattr(_local, "token", None)
+
+
+@contextmanager
+def using_token(token: Optional[CancellationToken]) -> Iterator[Optional[CancellationToken]]:
+    """Makes `token` the current token for this thread (e.g. in helper threads of a job)."""
+    previous = current_token()
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+class Job:
+    """A submitted operation and its state: queued, running, done, failed or cancelled."""
+    ACTIVE = ("queued", "running")
+
+    def __init__(self, job_id: int, label: str, func: Callable[[], Any], priority: int, key: Any):
+        self.id = job_id
+        self.label = label
+        self.func = func
+        self.priority = priority
+        self.key = key
+        self.state = "queued"
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.token = CancellationToken()
+        self._done = threading.Event()
+
+    @property
+    def active(self) -> bool:
+        return self.state in self.ACTIVE
+
+    @property
+    def duration(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def __repr__(self) -> str:
+        return f"<Job #{self.id} {self.label!r} {self.state}>"
+
+
+class JobScheduler:
+    """
+    Priority queue + worker pool. `on_change(job)` is called (from worker
+    or caller threads) whenever a job changes state.
+    """
+
+    def __init__(self, max_workers: int = 3, reserved_high: int = 1,
+                 on_change: Optional[Callable[[Job], None]] = None):
+        self.max_workers = max(1, max_workers)
+        self.reserved_high = max(0, min(reserved_high, self.max_workers - 1))
+        self.on_change = on_change
+        self._cond = threading.Condition()
+        self._heap: List = []
+        self._order = itertools.count()
+        self._ids = itertools.count(1)
+        self._jobs: Dict[int, Job] = {}
+        self._running_other = 0  # Running jobs below high priority
+        self._shutdown = False
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"JobWorker-{i}", daemon=True)
+            for i in range(self.max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, func: Callable[[], Any], label: str, priority: int = PRIORITY_NORMAL,
+               key: Any = None) -> Job:
+        """
+        Queues `func`. If a job with the same key (default: the label) is
+        queued or running, that job is returned instead.
+        """
+        key = label if key is None else key
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Scheduler is shut down")
+            for job in self._jobs.values():
+                if job.key == key and job.active:
+                    logger.info(f"{label} is already {job.state}; not starting it twice")
+                    return job
+            job = Job(next(self._ids), label, func, priority, key)
+            self._jobs[job.id] = job
+            heapq.heappush(self._heap, (priority, next(self._order), job))
+            self._prune()
+            self._cond.notify_all()
+        logger.info(f"Job #{job.id} queued: {label} (priority {priority})")
+        self._changed(job)
+        return job
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - JOB_HISTORY)]:
+            del self._jobs[job_id]
+
+    def _eligible(self, job: Job) -> bool:
+        return job.priority <= PRIORITY_HIGH or self._running_other < self.max_workers - self.reserved_high
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while True:
+                    # Drop jobs cancelled while queued
+                    while self._heap and self._heap[0][2].state != "queued":
+                        heapq.heappop(self._heap)
+                    if self._shutdown or (self._heap and self._eligible(self._heap[0][2])):
+                        break
+                    self._cond.wait()
+                if self._shutdown:
+                    return
+                _, _, job = heapq.heappop(self._heap)
+                job.state = "running"
+                job.started = time.time()
+                counted = job.priority > PRIORITY_HIGH
+                if counted:
+                    self._running_other += 1
+            self._changed(job)
+            self._run(job)
+            with self._cond:
+                if counted:
+                    self._running_other -= 1
+                self._cond.notify_all()
+            job._done.set()
+            self._changed(job)
+
+    def _run(self, job: Job):
+        try:
+            with using_token(job.token), operation(job.label):
+                job.result = job.func()
+            state = "cancelled" if job.token.cancelled else "done"
+        except JobCancelled:
+            state = "cancelled"
+        except Exception as e:
+            if job.token.cancelled:
+                state = "cancelled"
+            else:
+                logger.exception(f"Error in job {job.label}")
+                job.error = str(e)
+                state = "failed"
+        with self._cond:
+            job.state = state
+            job.finished = time.time()
+        logger.info(f"Job #{job.id} {state} in {job.duration:.1f}s: {job.label}")
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancels a queued or running job (killing its commands). False if it already ended."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or not job.active:
+                return False
+            was_queued = job.state == "queued"
+            if was_queued:
+                job.state = "cancelled"
+                job.finished = time.time()
+        logger.info(f"Cancelling job #{job.id}: {job.label}")
+        job.token.cancel()
+        if was_queued:
+            job._done.set()
+            self._changed(job)
+        return True
+
+    def cancel_all(self) -> int:
+        return sum(self.cancel(job.id) for job in self.active())
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        """All known jobs (active and recent), oldest first."""
+        with self._cond:
+            return list(self._jobs.values())
+
+    def active(self) -> List[Job]:
+        return [job for job in self.jobs() if job.active]
+
+    def summary(self) -> str:
+        """One-line state overview, e.g. for a status bar."""
+        active = self.active()
+        running = [job.label for job in active if job.state == "running"]
+        queued = len(active) - len(running)
+        if not active:
+            return "Ready"
+        text = f"Running: {', '.join(running)}" if running else "Waiting"
+        return f"{text} | Queued: {queued}" if queued else text
+
+    def shutdown(self, cancel: bool = True):
+        if cancel:
+            self.cancel_all()
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+
+    def _changed(self, job: Job):
+        if self.on_change:
+            try:
+                self.on_change(job)
+            except Exception:
+                logger.exception("Job state listener failed")
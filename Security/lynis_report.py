@@ -0,0 +1,189 @@
+"""
+Lynis Report Module
+-------------------
+Parses the machine-readable Lynis report (/var/log/lynis-report.dat) into
+typed findings, and caches the result so one multi-minute audit can feed
+the scan output, generated reports and the vulnerability counter.
+
+A cached audit stays valid until it is older than the TTL or the host state
+it was taken on changes (kernel, packages, accounts, key config files).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import platform
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger("SecurityDashboard")
+
+DEFAULT_REPORT_PATH = "/var/log/lynis-report.dat"
+DEFAULT_CACHE_PATH = os.path.expanduser("~/.cache/security-dashboard/lynis_report.json")
+DEFAULT_TTL = 24 * 3600
+
+# Files whose change can alter the audit outcome
+FINGERPRINT_PATHS = (
+    "/etc/passwd",
+    "/etc/group",
+    "/etc/sudoers",
+    "/etc/login.defs",
+    "/etc/ssh/sshd_config",
+    "/etc/fstab",
+    "/etc/sysctl.conf",
+    "/var/lib/dpkg/status",
+    "/var/lib/rpm/rpmdb.sqlite",
+    "/var/lib/pacman/local",
+)
+
+
+@dataclass
+class Finding:
+    """One warning[] or suggestion[] entry: TEST-ID|message|details|solution|"""
+    test_id: str
+    message: str
+    details: str = ""
+    solution: str = ""
+
+    @classmethod
+    def parse(cls, value: str) -> "Finding":
+        parts = value.split("|")
+        parts += [""] * (4 - len(parts))
+        test_id, message, details, solution = (p.strip() for p in parts[:4])
+        # Lynis uses "-" for empty columns
+        return cls(test_id, message, "" if details == "-" else details, "" if solution == "-" else solution)
+
+
+@dataclass
+class LynisReport:
+    hardening_index: Optional[int] = None
+    warnings: List[Finding] = field(default_factory=list)
+    suggestions: List[Finding] = field(default_factory=list)
+    lynis_version: str = ""
+    hostname: str = ""
+    os_name: str = ""
+    tests_performed: int = 0
+    finished: str = ""  # report_datetime_end as written by Lynis
+
+    @property
+    def vulnerability_count(self) -> int:
+        return len(self.warnings)
+
+    def render(self, max_suggestions: Optional[int] = None) -> str:
+        lines = [
+            f"Lynis {self.lynis_version} audit of {self.hostname or 'this host'} ({self.finished or 'unknown time'})",
+            f"Hardening index: {self.hardening_index if self.hardening_index is not None else 'n/a'}"
+            f" | Tests performed: {self.tests_performed}"
+            f" | Warnings: {len(self.warnings)} | Suggestions: {len(self.suggestions)}",
+        ]
+        if self.warnings:
+            lines.append("")
+            lines.append("Warnings:")
+            for f in self.warnings:
+                lines.append(f"  [{f.test_id}] {f.message}" + (f" ({f.details})" if f.details else ""))
+        suggestions = self.suggestions if max_suggestions is None else self.suggestions[:max_suggestions]
+        if suggestions:
+            lines.append("")
+            lines.append("Suggestions:")
+            for f in suggestions:
+                lines.append(f"  [{f.test_id}] {f.message}" + (f" ({f.details})" if f.details else ""))
+            if len(suggestions) < len(self.suggestions):
+                lines.append(f"  ... and {len(self.suggestions) - len(suggestions)} more")
+        return "\n".join(lines)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LynisReport":
+        data = dict(data)
+        data["warnings"] = [Finding(**f) for f in data.get("warnings", [])]
+        data["suggestions"] = [Finding(**f) for f in data.get("suggestions", [])]
+        return cls(**data)
+
+
+def parse_report(text: str) -> LynisReport:
+    """Parses the contents of lynis-report.dat."""
+    report = LynisReport()
+    for line in text.splitlines():
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, _, value = line.partition("=")
+        if key == "warning[]":
+            report.warnings.append(Finding.parse(value))
+        elif key == "suggestion[]":
+            report.suggestions.append(Finding.parse(value))
+        elif key == "hardening_index":
+            report.hardening_index = int(value) if value.isdigit() else None
+        elif key == "lynis_version":
+            report.lynis_version = value
+        elif key == "hostname":
+            report.hostname = value
+        elif key == "os_name":
+            report.os_name = value
+        elif key == "lynis_tests_done":
+            report.tests_performed = int(value) if value.isdigit() else 0
+        elif key == "report_datetime_end":
+            report.finished = value
+    return report
+
+
+def load_report(path: str = DEFAULT_REPORT_PATH) -> Optional[LynisReport]:
+    """Parses the report at `path`; None if it is missing or unreadable."""
+    try:
+        with open(path, errors="replace") as f:
+            return parse_report(f.read())
+    except OSError as e:
+        logger.warning(f"Could not read Lynis report {path}: {e}")
+        return None
+
+
+def host_fingerprint(paths: Iterable[str] = FINGERPRINT_PATHS) -> str:
+    """Digest of the kernel release and the (mtime, size) of files that shape the audit."""
+    digest = hashlib.sha1(platform.release().encode())
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        digest.update(f"{path}:{st.st_mtime_ns}:{st.st_size}".encode())
+    return digest.hexdigest()
+
+
+class LynisCache:
+    """
+    Last parsed audit, persisted as JSON next to the host fingerprint it
+    was taken on. get() only returns it while it is fresh.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_TTL,
+                 fingerprint_paths: Iterable[str] = FINGERPRINT_PATHS):
+        self.path = os.path.expanduser(path)
+        self.ttl = ttl
+        self.fingerprint_paths = tuple(fingerprint_paths)
+
+    def get(self) -> Optional[LynisReport]:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if time.time() - data["created"] > self.ttl:
+                return None
+            if data["fingerprint"] != host_fingerprint(self.fingerprint_paths):
+                logger.info("Host state changed since the last Lynis audit; cached result discarded.")
+                return None
+            return LynisReport.from_dict(data["report"])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable Lynis cache {self.path}: {e}")
+            return None
+
+    def put(self, report: LynisReport):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "created": time.time(),
+                "fingerprint": host_fingerprint(self.fingerprint_paths),
+                "report": asdict(report),
+            }, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,216 @@
+"""
+Port Inventory Module
+---------------------
+Keeps an inventory of listening sockets read straight from the kernel
+socket tables (/proc/net/{tcp,tcp6,udp,udp6}) and reports what changed.
+
+Every check takes a snapshot, indexes the listeners by port, protocol and
+owning pid, and diffs it against the previous snapshot (persisted between
+runs) and against `security.allowed_ports`. Only changes are reported, so a
+new listener on a port that is not allowed shows up within milliseconds of
+the next check, without an nmap run.
+"""
+
+import ipaddress
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from proc_collectors import PROC, SOCKET_TABLES, read_sockets
+
+logger = logging.getLogger("SecurityDashboard")
+
+DEFAULT_STATE_PATH = os.path.expanduser("~/.cache/security-dashboard/listening_ports.json")
+
+
+@dataclass(frozen=True)
+class Listener:
+    proto: str  # tcp, tcp6, udp or udp6
+    address: str
+    port: int
+    inode: int = 0
+    pid: Optional[int] = None  # None if the owner is not visible to us (another user's process without root)
+    process: str = ""
+    uid: int = -1
+
+    @property
+    def key(self) -> Tuple[str, str, int]:
+        return self.proto, self.address, self.port
+
+    @property
+    def loopback(self) -> bool:
+        return ipaddress.ip_address(self.address).is_loopback
+
+    def describe(self) -> str:
+        address = f"[{self.address}]" if ":" in self.address else self.address
+        owner = f"{self.process or '?'}, pid {self.pid}" if self.pid else "owner unknown"
+        return f"{self.proto:<5} {address}:{self.port} ({owner})"
+
+
+@dataclass
+class PortChange:
+    action: str  # opened or closed
+    listener: Listener
+    allowed: bool
+
+    def render(self) -> str:
+        flag = "" if self.allowed else "  [NOT ALLOWED]"
+        return f"{'+' if self.action == 'opened' else '-'} {self.listener.describe()}{flag}"
+
+
+class PortSnapshot:
+    """Listeners at one point in time, indexed by key, port, protocol and pid."""
+
+    def __init__(self, listeners: Iterable[Listener], taken: Optional[float] = None):
+        self.taken = time.time() if taken is None else taken
+        self.listeners: Dict[Tuple[str, str, int], Listener] = {}
+        self.by_port: Dict[int, List[Listener]] = {}
+        self.by_proto: Dict[str, List[Listener]] = {}
+        self.by_pid: Dict[Optional[int], List[Listener]] = {}
+        for listener in listeners:
+            self.listeners[listener.key] = listener
+            self.by_port.setdefault(listener.port, []).append(listener)
+            self.by_proto.setdefault(listener.proto, []).append(listener)
+            self.by_pid.setdefault(listener.pid, []).append(listener)
+
+    def __len__(self) -> int:
+        return len(self.listeners)
+
+    def __iter__(self):
+        return iter(sorted(self.listeners.values(), key=lambda l: (l.port, l.proto, l.address)))
+
+    def diff(self, previous: "PortSnapshot") -> Tuple[List[Listener], List[Listener]]:
+        """(opened, closed) relative to `previous`."""
+        opened = [self.listeners[k] for k in self.listeners.keys() - previous.listeners.keys()]
+        closed = [previous.listeners[k] for k in previous.listeners.keys() - self.listeners.keys()]
+        return opened, closed
+
+
+def socket_owners(inodes: Set[int], proc: str = PROC) -> Dict[int, Tuple[int, str]]:
+    """
+    Maps socket inodes to (pid, process name) by walking /proc/<pid>/fd.
+    Stops as soon as every inode is found; processes we may not inspect are skipped.
+    """
+    owners: Dict[int, Tuple[int, str]] = {}
+    wanted = {f"socket:[{inode}]": inode for inode in inodes}
+    if not wanted:
+        return owners
+    for entry in os.listdir(proc):
+        if not entry.isdigit():
+            continue
+        fd_dir = os.path.join(proc, entry, "fd")
+        try:
+            with os.scandir(fd_dir) as fds:
+                links = [os.readlink(fd.path) for fd in fds]
+        except OSError:
+            continue
+        found = [wanted.pop(link) for link in links if link in wanted]
+        if found:
+            try:
+                with open(os.path.join(proc, entry, "comm")) as f:
+                    name = f.read().strip()
+            except OSError:
+                name = ""
+            for inode in found:
+                owners[inode] = (int(entry), name)
+            if not wanted:
+                break
+    return owners
+
+
+class PortInventory:
+    """
+    Snapshots listening sockets and reports changes against the previous
+    snapshot and the allowed ports. Loopback-only listeners are allowed
+    unless `allow_loopback` is off (they are not reachable from outside).
+    """
+
+    def __init__(self, allowed_ports: Iterable[int] = (), proc: str = PROC,
+                 state_path: Optional[str] = DEFAULT_STATE_PATH, allow_loopback: bool = True):
+        self.allowed_ports = {int(p) for p in allowed_ports}
+        self.proc = proc
+        self.state_path = os.path.expanduser(state_path) if state_path else None
+        self.allow_loopback = allow_loopback
+        self.previous: Optional[PortSnapshot] = self._load() if self.state_path else None
+        self._owners: Dict[int, Tuple[Optional[int], str]] = {}
+
+    def is_allowed(self, listener: Listener) -> bool:
+        return listener.port in self.allowed_ports or (self.allow_loopback and listener.loopback)
+
+    def snapshot(self) -> PortSnapshot:
+        entries = [e for e in read_sockets(SOCKET_TABLES, self.proc) if e.listening]
+        inodes = {e.inode for e in entries if e.inode}
+        # Owners of sockets seen before are kept (also when unknown); only new inodes need the /proc/<pid>/fd walk
+        self._owners = {inode: owner for inode, owner in self._owners.items() if inode in inodes}
+        new = inodes - self._owners.keys()
+        self._owners.update(dict.fromkeys(new, (None, "")))
+        self._owners.update(socket_owners(new, self.proc))
+        listeners = []
+        for e in entries:
+            pid, process = self._owners.get(e.inode, (None, ""))
+            listeners.append(Listener(e.proto, e.local_address, e.local_port, e.inode, pid, process, e.uid))
+        return PortSnapshot(listeners)
+
+    def check(self) -> Tuple[PortSnapshot, List[PortChange]]:
+        """
+        Takes a snapshot and returns it with the changes since the previous
+        one. Without any previous snapshot every listener counts as opened.
+        """
+        current = self.snapshot()
+        opened, closed = current.diff(self.previous or PortSnapshot([], 0))
+        changes = [PortChange("opened", l, self.is_allowed(l)) for l in opened]
+        changes += [PortChange("closed", l, self.is_allowed(l)) for l in closed]
+        changes.sort(key=lambda c: (c.allowed, c.listener.port, c.action))
+        self.previous = current
+        if changes:
+            self._save(current)
+        return current, changes
+
+    def unauthorized(self, snapshot: PortSnapshot) -> List[Listener]:
+        return [l for l in snapshot if not self.is_allowed(l)]
+
+    def report(self) -> str:
+        started = time.monotonic()
+        snapshot, changes = self.check()
+        elapsed = (time.monotonic() - started) * 1000
+        rogue = self.unauthorized(snapshot)
+        lines = [f"Listening sockets: {len(snapshot)} | Not allowed: {len(rogue)} | Checked in {elapsed:.1f} ms",
+                 f"Allowed ports: {', '.join(map(str, sorted(self.allowed_ports))) or 'none'}"
+                 f"{' (plus loopback)' if self.allow_loopback else ''}", ""]
+        if changes:
+            lines.append("Changes since the last check:")
+            lines.extend(c.render() for c in changes)
+        else:
+            lines.append("No changes since the last check.")
+        if rogue:
+            lines += ["", "Listening on ports that are not allowed:"]
+            lines.extend(f"  {l.describe()}" for l in rogue)
+        return "\n".join(lines)
+
+    # --- Persistence ---
+
+    def _load(self) -> Optional[PortSnapshot]:
+        try:
+            with open(self.state_path) as f:
+                data = json.load(f)
+            return PortSnapshot((Listener(**l) for l in data["listeners"]), data["taken"])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable port inventory {self.state_path}: {e}")
+            return None
+
+    def _save(self, snapshot: PortSnapshot):
+        if not self.state_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"taken": snapshot.taken, "listeners": [asdict(l) for l in snapshot]}, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logger.warning(f"Could not write port inventory {self.state_path}: {e}")
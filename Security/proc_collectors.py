@@ -0,0 +1,450 @@
+"""
+Proc Collectors Module
+----------------------
+Reads system state straight from /etc/passwd, /proc and /sys into records,
+replacing forks of cat, ip, netstat, lscpu, free, df and ps.
+
+A fork plus parsing the tool's text output costs milliseconds per call;
+these readers cost microseconds and return structured data the report and
+monitoring views format themselves. Linux only: every reader raises
+OSError where the file does not exist, so callers can fall back.
+"""
+
+import os
+import socket
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+PROC = "/proc"
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+TCP_STATES = {
+    "01": "ESTABLISHED", "02": "SYN_SENT", "03": "SYN_RECV", "04": "FIN_WAIT1",
+    "05": "FIN_WAIT2", "06": "TIME_WAIT", "07": "CLOSE", "08": "CLOSE_WAIT",
+    "09": "LAST_ACK", "0A": "LISTEN", "0B": "CLOSING",
+}
+SOCKET_TABLES = ("tcp", "tcp6", "udp", "udp6")
+# Filesystems df leaves out by default
+PSEUDO_FILESYSTEMS = {
+    "proc", "sysfs", "devpts", "cgroup", "cgroup2", "securityfs", "pstore", "debugfs", "tracefs",
+    "configfs", "fusectl", "mqueue", "hugetlbfs", "bpf", "autofs", "binfmt_misc", "rpc_pipefs",
+    "nsfs", "devtmpfs", "overlay", "squashfs", "efivarfs",
+}
+
+
+# --- Accounts ---
+
+@dataclass
+class Account:
+    name: str
+    uid: int
+    gid: int
+    home: str = ""
+    shell: str = ""
+
+
+def read_passwd(path: str = "/etc/passwd") -> List[Account]:
+    accounts = []
+    with open(path) as f:
+        for line in f:
+            parts = line.rstrip("\n").split(":")
+            if len(parts) < 4 or line.startswith("#"):
+                continue
+            try:
+                accounts.append(Account(parts[0], int(parts[2]), int(parts[3]),
+                                        parts[5] if len(parts) > 5 else "", parts[6] if len(parts) > 6 else ""))
+            except ValueError:
+                continue
+    return accounts
+
+
+def user_names(path: str = "/etc/passwd") -> Dict[int, str]:
+    """uid -> name; empty if the file can't be read."""
+    try:
+        return {a.uid: a.name for a in read_passwd(path)}
+    except OSError:
+        return {}
+
+
+# --- Sockets ---
+
+@dataclass
+class SocketEntry:
+    """One row of /proc/net/{tcp,tcp6,udp,udp6}."""
+    proto: str
+    local_address: str
+    local_port: int
+    remote_address: str
+    remote_port: int
+    state: str
+    uid: int
+    inode: int
+
+    @property
+    def listening(self) -> bool:
+        # netstat -l: listening TCP sockets and unconnected UDP sockets
+        if self.proto.startswith("tcp"):
+            return self.state == "LISTEN"
+        return self.state == "CLOSE" and self.remote_port == 0
+
+
+def decode_address(hex_address: str) -> str:
+    """Kernel hex notation (32-bit words in host order) to a printable IPv4/IPv6 address."""
+    raw = bytes.fromhex(hex_address)
+    # Each 32-bit word is in host byte order
+    words = struct.unpack(f"={len(raw) // 4}I", raw)
+    packed = struct.pack(f"!{len(words)}I", *words)
+    family = socket.AF_INET if len(packed) == 4 else socket.AF_INET6
+    return socket.inet_ntop(family, packed)
+
+
+def parse_socket_table(text: str, proto: str) -> List[SocketEntry]:
+    entries = []
+    for line in text.splitlines()[1:]:
+        parts = line.split()
+        if len(parts) < 10:
+            continue
+        local, _, local_port = parts[1].partition(":")
+        remote, _, remote_port = parts[2].partition(":")
+        entries.append(SocketEntry(
+            proto=proto,
+            local_address=decode_address(local),
+            local_port=int(local_port, 16),
+            remote_address=decode_address(remote),
+            remote_port=int(remote_port, 16),
+            state=TCP_STATES.get(parts[3], parts[3]),
+            uid=int(parts[7]),
+            inode=int(parts[9]),
+        ))
+    return entries
+
+
+def read_sockets(protos: Iterable[str] = SOCKET_TABLES, proc: str = PROC) -> List[SocketEntry]:
+    """Sockets of all tables in `protos`; tables this kernel lacks (e.g. no IPv6) are skipped."""
+    entries = []
+    for proto in protos:
+        try:
+            with open(os.path.join(proc, "net", proto)) as f:
+                entries.extend(parse_socket_table(f.read(), proto))
+        except FileNotFoundError:
+            continue
+    return entries
+
+
+# --- Network interfaces ---
+
+@dataclass
+class Interface:
+    name: str
+    rx_bytes: int = 0
+    rx_packets: int = 0
+    tx_bytes: int = 0
+    tx_packets: int = 0
+    mac: str = ""
+    addresses: List[str] = field(default_factory=list)  # "addr/prefix"
+
+
+def read_net_dev(proc: str = PROC) -> List[Interface]:
+    """Traffic counters per interface from /proc/net/dev."""
+    interfaces = []
+    with open(os.path.join(proc, "net", "dev")) as f:
+        for line in f.readlines()[2:]:
+            name, _, counters = line.partition(":")
+            values = counters.split()
+            if len(values) < 10:
+                continue
+            interfaces.append(Interface(name.strip(), rx_bytes=int(values[0]), rx_packets=int(values[1]),
+                                        tx_bytes=int(values[8]), tx_packets=int(values[9])))
+    return interfaces
+
+
+def _ipv4_address(name: str) -> Optional[str]:
+    """Primary IPv4 address/prefix of an interface via SIOCGIFADDR/SIOCGIFNETMASK."""
+    try:
+        import fcntl
+    except ImportError:
+        return None
+    request = struct.pack("256s", name.encode()[:15])
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        try:
+            address = fcntl.ioctl(s.fileno(), 0x8915, request)[20:24]  # SIOCGIFADDR
+            netmask = fcntl.ioctl(s.fileno(), 0x891B, request)[20:24]  # SIOCGIFNETMASK
+        except OSError:
+            return None  # No IPv4 address
+    prefix = bin(int.from_bytes(netmask, "big")).count("1")
+    return f"{socket.inet_ntoa(address)}/{prefix}"
+
+
+def read_interfaces(proc: str = PROC, sys_net: str = "/sys/class/net") -> List[Interface]:
+    """Interfaces with their counters, MAC and addresses (what `ip addr show` prints)."""
+    interfaces = read_net_dev(proc)
+    ipv6: Dict[str, List[str]] = {}
+    try:
+        with open(os.path.join(proc, "net", "if_inet6")) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 6:
+                    address = socket.inet_ntop(socket.AF_INET6, bytes.fromhex(parts[0]))
+                    ipv6.setdefault(parts[5], []).append(f"{address}/{int(parts[2], 16)}")
+    except FileNotFoundError:
+        pass
+    for interface in interfaces:
+        try:
+            with open(os.path.join(sys_net, interface.name, "address")) as f:
+                interface.mac = f.read().strip()
+        except OSError:
+            pass
+        ipv4 = _ipv4_address(interface.name)
+        interface.addresses = ([ipv4] if ipv4 else []) + ipv6.get(interface.name, [])
+    return interfaces
+
+
+# --- CPU, memory, disks ---
+
+@dataclass
+class CpuInfo:
+    model: str = "Unknown"
+    logical_cpus: int = 0
+    physical_cores: int = 0
+    sockets: int = 0
+    mhz: float = 0.0
+    cache: str = ""
+
+
+def read_cpuinfo(proc: str = PROC) -> CpuInfo:
+    info = CpuInfo()
+    cores, sockets, speeds = set(), set(), []
+    physical_id = "0"
+    with open(os.path.join(proc, "cpuinfo")) as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            key, value = key.strip(), value.strip()
+            if key == "processor":
+                info.logical_cpus += 1
+            elif key == "model name" and info.model == "Unknown":
+                info.model = value
+            elif key == "physical id":
+                physical_id = value
+                sockets.add(value)
+            elif key == "core id":
+                cores.add((physical_id, value))
+            elif key == "cpu MHz":
+                speeds.append(float(value))
+            elif key == "cache size" and not info.cache:
+                info.cache = value
+    info.sockets = len(sockets) or 1
+    info.physical_cores = len(cores) or info.logical_cpus
+    info.mhz = sum(speeds) / len(speeds) if speeds else 0.0
+    return info
+
+
+def read_meminfo(proc: str = PROC) -> Dict[str, int]:
+    """/proc/meminfo in bytes."""
+    values = {}
+    with open(os.path.join(proc, "meminfo")) as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            parts = value.split()
+            if parts:
+                values[key] = int(parts[0]) * (1024 if parts[1:] == ["kB"] else 1)
+    return values
+
+
+def read_cpu_times(proc: str = PROC) -> Tuple[int, int]:
+    """(idle, total) jiffies since boot from the aggregate line of /proc/stat."""
+    with open(os.path.join(proc, "stat")) as f:
+        values = [int(v) for v in f.readline().split()[1:9]]  # user nice system idle iowait irq softirq steal
+    return values[3] + values[4], sum(values)
+
+
+def cpu_percent(interval: float = 1.0, proc: str = PROC) -> float:
+    """Busy share of all CPUs over `interval` seconds."""
+    idle, total = read_cpu_times(proc)
+    time.sleep(interval)
+    idle2, total2 = read_cpu_times(proc)
+    if total2 == total:
+        return 0.0
+    return round((1 - (idle2 - idle) / (total2 - total)) * 100, 1)
+
+
+@dataclass
+class DiskUsage:
+    device: str
+    mountpoint: str
+    fstype: str
+    total: int
+    used: int
+    free: int
+
+    @property
+    def percent(self) -> float:
+        # Like df: share of the space available to unprivileged users
+        return round(self.used / (self.used + self.free) * 100, 1) if self.used + self.free else 0.0
+
+
+def disk_usage(path: str = "/") -> DiskUsage:
+    st = os.statvfs(path)
+    total = st.f_blocks * st.f_frsize
+    return DiskUsage("", path, "", total, total - st.f_bfree * st.f_frsize, st.f_bavail * st.f_frsize)
+
+
+def read_disks(proc: str = PROC) -> List[DiskUsage]:
+    """Usage of every real mounted filesystem (what `df` lists)."""
+    disks, seen = [], set()
+    with open(os.path.join(proc, "mounts")) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 3 or parts[2] in PSEUDO_FILESYSTEMS or parts[0] in seen:
+                continue
+            # Mount points escape spaces as \040
+            mountpoint = parts[1].replace("\\040", " ")
+            try:
+                usage = disk_usage(mountpoint)
+            except OSError:
+                continue
+            if usage.total == 0:
+                continue
+            seen.add(parts[0])
+            usage.device, usage.fstype = parts[0], parts[2]
+            disks.append(usage)
+    return disks
+
+
+# --- Processes ---
+
+@dataclass
+class ProcessInfo:
+    """Fields of /proc/<pid>/stat (times in seconds, memory in bytes)."""
+    pid: int
+    name: str
+    state: str
+    ppid: int
+    utime: float
+    stime: float
+    num_threads: int
+    start_time: float  # Seconds after boot
+    vsize: int
+    rss: int
+    uid: int = -1
+    cmdline: str = ""
+
+    @property
+    def cpu_time(self) -> float:
+        return self.utime + self.stime
+
+
+def parse_stat(text: str) -> ProcessInfo:
+    # comm may contain spaces and parentheses; it ends at the last ")"
+    pid, _, rest = text.partition(" (")
+    name, _, rest = rest.rpartition(") ")
+    fields = rest.split()
+    return ProcessInfo(
+        pid=int(pid),
+        name=name,
+        state=fields[0],
+        ppid=int(fields[1]),
+        utime=int(fields[11]) / CLK_TCK,
+        stime=int(fields[12]) / CLK_TCK,
+        num_threads=int(fields[17]),
+        start_time=int(fields[19]) / CLK_TCK,
+        vsize=int(fields[20]),
+        rss=int(fields[21]) * PAGE_SIZE,
+    )
+
+
+def read_process(pid: int, proc: str = PROC, cmdline: bool = True) -> Optional[ProcessInfo]:
+    """The process' stat record, or None if it exited meanwhile."""
+    base = os.path.join(proc, str(pid))
+    try:
+        with open(os.path.join(base, "stat")) as f:
+            info = parse_stat(f.read())
+        info.uid = os.stat(base).st_uid
+        if cmdline:
+            with open(os.path.join(base, "cmdline"), "rb") as f:
+                info.cmdline = f.read().replace(b"\0", b" ").decode(errors="replace").strip()
+    except (OSError, ValueError, IndexError):
+        return None
+    return info
+
+
+def pids(proc: str = PROC) -> List[int]:
+    return [int(entry) for entry in os.listdir(proc) if entry.isdigit()]
+
+
+def read_processes(proc: str = PROC, cmdline: bool = True) -> List[ProcessInfo]:
+    processes = []
+    for pid in pids(proc):
+        info = read_process(pid, proc, cmdline)
+        if info is not None:
+            processes.append(info)
+    return processes
+
+
+def read_uptime(proc: str = PROC) -> float:
+    with open(os.path.join(proc, "uptime")) as f:
+        return float(f.read().split()[0])
+
+
+# --- Text views (the report and the monitoring tab) ---
+
+def format_bytes(n: float) -> str:
+    for unit in ("B", "K", "M", "G", "T"):
+        if abs(n) < 1024 or unit == "T":
+            return f"{n:.1f}{unit}" if unit != "B" else f"{int(n)}B"
+        n /= 1024
+
+
+def render_accounts(accounts: List[Account]) -> str:
+    return "".join(f"{a.name}:{a.uid}:{a.gid}\n" for a in accounts)
+
+
+def render_interfaces(interfaces: List[Interface]) -> str:
+    lines = []
+    for interface in interfaces:
+        lines.append(f"{interface.name}: ether {interface.mac or '-'}")
+        lines.extend(f"    inet{'6' if ':' in a else ''} {a}" for a in interface.addresses)
+    return "\n".join(lines) + "\n"
+
+
+def render_listeners(entries: List[SocketEntry]) -> str:
+    lines = [f"{'Proto':<6} {'Local Address':<40} {'State':<8}"]
+    for e in sorted((e for e in entries if e.listening), key=lambda e: (e.proto, e.local_port)):
+        address = f"[{e.local_address}]:{e.local_port}" if ":" in e.local_address else f"{e.local_address}:{e.local_port}"
+        lines.append(f"{e.proto:<6} {address:<40} {'LISTEN' if e.proto.startswith('tcp') else '':<8}")
+    return "\n".join(lines) + "\n"
+
+
+def render_cpu(info: CpuInfo) -> str:
+    return (
+        f"Model name:          {info.model}\n"
+        f"CPU(s):              {info.logical_cpus}\n"
+        f"Core(s):             {info.physical_cores}\n"
+        f"Socket(s):           {info.sockets}\n"
+        f"CPU MHz:             {info.mhz:.0f}\n"
+        f"Cache:               {info.cache or 'Unknown'}\n"
+    )
+
+
+def render_memory(mem: Dict[str, int]) -> str:
+    total, free = mem.get("MemTotal", 0), mem.get("MemFree", 0)
+    cache = mem.get("Buffers", 0) + mem.get("Cached", 0) + mem.get("SReclaimable", 0)
+    available = mem.get("MemAvailable", free + cache)
+    swap_total, swap_free = mem.get("SwapTotal", 0), mem.get("SwapFree", 0)
+    row = "{:<6} {:>9} {:>9} {:>9} {:>9} {:>10} {:>9}\n"
+    return (
+        row.format("", "total", "used", "free", "shared", "buff/cache", "available")
+        + row.format("Mem:", *map(format_bytes, (total, total - free - cache, free,
+                                                 mem.get("Shmem", 0), cache, available)))
+        + row.format("Swap:", *map(format_bytes, (swap_total, swap_total - swap_free, swap_free)), "", "", "")
+    )
+
+
+def render_disks(disks: List[DiskUsage]) -> str:
+    lines = [f"{'Filesystem':<24} {'Size':>8} {'Used':>8} {'Avail':>8} {'Use%':>5} Mounted on"]
+    for d in disks:
+        lines.append(f"{d.device[:24]:<24} {format_bytes(d.total):>8} {format_bytes(d.used):>8} "
+                     f"{format_bytes(d.free):>8} {d.percent:>4.0f}% {d.mountpoint}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,139 @@
+"""
+Process Table Module
+--------------------
+Live top-N process view over an incremental /proc scanner.
+
+Each refresh re-reads only /proc/<pid>/stat. The command line and owner of a
+process never change, so they are read once, and only for processes that
+actually make it into a top-N list. CPU usage is the delta of CPU time
+between two refreshes (like top), not the lifetime average `ps` prints, and
+the top N are picked with a heap instead of sorting every process. That
+keeps a refresh cheap enough to poll continuously on hosts with thousands
+of processes.
+"""
+
+import heapq
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from proc_collectors import PROC, ProcessInfo, format_bytes, parse_stat, read_meminfo, read_uptime, user_names
+
+
+@dataclass
+class ProcessRow:
+    pid: int
+    user: str
+    name: str
+    command: str
+    state: str
+    cpu_percent: float
+    rss: int
+    mem_percent: float
+    threads: int
+
+
+@dataclass
+class _Static:
+    """Per-pid data that is read once; start_time tells a reused pid apart."""
+    start_time: float
+    user: str
+    command: str
+
+
+class ProcessTable:
+    """
+    Keeps the previous CPU times of every process; refresh() takes a new
+    sample and top() ranks it. The first sample has nothing to compare to,
+    so it falls back to lifetime averages.
+    """
+
+    def __init__(self, proc: str = PROC, clock: Callable[[], float] = time.monotonic):
+        self.proc = proc
+        self.clock = clock
+        self._static: Dict[int, _Static] = {}
+        self._samples: Dict[int, ProcessInfo] = {}
+        self._cpu: Dict[int, float] = {}
+        self._sampled_at: Optional[float] = None
+        self._mem_total = 1
+        self._names: Optional[Dict[int, str]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def refresh(self) -> int:
+        """Reads the stat file of every process; returns how many were seen."""
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self) -> int:
+        now = self.clock()
+        elapsed = now - self._sampled_at if self._sampled_at is not None else 0.0
+        uptime = read_uptime(self.proc) if not elapsed else None
+        samples, cpu = {}, {}
+        for entry in os.listdir(self.proc):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"{self.proc}/{entry}/stat") as f:
+                    info = parse_stat(f.read())
+            except (OSError, ValueError, IndexError):
+                continue  # Exited meanwhile
+            samples[info.pid] = info
+            previous = self._samples.get(info.pid)
+            if elapsed and previous is not None and previous.start_time == info.start_time:
+                cpu[info.pid] = (info.cpu_time - previous.cpu_time) / elapsed * 100
+            elif elapsed:
+                # Started since the last sample: all of its CPU time falls into the interval
+                cpu[info.pid] = info.cpu_time / elapsed * 100
+            else:
+                lifetime = uptime - info.start_time
+                cpu[info.pid] = info.cpu_time / lifetime * 100 if lifetime > 0 else 0.0
+        # Forget processes that exited
+        for pid in self._static.keys() - samples.keys():
+            del self._static[pid]
+        self._samples, self._cpu, self._sampled_at = samples, cpu, now
+        self._mem_total = read_meminfo(self.proc).get("MemTotal", 0) or 1
+        return len(samples)
+
+    def top(self, n: int = 15, sort: str = "cpu") -> List[ProcessRow]:
+        """The n busiest processes of the last sample by "cpu" or "mem"."""
+        with self._lock:
+            if sort == "cpu":
+                ranked = heapq.nlargest(n, self._cpu.items(), key=lambda item: (item[1], self._samples[item[0]].rss))
+            else:
+                ranked = heapq.nlargest(n, ((pid, info.rss) for pid, info in self._samples.items()),
+                                        key=lambda item: item[1])
+            return [self._row(pid) for pid, _ in ranked]
+
+    def _row(self, pid: int) -> ProcessRow:
+        info = self._samples[pid]
+        static = self._static.get(pid)
+        if static is None or static.start_time != info.start_time:
+            self._static[pid] = static = _Static(info.start_time, *self._read_static(info))
+        return ProcessRow(pid, static.user, info.name, static.command, info.state, round(self._cpu[pid], 1),
+                          info.rss, round(info.rss / self._mem_total * 100, 1), info.num_threads)
+
+    def _read_static(self, info: ProcessInfo) -> Tuple[str, str]:
+        base = f"{self.proc}/{info.pid}"
+        try:
+            uid = os.stat(base).st_uid
+            with open(f"{base}/cmdline", "rb") as f:
+                command = " ".join(f.read().decode(errors="replace").replace("\0", " ").split())
+        except OSError:
+            return "?", f"[{info.name}]"
+        if self._names is None or uid not in self._names:
+            self._names = user_names()
+            self._names.setdefault(uid, str(uid))  # Don't re-read passwd for unknown uids
+        # Kernel threads have no command line
+        return self._names[uid], command or f"[{info.name}]"
+
+    def render(self, n: int = 15, sort: str = "cpu") -> str:
+        lines = [f"{'USER':<10} {'PID':>7} {'%CPU':>6} {'%MEM':>5} {'RSS':>8} {'THR':>4} {'S':<1} COMMAND"]
+        for row in self.top(n, sort):
+            lines.append(f"{row.user[:10]:<10} {row.pid:>7} {row.cpu_percent:>6.1f} {row.mem_percent:>5.1f} "
+                         f"{format_bytes(row.rss):>8} {row.threads:>4} {row.state:<1} {row.command[:80]}")
+        return "\n".join(lines) + "\n"
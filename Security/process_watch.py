@@ -0,0 +1,184 @@
+"""
+Process Watch Module
+--------------------
+Supervises child processes started in their own session (process group).
+
+On timeout or cancellation the whole group gets SIGTERM, and SIGKILL after
+a grace period for anything that ignored it, so grandchildren of lynis,
+apt or sudo cannot outlive the command. Children are reaped with wait4(),
+which also reports their CPU time and peak memory; their I/O counters are
+read from /proc/<pid>/io just before that, while they are still zombies.
+"""
+
+import logging
+import os
+import signal
+import sys
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger("SystemDetector")
+
+TERM_GRACE = 5.0  # Seconds between SIGTERM and SIGKILL
+_SIGKILL = getattr(signal, "SIGKILL", signal.SIGTERM)
+
+
+def signal_group(process, sig: int):
+    """Sends `sig` to the child's process group (works for Popen and asyncio processes)."""
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, sig)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+    except PermissionError:
+        # e.g. a group containing root processes under sudo; signal our direct child at least
+        try:
+            process.send_signal(sig)
+        except ProcessLookupError:
+            pass
+
+
+def _group_alive(pid: int) -> bool:
+    if os.name != "posix":
+        return False
+    try:
+        os.killpg(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def read_io_counters(pid: int) -> Optional[Dict[str, int]]:
+    """
+    rchar/wchar of an exited but not yet reaped child (including the
+    descendants it reaped). None if /proc is unavailable or not ours to read.
+    """
+    try:
+        with open(f"/proc/{pid}/io") as f:
+            counters = dict(line.split(": ", 1) for line in f.read().splitlines())
+        return {"io_read_bytes": int(counters["rchar"]), "io_write_bytes": int(counters["wchar"])}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def rusage_dict(rusage) -> Dict[str, Any]:
+    """CPU seconds and peak RSS (KiB) from a struct_rusage."""
+    max_rss = rusage.ru_maxrss
+    if sys.platform == "darwin":
+        max_rss //= 1024  # Reported in bytes on macOS
+    return {"cpu_user": rusage.ru_utime, "cpu_system": rusage.ru_stime, "max_rss_kb": max_rss}
+
+
+class ProcessWatch:
+    """
+    Enforces a timeout and a cancellation token on one child, terminates its
+    group with SIGTERM -> SIGKILL escalation and reaps it via wait4().
+    """
+
+    def __init__(self, process, timeout: Optional[float], token=None, grace: float = TERM_GRACE):
+        self.process = process
+        self.grace = grace
+        self.timed_out = False
+        self.cancelled = False
+        self.rusage = None
+        self.io: Optional[Dict[str, int]] = None
+        self._token = token
+        self._lock = threading.Lock()
+        self._terminating = False
+        self._kill_timer: Optional[threading.Timer] = None
+        self._timer = None
+        if timeout:
+            self._timer = threading.Timer(timeout, self._on_timeout)
+            self._timer.daemon = True
+            self._timer.start()
+        self._handle = token.register(self._on_cancel) if token else None
+
+    def _on_timeout(self):
+        self.timed_out = True
+        self.terminate()
+
+    def _on_cancel(self):
+        self.cancelled = True
+        self.terminate()
+
+    def terminate(self):
+        """SIGTERM to the group now, SIGKILL to whatever is left after the grace period."""
+        with self._lock:
+            if self._terminating:
+                return
+            self._terminating = True
+            logger.debug(f"Terminating process group {self.process.pid}")
+            signal_group(self.process, signal.SIGTERM)
+            self._kill_timer = threading.Timer(self.grace, signal_group, (self.process, _SIGKILL))
+            self._kill_timer.daemon = True
+            self._kill_timer.start()
+
+    def kill(self):
+        """Immediate SIGKILL to the group (the caller gave up on the command)."""
+        with self._lock:
+            self._terminating = True
+            if self._kill_timer is not None:
+                self._kill_timer.cancel()
+                self._kill_timer = None
+        signal_group(self.process, _SIGKILL)
+
+    def reap(self) -> int:
+        """Waits for the child, stops the timers and returns its exit code."""
+        if self._timer:
+            self._timer.cancel()
+        if hasattr(os, "wait4") and self.process.returncode is None:
+            try:
+                if hasattr(os, "waitid") and hasattr(os, "WNOWAIT"):
+                    # Wait for exit without reaping, so /proc/<pid>/io is still there
+                    os.waitid(os.P_PID, self.process.pid, os.WEXITED | os.WNOWAIT)
+                    self.io = read_io_counters(self.process.pid)
+                _, status, self.rusage = os.wait4(self.process.pid, 0)
+                self.process.returncode = os.waitstatus_to_exitcode(status)
+            except ChildProcessError:
+                self.process.wait()
+        else:
+            self.process.wait()
+        self.release()
+        return self.process.returncode
+
+    def release(self):
+        """
+        Detaches from the token and timers once the child has exited (for
+        children reaped elsewhere, e.g. by asyncio).
+        """
+        if self._timer:
+            self._timer.cancel()
+        if self._token:
+            self._token.unregister(self._handle)
+        with self._lock:
+            # The leader is gone; only escalate if other members of its group are still around
+            if self._kill_timer is not None and not _group_alive(self.process.pid):
+                self._kill_timer.cancel()
+
+    def communicate(self) -> Tuple[str, str]:
+        """Reads stdout and stderr to EOF and reaps the child (unlike Popen.communicate, keeping wait4 data)."""
+        stderr = []
+        reader = threading.Thread(target=lambda: stderr.append(self.process.stderr.read()), daemon=True)
+        reader.start()
+        try:
+            stdout = self.process.stdout.read()
+            reader.join()
+        except BaseException:
+            # e.g. Ctrl+C in a CLI: don't leave the group running
+            self.kill()
+            raise
+        finally:
+            self.process.stdout.close()
+            self.process.stderr.close()
+            self.reap()
+        return stdout, stderr[0] if stderr else ""
+
+    def usage(self) -> Dict[str, Any]:
+        """Resource usage of the reaped child; only what this platform could report."""
+        usage = rusage_dict(self.rusage) if self.rusage is not None else {}
+        usage.update(self.io or {})
+        return usage
@@ -0,0 +1,107 @@
+"""
+Report Pipeline Module
+----------------------
+Builds a report out of independent sections that are collected concurrently.
+
+Every section has its own timeout. The report is assembled in section order
+once each section has either finished or run out of time, so one slow
+collector (a full Lynis audit, `apt list` on a cold cache) only costs its
+own section: it is marked as pending and the rest of the report is written
+without it. A collector that is still running keeps going in the
+background, e.g. so a Lynis audit can still fill its cache for the next
+report.
+"""
+
+import logging
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+
+logger = logging.getLogger("SecurityDashboard")
+
+SEPARATOR = "=" * 54
+
+
+@dataclass
+class Section:
+    """One part of a report: a title and a callable returning its text."""
+    title: str
+    collect: Callable[[], str]
+    timeout: float = 30.0
+
+
+@dataclass
+class SectionResult:
+    """Outcome of one section: done, failed, timeout (its command gave up) or pending (still running)."""
+    title: str
+    state: str
+    text: str = ""
+    duration: float = 0.0
+
+    def render(self) -> str:
+        if self.state == "done":
+            return self.text
+        if self.state == "pending":
+            return f"[PENDING] Not finished after {self.duration:.0f}s; still running in the background.\n"
+        if self.state == "timeout":
+            return f"[TIMEOUT] {self.text}\n"
+        return f"[FAILED] {self.text}\n"
+
+
+class ReportPipeline:
+    """Runs every section on its own thread and collects the results in order."""
+
+    def __init__(self, sections: List[Section]):
+        self.sections = sections
+
+    def run(self) -> List[SectionResult]:
+        started = time.monotonic()
+        slots: List[Optional[SectionResult]] = [None] * len(self.sections)
+        lock = threading.Lock()
+        threads = []
+        for i, section in enumerate(self.sections):
+            thread = threading.Thread(target=self._collect, args=(section, slots, i, lock),
+                                      name=f"Report-{section.title}", daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        for i, (section, thread) in enumerate(zip(self.sections, threads)):
+            # All sections started together, so each deadline counts from the same moment
+            thread.join(max(0.0, started + section.timeout - time.monotonic()))
+            with lock:
+                if slots[i] is None:
+                    logger.warning(f"Report section '{section.title}' still running after {section.timeout}s")
+                    slots[i] = SectionResult(section.title, "pending", duration=time.monotonic() - started)
+        logger.info(f"Report sections collected in {time.monotonic() - started:.1f}s")
+        return list(slots)
+
+    @staticmethod
+    def _collect(section: Section, slots: List[Optional[SectionResult]], i: int, lock: threading.Lock):
+        started = time.monotonic()
+        try:
+            text = section.collect()
+            result = SectionResult(section.title, "done", text or "")
+        except subprocess.TimeoutExpired as e:
+            result = SectionResult(section.title, "timeout", str(e))
+        except Exception as e:
+            logger.exception(f"Report section '{section.title}' failed")
+            result = SectionResult(section.title, "failed", str(e))
+        result.duration = time.monotonic() - started
+        with lock:
+            # A section that already missed its deadline keeps its pending marker
+            if slots[i] is None:
+                slots[i] = result
+
+    def render(self, title: str = "Security Report") -> str:
+        """Runs the pipeline and returns the numbered report text."""
+        results = self.run()
+        lines = [f"{title} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"]
+        for number, result in enumerate(results, 1):
+            lines.append(f"{SEPARATOR}\n")
+            lines.append(f"{number}. {result.title}\n")
+            text = result.render()
+            lines.append(text if text.endswith("\n") or not text else text + "\n")
+        return "".join(lines)
@@ -0,0 +1,191 @@
+"""
+Scan Orchestrator Module
+------------------------
+Runs a suite of security scanners concurrently and merges their results.
+
+Each scanner is tagged with the resource it mostly consumes (cpu, io, net).
+A per-resource budget caps how many scanners of the same kind run at once,
+so e.g. two disk-walking scanners don't fight over the same spindle while a
+network scan proceeds alongside them.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from command_stats import operation
+from job_scheduler import CancellationToken, current_token, using_token
+
+logger = logging.getLogger("SecurityDashboard")
+
+
+@dataclass
+class ScanProgress:
+    """Live state of a single scanner within a suite run."""
+    name: str
+    state: str = "pending"  # pending, installing, waiting, running, done, failed, cancelled
+    lines: int = 0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    result: str = ""
+
+    @property
+    def duration(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+
+@dataclass
+class ScanReport:
+    """Merged outcome of a suite run, in suite order."""
+    scans: List[ScanProgress] = field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def failed(self) -> List[str]:
+        return [s.name for s in self.scans if s.state == "failed"]
+
+    def render(self) -> str:
+        lines = [
+            f"Security Audit Report - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Scanners: {len(self.scans)} | Failed: {len(self.failed)} | Wall time: {self.duration:.1f}s",
+        ]
+        for scan in self.scans:
+            lines.append("=" * 54)
+            lines.append(f"[{scan.name}] {scan.state.upper()} in {scan.duration:.1f}s ({scan.lines} lines of output)")
+            lines.append(scan.result.rstrip())
+        return "\n".join(lines)
+
+
+class ScanOrchestrator:
+    """
+    Runs selected Scanner methods in parallel under per-resource budgets.
+    """
+
+    # name -> (Scanner method, binary, package, resource class)
+    SCANNERS = {
+        "lynis": ("run_lynis", "lynis", "lynis", "cpu"),
+        "clamav": ("run_clamav", "clamscan", "clamav", "io"),
+        "rkhunter": ("run_rkhunter", "rkhunter", "rkhunter", "io"),
+        "nmap": ("run_nmap", "nmap", "nmap", "net"),
+    }
+
+    DEFAULT_BUDGETS = {"cpu": 2, "io": 1, "net": 1}
+
+    def __init__(self, scanner, budgets: Optional[Dict[str, int]] = None):
+        self.scanner = scanner
+        self.detector = scanner.detector
+        self.budgets = dict(self.DEFAULT_BUDGETS)
+        self.budgets.update(budgets or {})
+        self._limits = {res: threading.BoundedSemaphore(max(1, n)) for res, n in self.budgets.items()}
+        self._lock = threading.Lock()
+        self.progress: Dict[str, ScanProgress] = {}
+
+    def snapshot(self) -> List[ScanProgress]:
+        """Copies of the current per-scanner progress, safe to read from any thread."""
+        with self._lock:
+            return [ScanProgress(**vars(p)) for p in self.progress.values()]
+
+    def _update(self, progress: ScanProgress, **changes):
+        """Changes a scanner's progress under the lock snapshot() reads it with."""
+        with self._lock:
+            for key, value in changes.items():
+                setattr(progress, key, value)
+
+    def _prepare(self, suite: List[str]) -> List[str]:
+        """
+        Installs missing scanners before fanning out, all in one package
+        manager transaction; package managers hold a global lock, so
+        parallel installs would just fail. Returns the scanners to run:
+        those still missing afterwards are marked failed and left out, so
+        they don't each retry the install from their own thread.
+        """
+        missing = [name for name in suite if not self.detector.validate_command(self.SCANNERS[name][1])]
+        if not missing:
+            return suite
+        for name in missing:
+            self._update(self.progress[name], state="installing")
+        packages = [self.SCANNERS[name][2] for name in missing]
+        logger.info(f"Installing {', '.join(packages)} before the parallel scan...")
+        if self.detector.install_packages(packages):
+            return suite
+
+        failed = [name for name in missing if not self.detector.validate_command(self.SCANNERS[name][1])]
+        for name in failed:
+            now = time.time()
+            self._update(self.progress[name], state="failed", started=now, finished=now,
+                         result=f"Error: {self.SCANNERS[name][2]} could not be installed.")
+        if failed:
+            logger.error(f"Skipping {', '.join(failed)}: install failed")
+        return [name for name in suite if name not in failed]
+
+    def _run_one(self, name: str, progress_callback: Optional[Callable[[str], None]],
+                 token: Optional[CancellationToken] = None):
+        with using_token(token), operation(f"scan.{name}"):
+            self._run_scanner(name, progress_callback, token)
+
+    def _run_scanner(self, name: str, progress_callback: Optional[Callable[[str], None]],
+                     token: Optional[CancellationToken]):
+        method, _, _, resource = self.SCANNERS[name]
+        progress = self.progress[name]
+
+        def on_line(line: str):
+            with self._lock:
+                progress.lines += 1
+            if progress_callback:
+                progress_callback(f"[{name}] {line}")
+
+        self._update(progress, state="waiting")
+        with self._limits.get(resource, self._limits["cpu"]):
+            self._update(progress, state="running", started=time.time())
+            try:
+                # Scanners still waiting for a budget slot are skipped once the suite is cancelled
+                result = "Cancelled." if token and token.cancelled else getattr(self.scanner, method)(progress_callback=on_line)
+                if token and token.cancelled:
+                    state = "cancelled"
+                else:
+                    state = "failed" if result.startswith("Error") else "done"
+                self._update(progress, state=state, result=result)
+            except Exception as e:
+                logger.exception(f"Scanner {name} crashed")
+                self._update(progress, state="failed", result=f"Error: {e}")
+            finally:
+                self._update(progress, finished=time.time())
+        if progress_callback:
+            progress_callback(f"[{name}] {progress.state} in {progress.duration:.1f}s")
+
+    def run(self, suite: Optional[List[str]] = None,
+            progress_callback: Optional[Callable[[str], None]] = None) -> ScanReport:
+        """
+        Runs the suite (all scanners by default) and returns the merged report.
+        Streamed output lines are passed to `progress_callback` prefixed with
+        the scanner name.
+        """
+        suite = list(suite or self.SCANNERS)
+        unknown = [name for name in suite if name not in self.SCANNERS]
+        if unknown:
+            raise ValueError(f"Unknown scanners: {', '.join(unknown)}")
+
+        with self._lock:
+            self.progress = {name: ScanProgress(name) for name in suite}
+
+        start = time.time()
+        runnable = self._prepare(suite)
+        # Pool threads don't inherit the caller's job, so hand its cancellation token over
+        token = current_token()
+        with ThreadPoolExecutor(max_workers=max(1, len(runnable)), thread_name_prefix="scan") as pool:
+            for future in [pool.submit(self._run_one, name, progress_callback, token) for name in runnable]:
+                future.result()
+
+        report = ScanReport(scans=[self.progress[name] for name in suite], duration=time.time() - start)
+        logger.info(f"Scan suite finished in {report.duration:.1f}s ({len(report.failed)} failed)")
+        return report
+
+    def run_report(self, progress_callback: Optional[Callable[[str], None]] = None) -> str:
+        """Runs the full suite and returns the rendered report (dashboard entry point)."""
+        return self.run(progress_callback=progress_callback).render()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Security Dashboard CLI
+Headless entry point for servers: runs the same scanners, hardening steps
+and checks as the GUI without ever importing Tk.
+
+Heavy modules are only imported once a command needs them, so cold start
+stays within the startup budget; `--profile-startup` shows where it went.
+"""
+
+import argparse
+import os
+import sys
+
+SCANS = ("lynis", "clamav", "rkhunter", "nmap", "all")
+HARDENING = ("ssh", "firewall")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Enterprise Security Dashboard (headless)")
+    parser.add_argument("--config", default="config.yaml", help="Path to config.yaml")
+    parser.add_argument("--simulate", action="store_true", help="Run in simulation mode (safe for macOS/Windows)")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would be executed without making changes")
+    parser.add_argument("--debug", action="store_true", help="Enable verbose debug logging")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Report import times of a cold start of the given command instead of running it")
+    # Used by --profile-startup: perform the startup path, then exit
+    parser.add_argument("--startup-only", action="store_true", help=argparse.SUPPRESS)
+
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    scan = commands.add_parser("scan", help="Run a scanner (or all of them in parallel)")
+    scan.add_argument("scanner", choices=SCANS)
+    commands.add_parser("findings", help="Show findings of the last Lynis audit (re-runs it when stale)")
+    harden = commands.add_parser("harden", help="Apply a hardening step")
+    harden.add_argument("target", choices=HARDENING)
+    commands.add_parser("resources", help="Show current resource usage")
+    commands.add_parser("ports", help="Show listening ports that changed since the last check")
+    commands.add_parser("services", help="Show the state of the critical services")
+    commands.add_parser("install-tools", help="Install every missing scanner and tool in one batch")
+    commands.add_parser("facts", help="Show detected host facts")
+    commands.add_parser("stats", help="Show resource usage of past commands per operation")
+    agent = commands.add_parser("agent", help="Run the headless agent daemon (local UNIX-socket JSON API)")
+    agent.add_argument("--socket", help="Socket path (default: agent.socket from the config)")
+    return parser
+
+
+def _startup(args):
+    """Builds the objects every command needs (this is what cold start pays for)."""
+    import logging
+    from command_stats import DEFAULT_STATS_PATH
+    from security_core import ConfigManager, SystemDetector, setup_logger
+
+    config = ConfigManager(args.config)
+    if args.debug:
+        setup_logger(config.get("app.log_file"), "DEBUG")
+    else:
+        logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+    detector = SystemDetector(
+        simulation_mode=args.simulate,
+        dry_run=args.dry_run,
+        max_parallel=config.get("concurrency.max_parallel", 4),
+        index_ttl=config.get("install.index_ttl", 3600),
+        stats_path=config.get("paths.command_stats", DEFAULT_STATS_PATH)
+    )
+    return config, detector
+
+
+def _run(args, config, detector) -> str:
+    from security_core import Scanner, Hardener, Monitor
+    stream = lambda line: print(line, flush=True)
+
+    if args.command == "scan":
+        scanner = Scanner(detector, config)
+        if args.scanner == "all":
+            from scan_orchestrator import ScanOrchestrator
+            orchestrator = ScanOrchestrator(scanner, config.get("concurrency.scan_budgets"))
+            return orchestrator.run_report(progress_callback=stream)
+        return getattr(scanner, f"run_{args.scanner}")(progress_callback=stream)
+    if args.command == "findings":
+        return Scanner(detector, config).lynis_findings(progress_callback=stream)
+    if args.command == "harden":
+        hardener = Hardener(detector, config)
+        return hardener.harden_ssh() if args.target == "ssh" else hardener.setup_firewall()
+    if args.command == "resources":
+        return Monitor(detector, config).check_resources()
+    if args.command == "ports":
+        return Monitor(detector, config).check_ports()
+    if args.command == "services":
+        return Monitor(detector, config).check_services()
+    if args.command == "install-tools":
+        from install_planner import InstallPlanner
+        modules = [Scanner(detector, config), Hardener(detector, config), Monitor(detector, config)]
+        return InstallPlanner(detector, modules).install_report()
+    if args.command == "stats":
+        return detector.stats.render()
+    if args.command == "facts":
+        import json
+        from dataclasses import asdict
+        return json.dumps(asdict(detector.facts), indent=2)
+    if args.command == "agent":
+        from agent_daemon import AgentDaemon
+        AgentDaemon.from_config(config, detector, socket_path=args.socket).serve_forever()
+        return "Agent stopped."
+    raise ValueError(f"Unknown command: {args.command}")
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.profile_startup:
+        from startup_profile import profile
+        rest = [a for a in argv if a != "--profile-startup"]
+        print(profile([os.path.abspath(__file__), "--startup-only"] + rest))
+        return 0
+
+    config, detector = _startup(args)
+    if args.startup_only:
+        return 0
+    if not args.command:
+        parser.print_help()
+        return 2
+
+    from command_stats import operation
+    target = getattr(args, "scanner", None) or getattr(args, "target", None)
+    try:
+        with operation(f"{args.command}.{target}" if target else args.command):
+            result = _run(args, config, detector)
+    except KeyboardInterrupt:
+        print("\nExiting...")
+        return 130
+    finally:
+        detector.stats.save()
+    print(result)
+    return 1 if result.startswith("Error") else 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    sys.exit(main())
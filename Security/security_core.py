@@ -0,0 +1,624 @@
+"""
+Security Core Module
+--------------------
+Configuration, logging and the scanner/hardener/monitor logic behind the
+dashboard, importable without Tk so headless tools start quickly.
+
+Heavy or rarely needed dependencies (yaml, the clamd client, the Lynis
+and ClamAV caches, tempfile, logging.handlers) are imported where they
+are used, not at module load.
+"""
+
+import sys
+import os
+import logging
+from typing import TYPE_CHECKING, List, Tuple, Optional, Dict, Any
+
+# Import the robust system detector
+try:
+    from system_detector import SystemDetector, CommandResult
+except ImportError:
+    # Fallback if running from a different directory structure
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from system_detector import SystemDetector, CommandResult
+
+if TYPE_CHECKING:
+    from clamd_client import ClamdClient
+    from lynis_report import LynisCache, LynisReport
+    from port_inventory import PortInventory
+    from process_table import ProcessTable
+    from service_watcher import ServiceWatcher
+
+# --- Configuration Manager ---
+class ConfigManager:
+    DEFAULT_CONFIG = {
+        "app": {
+            "name": "Enterprise Security Dashboard",
+            "version": "2.1.0",
+            "log_file": "security_dashboard.log",
+            "log_level": "INFO"
+        },
+        "timeouts": {
+            "default": 30,
+            "scan": 600,
+            "update": 300,
+            "install": 300
+        },
+        "concurrency": {
+            "max_parallel": 4,
+            "max_jobs": 3,
+            "scan_budgets": {"cpu": 2, "io": 1, "net": 1}
+        },
+        "limits": {
+            "stream_retain_lines": 1000,
+            "console_max_lines": 5000,
+            "top_processes": 5
+        },
+        "security": {
+            "allowed_ports": [22, 80, 443],
+            "allow_loopback": True,
+            "critical_services": ["sshd", "ufw", "fail2ban"],
+            "service_poll_interval": 60
+        },
+        "paths": {
+            "ssh_config": "/etc/ssh/sshd_config",
+            "web_root": "/var/www/html",
+            "clamav_scan": "/tmp"
+        },
+        "clamav": {
+            "incremental": True,
+            "use_clamd": True,
+            "clamd_socket": "",
+            "clamd_connections": 4
+        },
+        "lynis": {
+            "cache_ttl": 86400
+        },
+        "install": {
+            "index_ttl": 3600
+        },
+        "agent": {
+            "socket": "",
+            "sample_interval": 5,
+            "workers": 2,
+            "schedule": {}
+        }
+    }
+
+    def __init__(self, config_path: str = "config.yaml"):
+        self.config_path = config_path
+        self.config = self.load_config()
+
+    def load_config(self) -> Dict[str, Any]:
+        if not os.path.exists(self.config_path):
+            return self.DEFAULT_CONFIG
+        
+        try:
+            import yaml
+        except ImportError:
+            print("Warning: PyYAML not installed. Please run 'pip install PyYAML'. Falling back to defaults.")
+            return self.DEFAULT_CONFIG
+        
+        try:
+            with open(self.config_path, 'r') as f:
+                return yaml.safe_load(f) or self.DEFAULT_CONFIG
+        except Exception as e:
+            print(f"Error loading config: {e}. Using defaults.")
+            return self.DEFAULT_CONFIG
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """Retrieve config value using dot notation (e.g., 'app.name')"""
+        keys = path.split('.')
+        value = self.config
+        try:
+            for key in keys:
+                value = value[key]
+            return value
+        except (KeyError, TypeError):
+            return default
+
+# --- Logger Setup ---
+def setup_logger(log_file: str = "security_dashboard.log", level_str: str = "INFO"):
+    logger = logging.getLogger("SecurityDashboard")
+    level = getattr(logging, level_str.upper(), logging.INFO)
+    logger.setLevel(level)
+    
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    # File Handler
+    try:
+        from logging.handlers import RotatingFileHandler
+        file_handler = RotatingFileHandler(log_file, maxBytes=10*1024*1024, backupCount=5)
+        file_handler.setFormatter(formatter)
+        logger.addHandler(file_handler)
+    except Exception as e:
+        print(f"Failed to setup file logging: {e}")
+
+    # Console Handler
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(formatter)
+    logger.addHandler(console_handler)
+    
+    return logger
+
+# --- Core Logic Modules ---
+class SecurityModule:
+    # External tools the module shells out to (installed in one batch by InstallPlanner)
+    REQUIRED_TOOLS: Tuple[str, ...] = ()
+
+    def __init__(self, detector: SystemDetector, config: ConfigManager):
+        self.detector = detector
+        self.config = config
+        self.logger = logging.getLogger("SecurityDashboard")
+
+class Scanner(SecurityModule):
+    REQUIRED_TOOLS = ("lynis", "clamscan", "rkhunter", "nmap")
+
+    def _run_scan(self, command: List[str], timeout: int, progress_callback=None) -> CommandResult:
+        """Runs a scanner, streaming its output line by line when a callback is given."""
+        if progress_callback:
+            return self.detector.run_command_streaming(
+                command,
+                on_line=progress_callback,
+                timeout=timeout,
+                max_lines=self.config.get("limits.stream_retain_lines", 1000)
+            )
+        return self.detector.run_command(command, timeout=timeout)
+
+    def run_lynis(self, progress_callback=None) -> str:
+        self.logger.info("Starting Lynis scan...")
+        if not self.detector.validate_command("lynis"):
+            self.logger.info("Lynis not found. Attempting installation...")
+            if not self.detector.install_package("lynis"):
+                return "Error: Lynis could not be installed."
+        
+        timeout = self.config.get("timeouts.scan", 600)
+        result = self._run_scan(
+            ["lynis", "audit", "system", "--quick", "--no-colors"], 
+            timeout,
+            progress_callback
+        )
+        
+        if result.return_code == 0:
+            report = self._store_lynis_report()
+            if report is not None:
+                return report.render()
+            return "Lynis audit completed." if progress_callback else result.stdout
+        elif progress_callback:
+            return f"Error running Lynis (Code {result.return_code}):\n{result.stderr}"
+        else:
+            return f"Error running Lynis (Code {result.return_code}):\n{result.stderr}\n{result.stdout}"
+
+    def _lynis_cache(self) -> "LynisCache":
+        from lynis_report import LynisCache, DEFAULT_CACHE_PATH, DEFAULT_TTL
+        return LynisCache(
+            self.config.get("paths.lynis_cache", DEFAULT_CACHE_PATH),
+            ttl=self.config.get("lynis.cache_ttl", DEFAULT_TTL)
+        )
+
+    def _store_lynis_report(self) -> Optional["LynisReport"]:
+        """Parses the report of the audit that just finished and caches it."""
+        if self.detector.simulation_mode or self.detector.dry_run:
+            return None
+        from lynis_report import load_report, parse_report, DEFAULT_REPORT_PATH
+        path = self.config.get("paths.lynis_report", DEFAULT_REPORT_PATH)
+        if os.access(path, os.R_OK):
+            report = load_report(path)
+        else:
+            # Lynis writes its report root-only (0640 root)
+            result = self.detector.run_command(["sudo", "-n", "cat", path])
+            report = parse_report(result.stdout) if result.return_code == 0 else None
+            if report is None:
+                self.logger.warning(f"Could not read Lynis report {path} through sudo: {result.stderr.strip()}")
+        if report is not None:
+            self._lynis_cache().put(report)
+        return report
+
+    def lynis_report(self) -> Optional["LynisReport"]:
+        """Returns the cached audit while it is fresh, otherwise runs a new one."""
+        report = self._lynis_cache().get()
+        if report is None:
+            self.logger.info("No fresh Lynis audit cached; running one now.")
+            self.run_lynis()
+            report = self._lynis_cache().get()
+        return report
+
+    def lynis_findings(self, progress_callback=None) -> str:
+        """Dashboard entry point: findings of the last audit, re-running Lynis only when stale."""
+        report = self._lynis_cache().get()
+        if report is None:
+            return self.run_lynis(progress_callback)
+        return report.render()
+
+    def run_clamav(self, progress_callback=None) -> str:
+        self.logger.info("Starting ClamAV scan...")
+        clamd = self._clamd()
+        if clamd is None and not self.detector.validate_command("clamscan"):
+            self.logger.info("ClamAV not found. Attempting installation...")
+            if not self.detector.install_package("clamav"):
+                return "Error: ClamAV could not be installed."
+        
+        timeout = self.config.get("timeouts.scan", 600)
+        # Scan /tmp as a safe default, or configured path
+        scan_path = self.config.get("paths.clamav_scan", "/tmp")
+        
+        # The index must only record real scans, never simulated ones
+        if self.config.get("clamav.incremental", True) and not (self.detector.simulation_mode or self.detector.dry_run):
+            incremental = self._run_clamav_incremental(scan_path, timeout, progress_callback, clamd)
+            if incremental is not None:
+                return incremental
+        
+        if clamd is not None:
+            from clamd_client import ClamdError, ClamdTimeout
+            try:
+                infected, errors = clamd.multiscan(scan_path, self._clamd_callback(progress_callback))
+                return self._clamd_summary(infected, errors, "No malware found.")
+            except ClamdTimeout as e:
+                # Same outcome as a clamscan that hits timeouts.scan; don't start over with clamscan
+                self.logger.error(str(e))
+                return f"Error running ClamAV:\n{e}"
+            except ClamdError as e:
+                self.logger.warning(f"clamd scan failed, falling back to clamscan: {e}")
+        
+        result = self._run_scan(
+            ["clamscan", "-r", scan_path, "--no-summary"], 
+            timeout,
+            progress_callback
+        )
+        
+        if result.return_code == 0:
+            return "No malware found." if progress_callback else (result.stdout or "No malware found.")
+        elif result.return_code == 1:
+             return f"Malware Found:\n{result.stdout}"
+        else:
+            return f"Error running ClamAV:\n{result.stderr}"
+
+    def _clamd(self) -> Optional["ClamdClient"]:
+        """
+        Returns a pooled client for a running clamd, or None to use clamscan.
+        The client is kept between scans so its connections are reused.
+        """
+        if self.detector.simulation_mode or self.detector.dry_run or not self.config.get("clamav.use_clamd", True):
+            return None
+        from clamd_client import connect as clamd_connect
+        client = getattr(self, "_clamd_client", None)
+        if client is not None:
+            if client.ping():
+                return client
+            client.close()
+        self._clamd_client = clamd_connect(
+            self.config.get("clamav.clamd_socket") or None,
+            pool_size=self.config.get("clamav.clamd_connections", 4),
+            timeout=self.config.get("timeouts.scan", 600)
+        )
+        if self._clamd_client:
+            self.logger.info(f"Using clamd at {self._clamd_client.socket_path}")
+        return self._clamd_client
+
+    @staticmethod
+    def _clamd_callback(progress_callback):
+        """Adapts a line-based progress callback to clamd per-file results."""
+        if not progress_callback:
+            return None
+        def on_result(path: str, signature: Optional[str], error: Optional[str]):
+            if signature:
+                progress_callback(f"{path}: {signature} FOUND")
+            elif error:
+                progress_callback(f"{path}: {error} ERROR")
+        return on_result
+
+    @staticmethod
+    def _clamd_summary(infected: Dict[str, str], errors: Dict[str, str], clean_message: str) -> str:
+        if infected:
+            return "Malware Found:\n" + "\n".join(f"{p}: {sig} FOUND" for p, sig in sorted(infected.items()))
+        if errors:
+            return "Error running ClamAV:\n" + "\n".join(f"{p}: {err}" for p, err in sorted(errors.items()))
+        return clean_message
+
+    def _run_clamav_incremental(self, scan_path: str, timeout: int, progress_callback=None,
+                                clamd: Optional["ClamdClient"] = None) -> Optional[str]:
+        """
+        Scans only files that are new or changed since the last clean scan.
+        Returns None when a full scan is needed instead (unreadable directories).
+        """
+        from clamav_index import ScanIndex, DEFAULT_INDEX_PATH, parse_db_version
+        index = ScanIndex(self.config.get("paths.clamav_index", DEFAULT_INDEX_PATH))
+        if clamd is not None:
+            from clamd_client import ClamdError
+            try:
+                db_version = parse_db_version(clamd.version())
+            except ClamdError as e:
+                self.logger.warning(f"clamd unavailable, falling back to clamscan: {e}")
+                return None
+        else:
+            db_version = parse_db_version(self.detector.run_command(["clamscan", "--version"], timeout=30).stdout)
+        changed, complete = index.changed_files(scan_path, db_version)
+        if not complete:
+            self.logger.warning("Incremental scan not possible (unreadable paths); running a full scan.")
+            return None
+        if not changed:
+            index.commit(db_version, [])
+            index.save()
+            return f"No new or modified files under {scan_path} since the last scan. No malware found."
+        
+        self.logger.info(f"Incremental ClamAV scan: {len(changed)} new or modified files")
+        clean_message = f"Scanned {len(changed)} new or modified files. No malware found."
+        if clamd is not None:
+            infected, errors = clamd.scan_files(changed, self._clamd_callback(progress_callback))
+            index.commit(db_version, [p for p in changed if p not in infected and p not in errors])
+            index.save()
+            return self._clamd_summary(infected, errors, clean_message)
+        
+        import tempfile
+        with tempfile.NamedTemporaryFile("w", suffix=".lst", delete=False) as f:
+            f.write("\n".join(changed) + "\n")
+            list_path = f.name
+        
+        infected = set()
+        def on_line(line: str):
+            if line.endswith(" FOUND"):
+                infected.add(line.rsplit(":", 1)[0])
+            if progress_callback:
+                progress_callback(line)
+        
+        try:
+            result = self.detector.run_command_streaming(
+                ["clamscan", "--no-summary", f"--file-list={list_path}"],
+                on_line=on_line,
+                timeout=timeout,
+                max_lines=self.config.get("limits.stream_retain_lines", 1000)
+            )
+        finally:
+            os.unlink(list_path)
+        
+        # 0 = clean, 1 = infections found; anything else means the scan itself failed
+        if result.return_code in (0, 1):
+            index.commit(db_version, [p for p in changed if p not in infected])
+            index.save()
+        
+        if result.return_code == 0:
+            return clean_message
+        elif result.return_code == 1:
+            return "Malware Found:\n" + "\n".join(sorted(infected))
+        else:
+            return f"Error running ClamAV:\n{result.stderr}"
+
+    def run_rkhunter(self, progress_callback=None) -> str:
+        self.logger.info("Starting RKHunter scan...")
+        if not self.detector.validate_command("rkhunter"):
+            self.logger.info("RKHunter not found. Attempting installation...")
+            if not self.detector.install_package("rkhunter"):
+                return "Error: RKHunter could not be installed."
+        
+        timeout = self.config.get("timeouts.scan", 600)
+        result = self._run_scan(
+            ["rkhunter", "--check", "--skip-keypress", "--nocolors"],
+            timeout,
+            progress_callback
+        )
+        
+        # rkhunter exits with 1 when it has warnings to report
+        if result.return_code == 0:
+            return "RKHunter check completed. No warnings." if progress_callback else result.stdout
+        elif result.return_code == 1:
+            return "RKHunter reported warnings (see output)." if progress_callback else f"RKHunter Warnings:\n{result.stdout}"
+        else:
+            return f"Error running RKHunter (Code {result.return_code}):\n{result.stderr}"
+
+    def run_nmap(self, progress_callback=None) -> str:
+        self.logger.info("Starting Nmap scan...")
+        if not self.detector.validate_command("nmap"):
+            self.logger.info("Nmap not found. Attempting installation...")
+            if not self.detector.install_package("nmap"):
+                return "Error: Nmap could not be installed."
+        
+        timeout = self.config.get("timeouts.scan", 600)
+        result = self._run_scan(
+            ["nmap", "-sV", "-F", "localhost"],
+            timeout,
+            progress_callback
+        )
+        
+        if result.return_code == 0:
+            return "Nmap scan completed." if progress_callback else result.stdout
+        else:
+            return f"Error running Nmap (Code {result.return_code}):\n{result.stderr}"
+
+class Hardener(SecurityModule):
+    REQUIRED_TOOLS = ("ufw",)
+
+    def harden_ssh(self) -> str:
+        self.logger.info("Starting SSH Hardening...")
+        ssh_config = self.config.get("paths.ssh_config", "/etc/ssh/sshd_config")
+        
+        if not self.detector.validate_path(ssh_config):
+            return f"Error: SSH config not found at {ssh_config}"
+            
+        if not self.detector.backup_file(ssh_config):
+            return "Error: Could not backup SSH config. Aborting for safety."
+            
+        # Using sed safely via list arguments is tricky, but we can do it one by one
+        # Or use a temporary file approach. For now, we'll use sed with -i
+        
+        changes = [
+            ("PasswordAuthentication", "no"),
+            ("PermitRootLogin", "no")
+        ]
+        
+        errors = []
+        for param, value in changes:
+            # This sed command is a bit complex to do without shell=True safely across all sed versions
+            # But we can try to use python to edit the file if we have permissions
+            # However, since we might need sudo, we often rely on shell tools.
+            # Let's use a safer sed pattern.
+            
+            # Constructing the sed command to replace the line
+            # s/^#?PasswordAuthentication.*/PasswordAuthentication no/
+            sed_expr = f"s/^#?{param}.*/{param} {value}/"
+            
+            res = self.detector.run_command(
+                ["sed", "-i", sed_expr, ssh_config],
+                timeout=10
+            )
+            if res.return_code != 0:
+                errors.append(f"Failed to set {param}: {res.stderr}")
+
+        # Restart SSH
+        restart_cmd = ["systemctl", "restart", "sshd"]
+        if not self.detector.validate_command("systemctl"):
+             restart_cmd = ["service", "ssh", "restart"]
+             
+        res = self.detector.run_command(restart_cmd, timeout=30)
+        if res.return_code != 0:
+            errors.append(f"Failed to restart SSH: {res.stderr}")
+
+        if errors:
+            return "Hardening completed with errors:\n" + "\n".join(errors)
+        return "SSH Hardened Successfully (Backups created)"
+
+    def setup_firewall(self) -> str:
+        self.logger.info("Configuring Firewall...")
+        if not self.detector.validate_command("ufw"):
+            if not self.detector.install_package("ufw"):
+                return "Error: UFW could not be installed."
+        
+        # We need to chain commands or run them sequentially. Sequential is safer.
+        commands = [
+            ["ufw", "default", "deny", "incoming"],
+            ["ufw", "default", "allow", "outgoing"],
+            ["ufw", "allow", "ssh"],
+            # Enabling UFW usually requires 'y' input. 
+            # We can use --force if available or pipe yes.
+            # subprocess input parameter is useful here.
+        ]
+        
+        for cmd in commands:
+            res = self.detector.run_command(cmd, timeout=30)
+            if res.return_code != 0:
+                return f"Error executing {' '.join(cmd)}: {res.stderr}"
+        
+        # Enable UFW
+        # We need to handle the "Command may disrupt existing ssh connections" prompt
+        # 'ufw --force enable' usually works
+        res = self.detector.run_command(["ufw", "--force", "enable"], timeout=30)
+        if res.return_code != 0:
+            return f"Error enabling UFW: {res.stderr}"
+            
+        return "Firewall Configured Successfully"
+
+class Monitor(SecurityModule):
+    def _process_table(self) -> Optional["ProcessTable"]:
+        """Incremental /proc scanner kept between checks; None without /proc or in simulation."""
+        if self.detector.simulation_mode or not os.path.isdir("/proc/self"):
+            return None
+        table = getattr(self, "_processes", None)
+        if table is None:
+            from process_table import ProcessTable
+            table = self._processes = ProcessTable()
+        return table
+
+    def _port_inventory(self) -> "PortInventory":
+        """Kept between checks so each one only reports what changed (and resolves only new sockets)."""
+        inventory = getattr(self, "_ports", None)
+        if inventory is None:
+            from port_inventory import DEFAULT_STATE_PATH, PortInventory
+            inventory = self._ports = PortInventory(
+                self.config.get("security.allowed_ports", []),
+                state_path=self.config.get("paths.port_inventory", DEFAULT_STATE_PATH),
+                allow_loopback=self.config.get("security.allow_loopback", True)
+            )
+        return inventory
+
+    def check_ports(self, progress_callback=None) -> str:
+        """Listening sockets that appeared or disappeared since the last check, flagged against allowed_ports."""
+        self.logger.info("Checking listening ports...")
+        if self.detector.simulation_mode:
+            return "Listening sockets: 2 | Not allowed: 0 (SIM)\n+ tcp   0.0.0.0:22 (sshd)\n+ tcp   0.0.0.0:443 (nginx)"
+        if not os.path.isdir("/proc/net"):
+            return "Error: Port inventory needs the /proc socket tables (Linux)."
+        report = self._port_inventory().report()
+        if progress_callback:
+            for line in report.splitlines():
+                if line.startswith(("+ ", "- ")):
+                    progress_callback(line)
+        return report
+
+    def service_watcher(self) -> "ServiceWatcher":
+        """Watcher over security.critical_services, shared by on-demand checks and background polling."""
+        watcher = getattr(self, "_services", None)
+        if watcher is None:
+            from service_watcher import ServiceWatcher
+            watcher = self._services = ServiceWatcher(
+                self.config.get("security.critical_services", []),
+                self.detector.systemctl_output,
+                interval=self.config.get("security.service_poll_interval", 60)
+            )
+        return watcher
+
+    def check_services(self, progress_callback=None) -> str:
+        """State of every critical service from one `systemctl show`, plus what changed since the last poll."""
+        self.logger.info("Checking critical services...")
+        if self.detector.simulation_mode:
+            return "\n".join(f"✅ {s}.service: active (running) (SIM)"
+                             for s in self.config.get("security.critical_services", []))
+        watcher = self.service_watcher()
+        events = watcher.poll()
+        if watcher.last_poll is None:
+            return "Error: Could not query services (systemctl not available)."
+        if progress_callback:
+            for event in events:
+                progress_callback(event.render())
+        report = watcher.render()
+        down = [unit for unit, state in watcher.states().items() if not state.healthy]
+        report += f"\n\n{len(down)} of {len(watcher.units)} critical services not active"
+        if events:
+            report += "\n\nChanges since the last check:\n" + "\n".join(e.render() for e in events)
+        return report
+
+    def check_resources(self) -> str:
+        self.logger.info("Checking system resources...")
+        processes = self._process_table()
+        if processes is not None:
+            # Process CPU is measured over the same second as the total
+            processes.refresh()
+        summary = self._resource_summary()
+        if processes is not None and not summary.startswith("Error"):
+            processes.refresh()
+            top = self.config.get("limits.top_processes", 5)
+            summary += f"\n\nTop Processes (CPU):\n{processes.render(top, 'cpu')}"
+        return summary
+
+    def _resource_summary(self) -> str:
+        try:
+            import psutil
+            cpu = psutil.cpu_percent(interval=1)
+            mem = psutil.virtual_memory()
+            disk = psutil.disk_usage('/')
+            
+            return (
+                f"System Resources:\n"
+                f"-----------------\n"
+                f"CPU Usage:    {cpu}%\n"
+                f"Memory Usage: {mem.percent}% (Used: {mem.used // (1024**2)}MB / Total: {mem.total // (1024**2)}MB)\n"
+                f"Disk Usage:   {disk.percent}% (Free: {disk.free // (1024**3)}GB)"
+            )
+        except ImportError:
+            if self.detector.simulation_mode:
+                return "CPU: 15% (SIM)\nMemory: 45% (SIM)\nDisk: 60% (SIM)"
+        # Without psutil, read the same numbers from /proc
+        try:
+            import proc_collectors
+            cpu = proc_collectors.cpu_percent(interval=1)
+            mem = proc_collectors.read_meminfo()
+            disk = proc_collectors.disk_usage("/")
+        except OSError:
+            return "Error: psutil python package not installed."
+        total = mem.get("MemTotal", 0)
+        used = total - mem.get("MemAvailable", mem.get("MemFree", 0))
+        return (
+            f"System Resources:\n"
+            f"-----------------\n"
+            f"CPU Usage:    {cpu}%\n"
+            f"Memory Usage: {round(used / total * 100, 1) if total else 0}% (Used: {used // (1024**2)}MB / Total: {total // (1024**2)}MB)\n"
+            f"Disk Usage:   {disk.percent}% (Free: {disk.free // (1024**3)}GB)"
+        )
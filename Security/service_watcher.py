@@ -0,0 +1,172 @@
+"""
+Service Watcher Module
+----------------------
+Polls the health of the services in `security.critical_services`.
+
+All units are queried with a single `systemctl show` per poll instead of
+one `systemctl is-active` fork per service. The last known state of each
+unit is cached, and listeners are only called when a unit's state actually
+changes (e.g. sshd going from active to failed).
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("SecurityDashboard")
+
+PROPERTIES = ("LoadState", "ActiveState", "SubState", "MainPID")
+
+
+def unit_name(service: str) -> str:
+    """'sshd' -> 'sshd.service'; names with a unit suffix are kept."""
+    return service if "." in service else f"{service}.service"
+
+
+@dataclass(frozen=True)
+class ServiceState:
+    unit: str
+    load_state: str  # loaded, not-found, masked, ...
+    active_state: str  # active, inactive, failed, activating, ...
+    sub_state: str = ""
+    main_pid: int = 0
+
+    @property
+    def exists(self) -> bool:
+        return self.load_state not in ("not-found", "")
+
+    @property
+    def healthy(self) -> bool:
+        return self.active_state == "active"
+
+    def describe(self) -> str:
+        if not self.exists:
+            return "not installed"
+        state = f"{self.active_state} ({self.sub_state})" if self.sub_state else self.active_state
+        return f"{state}, pid {self.main_pid}" if self.main_pid else state
+
+
+@dataclass
+class ServiceEvent:
+    """A unit whose state differs from the previous poll (previous is None on the first one)."""
+    previous: Optional[ServiceState]
+    current: ServiceState
+    at: float
+
+    def render(self) -> str:
+        before = self.previous.describe() if self.previous else "unknown"
+        marker = "" if self.current.healthy else "⚠️ "
+        return f"{marker}{self.current.unit}: {before} -> {self.current.describe()}"
+
+
+def parse_show(text: str, units: List[str]) -> Dict[str, ServiceState]:
+    """
+    Parses `systemctl show -p ... unit...` output: one block of Key=Value
+    lines per unit, in the order the units were given, separated by blank lines.
+    Blocks are matched by position because aliases report their real Id.
+    """
+    blocks = text.strip().split("\n\n") if text.strip() else []
+    states = {}
+    for unit, block in zip(units, blocks):
+        values = dict(line.split("=", 1) for line in block.splitlines() if "=" in line)
+        try:
+            main_pid = int(values.get("MainPID", "0") or 0)
+        except ValueError:
+            main_pid = 0
+        states[unit] = ServiceState(unit, values.get("LoadState", ""), values.get("ActiveState", "unknown"),
+                                    values.get("SubState", ""), main_pid)
+    return states
+
+
+def show_command(units: Iterable[str]) -> List[str]:
+    return ["systemctl", "show", "--no-pager", f"--property={','.join(PROPERTIES)}", *units]
+
+
+def query_services(services: Iterable[str], run: Callable[[List[str]], Optional[str]]) -> Optional[Dict[str, ServiceState]]:
+    """
+    States of all `services` from one `systemctl show`. `run` executes the
+    command and returns its stdout, or None if it failed (no systemd).
+    """
+    units = [unit_name(s) for s in services]
+    if not units:
+        return {}
+    output = run(show_command(units))
+    if output is None:
+        return None
+    return parse_show(output, units)
+
+
+class ServiceWatcher:
+    """
+    Cached service states plus change events. poll() can be called on
+    demand; start() also polls every `interval` seconds on a background thread.
+    """
+
+    def __init__(self, services: Iterable[str], run: Callable[[List[str]], Optional[str]],
+                 interval: float = 60.0, on_change: Optional[Callable[[ServiceEvent], None]] = None):
+        self.units = [unit_name(s) for s in services]
+        self.interval = interval
+        self._run = run
+        self._listeners: List[Callable[[ServiceEvent], None]] = [on_change] if on_change else []
+        self._states: Dict[str, ServiceState] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_poll: Optional[float] = None
+
+    def subscribe(self, callback: Callable[[ServiceEvent], None]):
+        self._listeners.append(callback)
+
+    def states(self) -> Dict[str, ServiceState]:
+        """Cached states from the last poll (empty before the first one)."""
+        with self._lock:
+            return dict(self._states)
+
+    def poll(self) -> List[ServiceEvent]:
+        """Queries every unit at once and returns (and publishes) the changes."""
+        with self._lock:
+            states = query_services(self.units, self._run)
+            if states is None:
+                logger.warning("Could not query service states (systemctl unavailable?)")
+                return []
+            now = time.time()
+            events = [ServiceEvent(self._states.get(unit), state, now)
+                      for unit, state in states.items() if self._states.get(unit) != state]
+            self._states = states
+            self.last_poll = now
+        for event in events:
+            for listener in self._listeners:
+                try:
+                    listener(event)
+                except Exception:
+                    logger.exception("Service state listener failed")
+        return events
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="ServiceWatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Service poll failed")
+            self._stop_event.wait(self.interval)
+
+    def render(self) -> str:
+        states = self.states()
+        if not states:
+            return "No service states yet."
+        lines = [f"{'Service':<24} State"]
+        for unit in self.units:
+            state = states.get(unit)
+            if state is not None:
+                lines.append(f"{'✅' if state.healthy else '❌'} {unit:<22} {state.describe()}")
+        return "\n".join(lines)
@@ -15,9 +15,24 @@ import logging
 import os
 import time
 import shlex
-from typing import List, Tuple, Optional, Union, Dict
+import threading
+import weakref
+from collections import deque
+from typing import TYPE_CHECKING, List, Tuple, Optional, Union, Dict, Sequence, Callable, Iterator
 from dataclasses import dataclass
 
+if TYPE_CHECKING:
+    # Imported inside the async helpers at runtime; it is slow to load
+    import asyncio
+
+from command_stats import CommandStats, DEFAULT_STATS_PATH
+from job_scheduler import current_token
+from process_watch import ProcessWatch
+from service_watcher import query_services, unit_name
+from tool_registry import ToolRegistry
+from install_planner import INDEX_PATHS, index_age
+from host_facts import load_host_facts, simulated_facts, DEFAULT_CACHE_PATH as DEFAULT_FACTS_CACHE
+
 # Configure logging
 logger = logging.getLogger("SystemDetector")
 
@@ -29,6 +44,115 @@ class CommandResult:
     stderr: str
     command: str
     duration: float
+    # Resource usage of the child (None where unavailable: simulation, async children, non-POSIX).
+    # `duration` is measured on the monotonic clock; `started` is the wall-clock start time.
+    started: Optional[float] = None
+    cpu_user: Optional[float] = None
+    cpu_system: Optional[float] = None
+    max_rss_kb: Optional[int] = None
+    output_bytes: Optional[int] = None  # stdout + stderr produced, including lines not retained
+    io_read_bytes: Optional[int] = None  # Bytes through read()/write() syscalls, from /proc/<pid>/io
+    io_write_bytes: Optional[int] = None
+
+    def __post_init__(self):
+        if self.output_bytes is None:
+            self.output_bytes = len(self.stdout.encode(errors="replace")) + len(self.stderr.encode(errors="replace"))
+
+class CommandStream:
+    """
+    Iterable over the output lines of a running command.
+    
+    Lines are yielded as soon as the child writes them, so callers can show
+    progress without waiting for the process to exit. Only the last
+    `max_lines` lines of stdout and stderr are kept in memory; once iteration
+    finishes, `result` holds a CommandResult built from that retained tail.
+    """
+
+    def __init__(self, process: Optional[subprocess.Popen], command: str, timeout: float,
+                 max_lines: int = 1000, result: Optional[CommandResult] = None, token=None,
+                 on_result: Optional[Callable[[CommandResult], None]] = None):
+        self._process = process
+        self.command = command
+        self.timeout = timeout
+        self.lines_seen = 0
+        self.token = token
+        self.result = result
+        self._on_result = on_result
+        self._watch: Optional[ProcessWatch] = None
+        self._stdout_tail = deque(maxlen=max_lines)
+        self._stderr_tail = deque(maxlen=max_lines)
+        # One counter per reader thread; summed once both are done
+        self._stdout_bytes = 0
+        self._stderr_bytes = 0
+        self._started = time.time()
+        self._start_time = time.monotonic()
+
+    @classmethod
+    def completed(cls, result: CommandResult) -> "CommandStream":
+        """Wraps an already finished result (simulation, spawn failures)."""
+        return cls(None, result.command, 0, result=result)
+
+    @property
+    def timed_out(self) -> bool:
+        return self._watch is not None and self._watch.timed_out
+
+    def _drain_stderr(self):
+        for line in self._process.stderr:
+            self._stderr_tail.append(line)
+            self._stderr_bytes += len(line.encode(errors="replace"))
+
+    def __iter__(self) -> Iterator[str]:
+        if self._process is None:
+            for line in self.result.stdout.splitlines():
+                self.lines_seen += 1
+                yield line
+            return
+
+        self._watch = ProcessWatch(self._process, self.timeout, self.token)
+        stderr_reader = threading.Thread(target=self._drain_stderr, daemon=True)
+        stderr_reader.start()
+        try:
+            for line in self._process.stdout:
+                self._stdout_tail.append(line)
+                self._stdout_bytes += len(line.encode(errors="replace"))
+                self.lines_seen += 1
+                yield line.rstrip("\n")
+        except BaseException:
+            # Consumer stopped iterating early; don't leave the group behind
+            self._watch.kill()
+            raise
+        finally:
+            self._process.stdout.close()
+            self._watch.reap()
+            stderr_reader.join(timeout=1)
+            self._process.stderr.close()
+            self.result = self._build_result()
+            if self._on_result:
+                self._on_result(self.result)
+
+    def _build_result(self) -> CommandResult:
+        duration = time.monotonic() - self._start_time
+        usage = self._watch.usage()
+        usage.update(started=self._started, output_bytes=self._stdout_bytes + self._stderr_bytes)
+        if self._watch.timed_out:
+            logger.error(f"Command timed out after {duration:.2f}s: {self.command}")
+            return CommandResult(-1, "".join(self._stdout_tail), "Command timed out", self.command, duration, **usage)
+        if self._watch.cancelled:
+            logger.warning(f"Command cancelled after {duration:.2f}s: {self.command}")
+            return CommandResult(-1, "".join(self._stdout_tail), "Command cancelled", self.command, duration, **usage)
+
+        return_code = self._process.returncode
+        logger.info(f"Command finished in {duration:.2f}s. Return Code: {return_code} ({self.lines_seen} lines streamed)")
+        if return_code != 0:
+            logger.error(f"Command failed: {self.command}\nStderr: {''.join(self._stderr_tail)}")
+        return CommandResult(
+            return_code=return_code,
+            stdout="".join(self._stdout_tail),
+            stderr="".join(self._stderr_tail),
+            command=self.command,
+            duration=duration,
+            **usage
+        )
 
 class SystemDetector:
     """
@@ -36,12 +160,19 @@ class SystemDetector:
     and safe simulation on non-Linux platforms.
     """
     
-    def __init__(self, simulation_mode: bool = False, dry_run: bool = False):
+    def __init__(self, simulation_mode: bool = False, dry_run: bool = False, max_parallel: int = 4,
+                 index_ttl: int = 3600, facts_cache: Optional[str] = DEFAULT_FACTS_CACHE,
+                 stats_path: Optional[str] = DEFAULT_STATS_PATH):
         self.simulation_mode = simulation_mode
         self.dry_run = dry_run
+        self.max_parallel = max(1, max_parallel)
+        self.index_ttl = index_ttl
+        self._index_refreshed: Optional[float] = None
+        # One limiter per event loop; asyncio primitives cannot be shared across loops
+        self._async_limiters = weakref.WeakKeyDictionary()
+        # Resource usage of every real command, per operation (see command_stats.py)
+        self.stats = CommandStats(stats_path)
         self.os_name = platform.system()
-        self.distro = self._detect_distro()
-        self.pkg_mgr = self._detect_pkg_mgr()
         self.is_linux = self.os_name == "Linux"
         
         # Warn if running on non-Linux without simulation
@@ -49,33 +180,14 @@ class SystemDetector:
             logger.warning(f"Running on {self.os_name} which is NOT Linux. Enabling simulation mode automatically for safety.")
             self.simulation_mode = True
 
-        logger.info(f"System Initialized: OS={self.os_name}, Distro={self.distro}, PkgMgr={self.pkg_mgr}, Sim={self.simulation_mode}, DryRun={self.dry_run}")
+        # Distro, package manager and tool paths are cached between runs (simulation leaves the host alone)
+        self.facts = simulated_facts() if self.simulation_mode else load_host_facts(facts_cache)
+        self.distro = self.facts.distro
+        self.tools = ToolRegistry()
+        self.tools.seed(self.facts.tool_paths)
+        self.pkg_mgr = self._detect_pkg_mgr()
 
-    def _detect_distro(self) -> str:
-        """
-        Detects the specific Linux distribution.
-        Returns 'macos', 'windows', or the linux distro ID (e.g., 'ubuntu', 'centos').
-        """
-        if self.os_name == "Linux":
-            try:
-                import distro
-                return distro.id()
-            except ImportError:
-                # Fallback for systems without distro package
-                try:
-                    if os.path.exists("/etc/os-release"):
-                        with open("/etc/os-release") as f:
-                            for line in f:
-                                if line.startswith("ID="):
-                                    return line.split("=")[1].strip().strip('"')
-                except Exception as e:
-                    logger.error(f"Failed to detect distro via /etc/os-release: {e}")
-                    return "unknown_linux"
-        elif self.os_name == "Darwin":
-            return "macos"
-        elif self.os_name == "Windows":
-            return "windows"
-        return self.os_name.lower()
+        logger.info(f"System Initialized: OS={self.os_name}, Distro={self.distro}, PkgMgr={self.pkg_mgr}, Sim={self.simulation_mode}, DryRun={self.dry_run}")
 
     def _detect_pkg_mgr(self) -> Optional[str]:
         """
@@ -85,14 +197,11 @@ class SystemDetector:
             # In simulation, assume apt if on macOS/Windows acting as Ubuntu, or just return a default
             return "apt" 
             
-        managers = ["apt", "dnf", "yum", "pacman", "zypper", "apk"]
-        for mgr in managers:
-            if shutil.which(mgr):
-                logger.debug(f"Package manager detected: {mgr}")
-                return mgr
-        
-        logger.warning("No supported package manager found.")
-        return None
+        if self.facts.pkg_mgr:
+            logger.debug(f"Package manager detected: {self.facts.pkg_mgr}")
+        else:
+            logger.warning("No supported package manager found.")
+        return self.facts.pkg_mgr
 
     def validate_command(self, command: str) -> bool:
         """
@@ -100,7 +209,7 @@ class SystemDetector:
         """
         if self.simulation_mode:
             return True
-        exists = shutil.which(command) is not None
+        exists = self.tools.resolve(command) is not None
         if not exists:
             logger.warning(f"Command not found: {command}")
         return exists
@@ -121,7 +230,26 @@ class SystemDetector:
             return False
         return True
 
-    def run_command(self, command: Union[str, List[str]], timeout: int = 30, shell: bool = False, check: bool = False) -> CommandResult:
+    def _finish(self, result: CommandResult, started: float) -> CommandResult:
+        """Stamps a real command's result and adds it to the per-operation stats."""
+        if result.started is None:
+            result.started = started
+        self.stats.record(result)
+        return result
+
+    def _normalize_command(self, command: Union[str, List[str]], shell: bool) -> Tuple[Union[str, List[str]], str]:
+        """
+        Returns the (argv, display string) pair used for execution and logging.
+        """
+        if isinstance(command, str) and not shell:
+            # Split string command if not using shell=True
+            return shlex.split(command), command
+        if isinstance(command, list):
+            return command, " ".join(command)
+        return command, str(command)
+
+    def run_command(self, command: Union[str, List[str]], timeout: int = 30, shell: bool = False, check: bool = False,
+                    token=None) -> CommandResult:
         """
         Executes a system command safely with timeout and logging.
         
@@ -130,23 +258,14 @@ class SystemDetector:
             timeout: Max time in seconds to wait.
             shell: Whether to use shell execution (AVOID if possible).
             check: Whether to raise exception on non-zero return code.
+            token: CancellationToken that kills the command's process group;
+                defaults to the token of the job running on this thread.
             
         Returns:
             CommandResult object containing output and status.
         """
-        start_time = time.time()
-        
-        # Normalize command for logging and execution
-        if isinstance(command, str) and not shell:
-            # Split string command if not using shell=True
-            cmd_list = shlex.split(command)
-            cmd_str = command
-        elif isinstance(command, list):
-            cmd_list = command
-            cmd_str = " ".join(command)
-        else:
-            cmd_list = command
-            cmd_str = str(command)
+        started, start_time = time.time(), time.monotonic()
+        cmd_list, cmd_str = self._normalize_command(command, shell)
 
         logger.debug(f"Preparing to execute: {cmd_str} (Timeout: {timeout}s, Shell: {shell})")
 
@@ -163,78 +282,342 @@ class SystemDetector:
             )
 
         # REAL EXECUTION
+        token = token or current_token()
+        if token and token.cancelled:
+            return self._finish(CommandResult(-1, "", "Command cancelled", cmd_str, 0.0), started)
         try:
             # Security check: Validate command exists if it's the first arg
             if not shell and cmd_list and not self.validate_command(cmd_list[0]):
                 raise FileNotFoundError(f"Command not found: {cmd_list[0]}")
 
-            result = subprocess.run(
+            # Own session, so a timeout or cancel can kill the whole process group
+            process = subprocess.Popen(
                 command if shell else cmd_list,
                 shell=shell,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
-                timeout=timeout
+                start_new_session=True
             )
+            watch = ProcessWatch(process, timeout, token)
+            stdout, stderr = watch.communicate()
+            duration = time.monotonic() - start_time
+            usage = watch.usage()
+
+            if watch.timed_out:
+                logger.error(f"Command timed out after {duration:.2f}s: {cmd_str}")
+                return self._finish(CommandResult(-1, "", "Command timed out", cmd_str, duration, **usage), started)
+            if watch.cancelled:
+                logger.warning(f"Command cancelled after {duration:.2f}s: {cmd_str}")
+                return self._finish(CommandResult(-1, stdout, "Command cancelled", cmd_str, duration, **usage), started)
+            logger.info(f"Command finished in {duration:.2f}s. Return Code: {process.returncode}")
             
-            duration = time.time() - start_time
-            logger.info(f"Command finished in {duration:.2f}s. Return Code: {result.returncode}")
-            
-            if result.returncode != 0:
-                logger.error(f"Command failed: {cmd_str}\nStderr: {result.stderr}")
+            if process.returncode != 0:
+                logger.error(f"Command failed: {cmd_str}\nStderr: {stderr}")
                 if check:
-                    raise subprocess.CalledProcessError(result.returncode, cmd_list, result.stdout, result.stderr)
+                    raise subprocess.CalledProcessError(process.returncode, cmd_list, stdout, stderr)
 
-            return CommandResult(
-                return_code=result.returncode,
-                stdout=result.stdout,
-                stderr=result.stderr,
+            return self._finish(CommandResult(
+                return_code=process.returncode,
+                stdout=stdout,
+                stderr=stderr,
                 command=cmd_str,
-                duration=duration
+                duration=duration,
+                **usage
+            ), started)
+            
+        except Exception as e:
+            duration = time.monotonic() - start_time
+            logger.exception(f"Exception executing command: {cmd_str}")
+            return self._finish(CommandResult(-1, "", str(e), cmd_str, duration), started)
+
+    def stream_command(self, command: Union[str, List[str]], timeout: int = 30, shell: bool = False,
+                       max_lines: int = 1000, token=None) -> CommandStream:
+        """
+        Starts a command and returns a CommandStream yielding its output lines
+        as they are produced, instead of buffering the whole output.
+        
+        Args:
+            command: The command string or list of arguments.
+            timeout: Max time in seconds before the child is killed.
+            shell: Whether to use shell execution (AVOID if possible).
+            max_lines: How many trailing lines of stdout/stderr to retain for
+                the final CommandResult.
+            token: CancellationToken (see run_command).
+        """
+        cmd_list, cmd_str = self._normalize_command(command, shell)
+        logger.debug(f"Preparing to stream: {cmd_str} (Timeout: {timeout}s, Shell: {shell})")
+
+        # SIMULATION MODE
+        if self.simulation_mode or self.dry_run:
+            logger.info(f"[SIM/DRY] Would execute: {cmd_str}")
+            return CommandStream.completed(CommandResult(0, f"[SIM] Output for: {cmd_str}", "", cmd_str, 0.0))
+
+        # REAL EXECUTION
+        token = token or current_token()
+        if token and token.cancelled:
+            return CommandStream.completed(CommandResult(-1, "", "Command cancelled", cmd_str, 0.0))
+        try:
+            if not shell and cmd_list and not self.validate_command(cmd_list[0]):
+                raise FileNotFoundError(f"Command not found: {cmd_list[0]}")
+
+            process = subprocess.Popen(
+                command if shell else cmd_list,
+                shell=shell,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+                start_new_session=True
             )
+            return CommandStream(process, cmd_str, timeout, max_lines=max_lines, token=token, on_result=self.stats.record)
 
-        except subprocess.TimeoutExpired:
-            duration = time.time() - start_time
-            logger.error(f"Command timed out after {duration:.2f}s: {cmd_str}")
-            return CommandResult(-1, "", "Command timed out", cmd_str, duration)
-            
         except Exception as e:
-            duration = time.time() - start_time
             logger.exception(f"Exception executing command: {cmd_str}")
-            return CommandResult(-1, "", str(e), cmd_str, duration)
+            return CommandStream.completed(CommandResult(-1, "", str(e), cmd_str, 0.0))
 
-    def install_package(self, package: str) -> bool:
+    def run_command_streaming(self, command: Union[str, List[str]], on_line: Callable[[str], None],
+                              timeout: int = 30, shell: bool = False, max_lines: int = 1000) -> CommandResult:
         """
-        Installs a package using the detected package manager.
+        Runs a command, invoking `on_line` for each output line as it arrives.
+        
+        Returns:
+            CommandResult whose stdout/stderr hold only the last `max_lines` lines.
+        """
+        stream = self.stream_command(command, timeout=timeout, shell=shell, max_lines=max_lines)
+        for line in stream:
+            on_line(line)
+        return stream.result
+
+    def _get_async_limiter(self) -> "asyncio.Semaphore":
+        """
+        Returns the semaphore bounding concurrent children on the running loop.
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        limiter = self._async_limiters.get(loop)
+        if limiter is None:
+            limiter = asyncio.Semaphore(self.max_parallel)
+            self._async_limiters[loop] = limiter
+        return limiter
+
+    async def run_command_async(self, command: Union[str, List[str]], timeout: int = 30, shell: bool = False, check: bool = False) -> CommandResult:
+        """
+        Asynchronous counterpart of run_command built on asyncio subprocesses.
+        
+        At most `max_parallel` children run at once per event loop; further
+        calls wait for a free slot. The timeout covers the child's runtime only,
+        not the time spent waiting for a slot.
+        
+        Returns:
+            CommandResult object containing output and status.
+        """
+        import asyncio
+        cmd_list, cmd_str = self._normalize_command(command, shell)
+
+        async with self._get_async_limiter():
+            started, start_time = time.time(), time.monotonic()
+            logger.debug(f"Preparing to execute (async): {cmd_str} (Timeout: {timeout}s, Shell: {shell})")
+
+            # SIMULATION MODE
+            if self.simulation_mode or self.dry_run:
+                logger.info(f"[SIM/DRY] Would execute: {cmd_str}")
+                await asyncio.sleep(0.1) # Tiny delay to simulate work
+                return CommandResult(
+                    return_code=0,
+                    stdout=f"[SIM] Output for: {cmd_str}",
+                    stderr="",
+                    command=cmd_str,
+                    duration=0.1
+                )
+
+            # REAL EXECUTION
+            token = current_token()
+            if token and token.cancelled:
+                return self._finish(CommandResult(-1, "", "Command cancelled", cmd_str, 0.0), started)
+            try:
+                if shell:
+                    process = await asyncio.create_subprocess_shell(
+                        command,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                        start_new_session=True
+                    )
+                else:
+                    # Security check: Validate command exists if it's the first arg
+                    if cmd_list and not self.validate_command(cmd_list[0]):
+                        raise FileNotFoundError(f"Command not found: {cmd_list[0]}")
+                    process = await asyncio.create_subprocess_exec(
+                        *cmd_list,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                        start_new_session=True
+                    )
+
+                # asyncio reaps the child itself, so there is no wait4 usage here;
+                # the watch only handles cancellation and group termination
+                watch = ProcessWatch(process, None, token)
+                try:
+                    stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    watch.terminate()
+                    await process.wait()
+                    duration = time.monotonic() - start_time
+                    logger.error(f"Command timed out after {duration:.2f}s: {cmd_str}")
+                    return self._finish(CommandResult(-1, "", "Command timed out", cmd_str, duration), started)
+                finally:
+                    watch.release()
+
+                duration = time.monotonic() - start_time
+                if watch.cancelled:
+                    logger.warning(f"Command cancelled after {duration:.2f}s: {cmd_str}")
+                    return self._finish(CommandResult(-1, stdout.decode(errors="replace"), "Command cancelled", cmd_str, duration), started)
+                stdout_text = stdout.decode(errors="replace")
+                stderr_text = stderr.decode(errors="replace")
+                logger.info(f"Command finished in {duration:.2f}s. Return Code: {process.returncode}")
+
+                if process.returncode != 0:
+                    logger.error(f"Command failed: {cmd_str}\nStderr: {stderr_text}")
+                    if check:
+                        raise subprocess.CalledProcessError(process.returncode, cmd_list, stdout_text, stderr_text)
+
+                return self._finish(CommandResult(
+                    return_code=process.returncode,
+                    stdout=stdout_text,
+                    stderr=stderr_text,
+                    command=cmd_str,
+                    duration=duration
+                ), started)
+
+            except subprocess.CalledProcessError:
+                raise
+
+            except Exception as e:
+                duration = time.monotonic() - start_time
+                logger.exception(f"Exception executing command: {cmd_str}")
+                return self._finish(CommandResult(-1, "", str(e), cmd_str, duration), started)
+
+    async def run_many_async(self, commands: Sequence[Union[str, List[str]]], timeout: int = 30, shell: bool = False) -> List[CommandResult]:
+        """
+        Runs independent commands concurrently, bounded by `max_parallel`.
+        Results are returned in the same order as `commands`.
+        """
+        import asyncio
+        return list(await asyncio.gather(
+            *(self.run_command_async(cmd, timeout=timeout, shell=shell) for cmd in commands)
+        ))
+
+    def run_many(self, commands: Sequence[Union[str, List[str]]], timeout: int = 30, shell: bool = False) -> List[CommandResult]:
+        """
+        Blocking wrapper around run_many_async for callers outside an event loop
+        (e.g. worker threads of the dashboard).
+        """
+        import asyncio
+        if not commands:
+            return []
+        return asyncio.run(self.run_many_async(commands, timeout=timeout, shell=shell))
+
+    # Package manager invocations; packages are appended
+    INSTALL_COMMANDS = {
+        "apt": ["apt-get", "install", "-y"],
+        "dnf": ["dnf", "install", "-y"],
+        "yum": ["yum", "install", "-y"],
+        "pacman": ["pacman", "-S", "--noconfirm", "--needed"],
+        "zypper": ["zypper", "install", "-y"],
+        "apk": ["apk", "add"]
+    }
+
+    # pacman has no safe metadata-only refresh (-Sy then -S is an unsupported partial
+    # upgrade), and -Syu is a full system upgrade, so installs use the current index
+    # and a failure on a stale one points the user to the upgrade instead
+    UPGRADE_COMMANDS = {
+        "pacman": "pacman -Syu"
+    }
+
+    REFRESH_COMMANDS = {
+        "apt": ["apt-get", "update"],
+        "dnf": ["dnf", "makecache"],
+        "yum": ["yum", "makecache"],
+        "zypper": ["zypper", "refresh"],
+        "apk": ["apk", "update"]
+    }
+
+    INDEX_PATHS = INDEX_PATHS
+
+    def _as_root(self, cmd: List[str]) -> List[str]:
+        # Use sudo if not root (simple check, can be improved)
+        if os.geteuid() != 0 and not self.simulation_mode:
+            # We assume passwordless sudo or a privileged process
+            return ["sudo"] + cmd
+        return cmd
+
+    def package_index_age(self) -> Optional[float]:
+        """Seconds since the package metadata was last refreshed, None if unknown."""
+        return index_age(self.INDEX_PATHS.get(self.pkg_mgr), self._index_refreshed)
+
+    def package_index_stale(self) -> bool:
+        age = self.package_index_age()
+        return age is None or age >= self.index_ttl
+
+    def refresh_package_index(self, force: bool = False) -> bool:
+        """
+        Refreshes package metadata unless it is younger than `index_ttl`.
+        Returns False only if a refresh was needed and failed.
+        """
+        cmd = self.REFRESH_COMMANDS.get(self.pkg_mgr)
+        if not cmd:
+            return True
+        if not force and not self.package_index_stale():
+            logger.debug(f"Package index is {self.package_index_age():.0f}s old; skipping refresh.")
+            return True
+        logger.info(f"Refreshing {self.pkg_mgr} package index...")
+        result = self.run_command(self._as_root(list(cmd)), timeout=300)
+        if result.return_code == 0:
+            self._index_refreshed = time.time()
+            return True
+        logger.error(f"Package index refresh failed: {result.stderr.strip()}")
+        return False
+
+    def install_packages(self, packages: Sequence[str]) -> bool:
         """
+        Installs several packages with a single package manager transaction,
+        refreshing the package index first if it is older than `index_ttl`.
+
+        Package managers without a separate refresh (pacman) install from the
+        index they have. They are never upgraded here: a full upgrade can
+        outlast the install timeout, and killing it mid-transaction leaves the
+        package database locked or half-applied. If such an install fails
+        while the index is stale, the error asks for a manual upgrade.
+        """
+        packages = list(dict.fromkeys(p for p in packages if p))
+        if not packages:
+            return True
         if not self.pkg_mgr:
-            logger.error("Cannot install package: No package manager detected.")
+            logger.error("Cannot install packages: No package manager detected.")
             return False
-            
-        logger.info(f"Attempting to install package: {package}")
-        
-        cmds = {
-            "apt": ["apt-get", "install", "-y", package],
-            "dnf": ["dnf", "install", "-y", package],
-            "yum": ["yum", "install", "-y", package],
-            "pacman": ["pacman", "-S", "--noconfirm", package],
-            "zypper": ["zypper", "install", "-y", package],
-            "apk": ["apk", "add", package]
-        }
         
-        cmd = cmds.get(self.pkg_mgr)
+        cmd = self.INSTALL_COMMANDS.get(self.pkg_mgr)
         if not cmd:
             logger.error(f"No install command defined for {self.pkg_mgr}")
             return False
-            
-        # Use sudo if not root (simple check, can be improved)
-        if os.geteuid() != 0 and not self.simulation_mode:
-             # In a real scenario, we might need to handle sudo password or assume user has passwordless sudo
-             # For this tool, we assume it's run with sufficient privileges or we prepend sudo
-             cmd.insert(0, "sudo")
+        
+        logger.info(f"Attempting to install packages: {', '.join(packages)}")
+        self.refresh_package_index()
+        result = self.run_command(self._as_root(cmd + packages), timeout=300 + 60 * len(packages))
+        if result.return_code != 0:
+            logger.error(f"Failed to install {', '.join(packages)}: {result.stderr.strip()}")
+            upgrade = self.UPGRADE_COMMANDS.get(self.pkg_mgr)
+            if upgrade and self.package_index_stale():
+                logger.error(f"The {self.pkg_mgr} package index is stale, run `{upgrade}` and try again.")
+        # The install may have added binaries that were cached as missing
+        self.tools.invalidate()
+        return result.return_code == 0
 
-        result = self.run_command(cmd, timeout=300)
-        return result.returncode == 0
+    def install_package(self, package: str) -> bool:
+        """
+        Installs a package using the detected package manager.
+        """
+        return self.install_packages([package])
 
     def backup_file(self, path: str) -> bool:
         """
@@ -258,21 +641,37 @@ class SystemDetector:
             logger.error(f"Backup failed for {path}: {e}")
             return False
 
+    def systemctl_output(self, command: List[str]) -> Optional[str]:
+        """stdout of a systemctl command, or None if systemctl is missing or failed."""
+        if not self.validate_command("systemctl"):
+            return None
+        res = self.run_command(command)
+        return res.stdout if res.return_code == 0 else None
+
+    def service_states(self, service_names: List[str]) -> Dict[str, str]:
+        """
+        Active state of several services with a single `systemctl show`,
+        keyed by the given names.
+        """
+        if self.simulation_mode:
+            return dict.fromkeys(service_names, "active")
+
+        states = query_services(service_names, self.systemctl_output)
+        if states is not None:
+            return {name: states[unit_name(name)].active_state if unit_name(name) in states else "unknown"
+                    for name in service_names}
+
+        # Fallback to service command (no systemd)
+        if self.validate_command("service"):
+            return {name: "active" if self.run_command(["service", name, "status"]).return_code == 0 else "inactive"
+                    for name in service_names}
+
+        return dict.fromkeys(service_names, "unknown")
+
     def check_service_status(self, service_name: str) -> str:
         """
         Checks the status of a system service.
         """
         if self.simulation_mode:
             return "active (running)"
-            
-        # Try systemctl first
-        if self.validate_command("systemctl"):
-            res = self.run_command(["systemctl", "is-active", service_name])
-            return res.stdout.strip()
-        
-        # Fallback to service command
-        if self.validate_command("service"):
-            res = self.run_command(["service", service_name, "status"])
-            return "active" if res.returncode == 0 else "inactive"
-            
-        return "unknown"
+        return self.service_states([service_name])[service_name]
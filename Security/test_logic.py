@@ -1,13 +1,44 @@
 import unittest
+import copy
 import sys
 import os
+import time
+import threading
+import tempfile
+import socketserver
+import struct
+import subprocess
 from unittest.mock import MagicMock, patch
 
 # Ensure we can import our modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from system_detector import SystemDetector, CommandResult
-from security_dashboard import ConfigManager, Scanner, Hardener
+from security_core import ConfigManager, Scanner, Hardener
+from console_history import ConsoleHistory
+from scan_orchestrator import ScanOrchestrator
+from clamav_index import ScanIndex, parse_db_version
+from clamd_client import ClamdClient, ClamdTimeout, parse_reply
+from lynis_report import LynisCache, parse_report
+from tool_registry import ToolRegistry
+from install_planner import InstallPlanner, package_for
+import host_facts
+from startup_profile import parse_importtime
+from agent_daemon import AgentClient, AgentDaemon, AgentError, metrics_sampler
+from job_scheduler import JobScheduler, PRIORITY_HIGH, PRIORITY_LOW
+from process_watch import ProcessWatch
+from command_stats import CommandStats, operation
+from report_pipeline import ReportPipeline, Section
+import proc_collectors
+from process_table import ProcessTable
+from port_inventory import PortInventory
+from service_watcher import ServiceWatcher, parse_show
+
+def scratch_config():
+    """Default config that tests may modify without leaking into DEFAULT_CONFIG."""
+    config = ConfigManager("non_existent.yaml")
+    config.config = copy.deepcopy(config.config)
+    return config
 
 class TestSystemDetector(unittest.TestCase):
     def setUp(self):
@@ -25,6 +56,95 @@ class TestSystemDetector(unittest.TestCase):
         self.assertEqual(result.return_code, 0)
         self.assertIn("[SIM]", result.stdout)
 
+    def test_run_many_simulation_preserves_order(self):
+        results = self.detector.run_many([["echo", "a"], ["echo", "b"]])
+        self.assertEqual([r.command for r in results], ["echo a", "echo b"])
+        self.assertTrue(all(r.return_code == 0 for r in results))
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "Requires real command execution")
+class TestAsyncExecution(unittest.TestCase):
+    def setUp(self):
+        self.detector = SystemDetector(max_parallel=2, facts_cache=None, stats_path=None)
+
+    def test_run_command_async(self):
+        import asyncio
+        result = asyncio.run(self.detector.run_command_async(["echo", "hello"]))
+        self.assertEqual(result.return_code, 0)
+        self.assertEqual(result.stdout.strip(), "hello")
+
+    def test_run_many_timeout(self):
+        results = self.detector.run_many([["sleep", "5"], ["echo", "ok"]], timeout=0.5)
+        self.assertEqual(results[0].return_code, -1)
+        self.assertEqual(results[0].stderr, "Command timed out")
+        self.assertEqual(results[1].stdout.strip(), "ok")
+
+    def test_run_many_bounded_parallelism(self):
+        start = time.monotonic()
+        results = self.detector.run_many([["sleep", "0.3"]] * 4)
+        elapsed = time.monotonic() - start
+        self.assertTrue(all(r.return_code == 0 for r in results))
+        # Four 0.3s sleeps with two slots need two rounds
+        self.assertGreaterEqual(elapsed, 0.55)
+        self.assertLess(elapsed, 1.1)
+
+    def test_stream_command_yields_lines(self):
+        stream = self.detector.stream_command(["sh", "-c", "echo one; echo two; echo three"], max_lines=2)
+        self.assertEqual(list(stream), ["one", "two", "three"])
+        self.assertEqual(stream.result.return_code, 0)
+        # Only the retained tail is kept in the final result
+        self.assertEqual(stream.result.stdout, "two\nthree\n")
+
+    def test_run_command_reports_rusage(self):
+        result = self.detector.run_command([sys.executable, "-c", "sum(range(3 * 10**6))"])
+        self.assertEqual(result.return_code, 0)
+        self.assertGreater(result.cpu_user + result.cpu_system, 0)
+        self.assertGreater(result.max_rss_kb, 0)
+
+    def test_commands_recorded_per_operation(self):
+        with operation("check.io"):
+            result = self.detector.run_command(["head", "-c", "4096", "/dev/zero"])
+            stream = self.detector.stream_command(["sh", "-c", "echo one; echo two"], max_lines=1)
+            list(stream)
+        self.assertEqual(result.output_bytes, 4096)
+        self.assertGreaterEqual(result.io_write_bytes, 4096)
+        self.assertEqual(stream.result.output_bytes, 8)  # Counts lines that were not retained
+        stats = self.detector.stats.get("check.io")
+        self.assertEqual(stats.commands, 2)
+        self.assertEqual(stats.output_bytes, 4104)
+        self.assertIn("check.io", self.detector.stats.render())
+        # Outside any operation, commands are filed under their program
+        self.detector.run_command(["true"])
+        self.assertEqual(self.detector.stats.get("true").commands, 1)
+
+    def test_output_bytes_from_both_streams(self):
+        # Each stream is counted by its own reader thread
+        script = ("import sys\n"
+                  "for i in range(20000):\n"
+                  "    sys.stdout.write('o' * 99 + '\\n'); sys.stderr.write('e' * 49 + '\\n')\n")
+        stream = self.detector.stream_command([sys.executable, "-c", script], max_lines=10)
+        self.assertEqual(sum(1 for _ in stream), 20000)
+        self.assertEqual(stream.result.return_code, 0)
+        self.assertEqual(stream.result.output_bytes, 20000 * (100 + 50))
+
+    def test_timeout_escalates_to_sigkill_for_whole_group(self):
+        # Both the shell and its child ignore SIGTERM
+        process = subprocess.Popen(["sh", "-c", "trap '' TERM; sleep 30 & wait"],
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, start_new_session=True)
+        watch = ProcessWatch(process, timeout=0.2, grace=0.3)
+        start = time.monotonic()
+        watch.communicate()
+        self.assertTrue(watch.timed_out)
+        self.assertEqual(process.returncode, -9)
+        self.assertLess(time.monotonic() - start, 3)
+        self.assertIsNotNone(watch.rusage)
+
+    def test_stream_command_timeout(self):
+        seen = []
+        result = self.detector.run_command_streaming(["sh", "-c", "echo start; exec sleep 5"], seen.append, timeout=0.5)
+        self.assertEqual(seen, ["start"])
+        self.assertEqual(result.return_code, -1)
+        self.assertEqual(result.stderr, "Command timed out")
+
 class TestConfigManager(unittest.TestCase):
     def setUp(self):
         # Create a dummy config file
@@ -53,9 +173,898 @@ class TestSecurityModules(unittest.TestCase):
         result = self.scanner.run_lynis()
         self.assertIn("[SIM]", result)
 
+    def test_scanner_lynis_streaming(self):
+        lines = []
+        result = self.scanner.run_lynis(progress_callback=lines.append)
+        self.assertEqual(len(lines), 1)
+        self.assertIn("[SIM]", lines[0])
+        self.assertEqual(result, "Lynis audit completed.")
+
     def test_hardener_ssh(self):
         result = self.hardener.harden_ssh()
         self.assertIn("SSH Hardened Successfully", result)
 
+class TestScanOrchestrator(unittest.TestCase):
+    def setUp(self):
+        self.detector = SystemDetector(simulation_mode=True)
+        self.scanner = Scanner(self.detector, ConfigManager("non_existent.yaml"))
+        self.orchestrator = ScanOrchestrator(self.scanner, {"cpu": 4, "io": 4, "net": 4})
+
+    def test_full_suite_runs_concurrently(self):
+        lines = []
+        start = time.monotonic()
+        report = self.orchestrator.run(progress_callback=lines.append)
+        elapsed = time.monotonic() - start
+        self.assertEqual([s.name for s in report.scans], ["lynis", "clamav", "rkhunter", "nmap"])
+        self.assertEqual(report.failed, [])
+        self.assertTrue(all(s.lines == 1 for s in report.scans))
+        self.assertTrue(any(line.startswith("[nmap] [SIM]") for line in lines))
+        # Each simulated scan streams instantly; no serialisation through a single thread
+        self.assertLess(elapsed, 1.0)
+
+    def test_budget_serialises_same_resource(self):
+        def slow_scan(progress_callback=None):
+            time.sleep(0.2)
+            return "ok"
+        self.scanner.run_clamav = slow_scan
+        self.scanner.run_rkhunter = slow_scan
+        orchestrator = ScanOrchestrator(self.scanner, {"io": 1})
+        start = time.monotonic()
+        report = orchestrator.run(["clamav", "rkhunter"])
+        self.assertGreaterEqual(time.monotonic() - start, 0.4)
+        self.assertIn("[clamav] DONE", report.render())
+
+    def test_failed_install_skips_scanner(self):
+        self.detector.validate_command = lambda cmd: cmd != "nmap"
+        self.detector.install_packages = MagicMock(return_value=False)
+        self.detector.install_package = MagicMock(return_value=False)
+        report = self.orchestrator.run(["lynis", "nmap"])
+        self.detector.install_packages.assert_called_once_with(["nmap"])
+        # The scanner doesn't retry the install on its own
+        self.detector.install_package.assert_not_called()
+        self.assertEqual(report.failed, ["nmap"])
+        self.assertIn("could not be installed", report.scans[1].result)
+        self.assertEqual(report.scans[0].state, "done")
+
+    def test_unknown_scanner_rejected(self):
+        with self.assertRaises(ValueError):
+            self.orchestrator.run(["bogus"])
+
+class TestClamavIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "scan")
+        os.makedirs(os.path.join(self.root, "sub"))
+        self.files = [os.path.join(self.root, "a.txt"), os.path.join(self.root, "sub", "b.txt")]
+        for path in self.files:
+            with open(path, "w") as f:
+                f.write("data")
+        self.index_path = os.path.join(self.tmp.name, "index.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parse_db_version(self):
+        self.assertEqual(parse_db_version("ClamAV 0.103.8/26980/Mon Jul 24 07:51:04 2023\n"), "ClamAV 0.103.8/26980")
+
+    def test_only_changed_files_rescanned(self):
+        index = ScanIndex(self.index_path)
+        changed, complete = index.changed_files(self.root, "db1")
+        self.assertTrue(complete)
+        self.assertEqual(sorted(changed), sorted(self.files))
+        index.commit("db1", changed)
+        index.save()
+
+        index = ScanIndex(self.index_path)
+        self.assertEqual(index.changed_files(self.root, "db1")[0], [])
+
+        with open(self.files[1], "a") as f:
+            f.write("more")
+        self.assertEqual(index.changed_files(self.root, "db1")[0], [self.files[1]])
+
+        # New signatures invalidate everything
+        self.assertEqual(len(index.changed_files(self.root, "db2")[0]), 2)
+
+    def test_infected_files_not_recorded(self):
+        index = ScanIndex(self.index_path)
+        changed, _ = index.changed_files(self.root, "db1")
+        index.commit("db1", [p for p in changed if p != self.files[0]])
+        self.assertEqual(index.changed_files(self.root, "db1")[0], [self.files[0]])
+
+    def test_incremental_scanner_uses_file_list(self):
+        detector = SystemDetector(facts_cache=None, stats_path=None)
+        config = scratch_config()
+        config.config["paths"]["clamav_scan"] = self.root
+        config.config["paths"]["clamav_index"] = self.index_path
+        config.config["clamav"]["use_clamd"] = False
+        detector.validate_command = MagicMock(return_value=True)
+        detector.run_command = MagicMock(return_value=CommandResult(0, "ClamAV 1.0.0/27000/x", "", "clamscan --version", 0.1))
+        detector.run_command_streaming = MagicMock(return_value=CommandResult(0, "", "", "clamscan", 0.1))
+        scanner = Scanner(detector, config)
+
+        self.assertEqual(scanner.run_clamav(), "Scanned 2 new or modified files. No malware found.")
+        command = detector.run_command_streaming.call_args[0][0]
+        self.assertTrue(command[-1].startswith("--file-list="))
+        self.assertIn("No new or modified files", scanner.run_clamav())
+        self.assertEqual(detector.run_command_streaming.call_count, 1)
+
+class FakeClamdHandler(socketserver.StreamRequestHandler):
+    """Stand-in clamd speaking the z-prefixed IDSESSION protocol; flags files containing EICAR."""
+
+    def read_command(self):
+        data = b""
+        while not data.endswith(b"\0"):
+            byte = self.rfile.read(1)
+            if not byte:
+                return None
+            data += byte
+        return data[1:-1].decode()
+
+    def verdict(self, name, data):
+        return f"{name}: Eicar-Test-Signature FOUND" if b"EICAR" in data else f"{name}: OK"
+
+    def handle(self):
+        self.server.connections += 1
+        request_id = 0
+        while True:
+            command = self.read_command()
+            if command in (None, "END"):
+                return
+            if command == "IDSESSION":
+                continue
+            if command.startswith("MULTISCAN "):
+                if self.server.stall.is_set():
+                    self.server.release.wait(5)
+                    return
+                root = command.split(" ", 1)[1]
+                for dirpath, _, names in os.walk(root):
+                    for name in names:
+                        path = os.path.join(dirpath, name)
+                        with open(path, "rb") as f:
+                            self.wfile.write(self.verdict(path, f.read()).encode() + b"\0")
+                return
+            request_id += 1
+            if command == "PING":
+                reply = "PONG"
+            elif command == "VERSION":
+                reply = "ClamAV 1.0.0/27000/Tue Oct 13 08:00:00 2026"
+            elif command == "INSTREAM":
+                data = b""
+                while True:
+                    (size,) = struct.unpack("!L", self.rfile.read(4))
+                    if not size:
+                        break
+                    data += self.rfile.read(size)
+                reply = self.verdict("stream", data)
+            else:
+                reply = "UNKNOWN COMMAND"
+            self.wfile.write(f"{request_id}: {reply}\0".encode())
+
+class TestClamdClient(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp.name, "clamd.sock")
+        self.server = socketserver.ThreadingUnixStreamServer(self.socket_path, FakeClamdHandler)
+        self.server.daemon_threads = True
+        self.server.connections = 0
+        self.server.stall, self.server.release = threading.Event(), threading.Event()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = ClamdClient(self.socket_path, pool_size=2, timeout=5)
+
+        self.root = os.path.join(self.tmp.name, "scan")
+        os.makedirs(self.root)
+        self.clean = os.path.join(self.root, "clean.txt")
+        self.infected = os.path.join(self.root, "eicar.com")
+        for path, data in ((self.clean, "hello"), (self.infected, "X5O!P%@AP EICAR")):
+            with open(path, "w") as f:
+                f.write(data)
+
+    def tearDown(self):
+        self.server.release.set()
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def test_parse_reply(self):
+        self.assertEqual(parse_reply("/a: b: Sig FOUND"), ("/a: b", "Sig", None))
+        self.assertEqual(parse_reply("/a: Access denied. ERROR"), ("/a", None, "Access denied."))
+
+    def test_connections_are_pooled(self):
+        self.assertTrue(self.client.ping())
+        self.assertTrue(self.client.version().startswith("ClamAV 1.0.0/27000"))
+        self.assertIsNone(self.client.scan_file(self.clean))
+        self.assertEqual(self.server.connections, 1)
+
+        infected, errors = self.client.scan_files([self.clean, self.infected] * 5)
+        self.assertEqual(infected, {self.infected: "Eicar-Test-Signature"})
+        self.assertEqual(errors, {})
+        self.assertLessEqual(self.server.connections, 2)
+
+    def test_multiscan(self):
+        results = []
+        infected, errors = self.client.multiscan(self.root, lambda *r: results.append(r))
+        self.assertEqual(infected, {self.infected: "Eicar-Test-Signature"})
+        self.assertEqual(results, [(self.infected, "Eicar-Test-Signature", None)])
+
+    def test_multiscan_times_out(self):
+        self.server.stall.set()
+        client = ClamdClient(self.socket_path, timeout=0.2)
+        started = time.monotonic()
+        with self.assertRaises(ClamdTimeout):
+            client.multiscan(self.root)
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_scanner_prefers_clamd(self):
+        config = scratch_config()
+        config.config["paths"]["clamav_scan"] = self.root
+        config.config["paths"]["clamav_index"] = os.path.join(self.tmp.name, "index.json")
+        config.config["clamav"]["clamd_socket"] = self.socket_path
+        detector = SystemDetector(facts_cache=None, stats_path=None)
+        detector.run_command = MagicMock(side_effect=AssertionError("clamscan must not be spawned"))
+        scanner = Scanner(detector, config)
+
+        self.assertIn("eicar.com: Eicar-Test-Signature FOUND", scanner.run_clamav())
+        os.unlink(self.infected)
+        self.assertIn("No new or modified files", scanner.run_clamav())
+
+    def test_missing_daemon_falls_back(self):
+        config = scratch_config()
+        config.config["clamav"]["clamd_socket"] = os.path.join(self.tmp.name, "missing.sock")
+        self.assertIsNone(Scanner(SystemDetector(facts_cache=None, stats_path=None), config)._clamd())
+
+LYNIS_REPORT = """# Lynis Report
+report_version_major=1
+lynis_version=3.0.8
+hostname=web01
+os_name=Ubuntu
+lynis_tests_done=254
+hardening_index=67
+warning[]=SSH-7408|Root login permitted|PermitRootLogin=yes|-|
+suggestion[]=AUTH-9230|Configure password hashing rounds|-|-|
+suggestion[]=KRNL-6000|One or more sysctl values differ from the scan profile|kernel.kptr_restrict (exp: 2)|-|
+report_datetime_end=2026-10-17 10:00:00
+"""
+
+class TestLynisReport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.watched = os.path.join(self.tmp.name, "sshd_config")
+        with open(self.watched, "w") as f:
+            f.write("PermitRootLogin yes\n")
+        self.cache = LynisCache(os.path.join(self.tmp.name, "lynis.json"), ttl=60, fingerprint_paths=[self.watched])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parse_report(self):
+        report = parse_report(LYNIS_REPORT)
+        self.assertEqual(report.hardening_index, 67)
+        self.assertEqual(report.tests_performed, 254)
+        self.assertEqual(report.vulnerability_count, 1)
+        self.assertEqual(report.warnings[0].test_id, "SSH-7408")
+        self.assertEqual(report.warnings[0].details, "PermitRootLogin=yes")
+        self.assertEqual(report.suggestions[0].details, "")
+        self.assertIn("Hardening index: 67", report.render())
+
+    def test_cache_invalidated_by_host_change(self):
+        self.assertIsNone(self.cache.get())
+        self.cache.put(parse_report(LYNIS_REPORT))
+        self.assertEqual(self.cache.get(), parse_report(LYNIS_REPORT))
+
+        with open(self.watched, "w") as f:
+            f.write("PermitRootLogin no\n")
+        self.assertIsNone(self.cache.get())
+
+    def test_cache_expires(self):
+        self.cache.put(parse_report(LYNIS_REPORT))
+        self.cache.ttl = -1
+        self.assertIsNone(self.cache.get())
+
+    def test_scanner_reuses_cached_audit(self):
+        report_path = os.path.join(self.tmp.name, "lynis-report.dat")
+        with open(report_path, "w") as f:
+            f.write(LYNIS_REPORT)
+        config = scratch_config()
+        config.config["paths"]["lynis_report"] = report_path
+        config.config["paths"]["lynis_cache"] = self.cache.path
+        detector = SystemDetector(facts_cache=None, stats_path=None)
+        detector.validate_command = MagicMock(return_value=True)
+        detector.run_command = MagicMock(return_value=CommandResult(0, "raw output", "", "lynis audit system", 0.1))
+        scanner = Scanner(detector, config)
+
+        self.assertIn("[SSH-7408] Root login permitted", scanner.run_lynis())
+        self.assertEqual(scanner.lynis_report().hardening_index, 67)
+        self.assertIn("Warnings: 1", scanner.lynis_findings())
+        self.assertEqual(detector.run_command.call_count, 1)
+
+    def test_root_only_report_read_through_sudo(self):
+        config = scratch_config()
+        config.config["paths"]["lynis_report"] = os.path.join(self.tmp.name, "root-only.dat")
+        config.config["paths"]["lynis_cache"] = self.cache.path
+        detector = SystemDetector(facts_cache=None, stats_path=None)
+        detector.validate_command = MagicMock(return_value=True)
+        detector.run_command = MagicMock(side_effect=lambda command, **kwargs: CommandResult(
+            0, LYNIS_REPORT if command[:2] == ["sudo", "-n"] else "raw output", "", " ".join(command), 0.1))
+
+        scanner = Scanner(detector, config)
+        self.assertIn("[SSH-7408] Root login permitted", scanner.run_lynis())
+        self.assertEqual(detector.run_command.call_args[0][0][:3], ["sudo", "-n", "cat"])
+        # Cached, so the findings don't rerun the audit
+        self.assertIn("Warnings: 1", scanner.lynis_findings())
+        self.assertEqual(detector.run_command.call_count, 2)
+
+class TestToolRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bin_a = os.path.join(self.tmp.name, "a")
+        self.bin_b = os.path.join(self.tmp.name, "b")
+        os.makedirs(self.bin_a)
+        os.makedirs(self.bin_b)
+        self.make_tool(self.bin_b, "scanme")
+        self.registry = ToolRegistry(["scanme", "other"])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_tool(self, directory, name):
+        path = os.path.join(directory, name)
+        with open(path, "w") as f:
+            f.write("#!/bin/sh\n")
+        os.chmod(path, 0o755)
+        return path
+
+    def test_resolve_many_and_cache(self):
+        with patch.dict(os.environ, {"PATH": os.pathsep.join([self.bin_a, self.bin_b])}):
+            self.assertEqual(self.registry.warm(), {"scanme": os.path.join(self.bin_b, "scanme"), "other": None})
+            # Cached: a tool installed later stays unknown until invalidated
+            self.make_tool(self.bin_a, "other")
+            self.assertIsNone(self.registry.resolve("other"))
+            self.registry.invalidate()
+            self.assertEqual(self.registry.resolve("other"), os.path.join(self.bin_a, "other"))
+
+    def test_path_change_invalidates(self):
+        with patch.dict(os.environ, {"PATH": self.bin_a}):
+            self.assertIsNone(self.registry.resolve("scanme"))
+        with patch.dict(os.environ, {"PATH": self.bin_b}):
+            self.assertEqual(self.registry.resolve("scanme"), os.path.join(self.bin_b, "scanme"))
+
+    def test_non_executable_ignored(self):
+        path = self.make_tool(self.bin_a, "scanme")
+        os.chmod(path, 0o644)
+        with patch.dict(os.environ, {"PATH": os.pathsep.join([self.bin_a, self.bin_b])}):
+            self.assertEqual(self.registry.resolve("scanme"), os.path.join(self.bin_b, "scanme"))
+
+class TestInstallPlanner(unittest.TestCase):
+    def setUp(self):
+        self.detector = SystemDetector(facts_cache=None, stats_path=None)
+        self.detector.pkg_mgr = "apt"
+        self.detector.INDEX_PATHS = {}  # ignore the host's real apt lists
+        self.detector.run_command = MagicMock(return_value=CommandResult(0, "", "", "apt-get", 0.1))
+        self.detector.tools.resolve_many = MagicMock(side_effect=lambda tools: {t: None for t in tools})
+        config = ConfigManager("non_existent.yaml")
+        self.planner = InstallPlanner(self.detector, [Scanner(self.detector, config), Hardener(self.detector, config)])
+
+    def commands(self):
+        return [call[0][0] for call in self.detector.run_command.call_args_list]
+
+    def test_single_batched_install(self):
+        results = self.planner.install()
+        self.assertEqual(set(results), {"lynis", "clamscan", "rkhunter", "nmap", "ufw"})
+        commands = self.commands()
+        self.assertEqual(len(commands), 2)
+        self.assertEqual(commands[0][-2:], ["apt-get", "update"])
+        self.assertEqual(commands[1][-5:], ["lynis", "clamav", "rkhunter", "nmap", "ufw"])
+
+    def test_index_refreshed_once_per_ttl(self):
+        self.assertTrue(self.detector.install_package("lynis"))
+        self.assertTrue(self.detector.install_package("nmap"))
+        refreshes = [c for c in self.commands() if c[-1] == "update"]
+        self.assertEqual(len(refreshes), 1)
+
+    def test_pacman_installs_without_upgrading(self):
+        self.detector.pkg_mgr = "pacman"
+        self.assertTrue(self.detector.install_packages(["lynis", "nmap"]))
+        commands = self.commands()
+        # Neither a separate -Sy nor a full -Syu; just the install
+        self.assertEqual(len(commands), 1)
+        self.assertEqual(commands[0][-6:], ["pacman", "-S", "--noconfirm", "--needed", "lynis", "nmap"])
+
+        self.detector.run_command.return_value = CommandResult(1, "", "error: target not found: rkhunter", "pacman", 0.1)
+        with self.assertLogs("SystemDetector", "ERROR") as logs:
+            self.assertFalse(self.detector.install_package("rkhunter"))
+        self.assertIn("package index is stale, run `pacman -Syu`", logs.output[-1])
+
+    def test_package_names(self):
+        self.assertEqual(package_for("clamscan"), "clamav")
+        self.assertEqual(package_for("freshclam", "dnf"), "clamav-update")
+        self.assertEqual(package_for("nmap", "pacman"), "nmap")
+
+class TestHostFacts(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.os_release = os.path.join(self.tmp.name, "os-release")
+        with open(self.os_release, "w") as f:
+            f.write('NAME="Ubuntu"\nID=ubuntu\n')
+        self.cache = os.path.join(self.tmp.name, "facts.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def load(self):
+        return host_facts.load_host_facts(self.cache, tools=["sh"], os_release=self.os_release)
+
+    def test_cached_until_host_changes(self):
+        facts = self.load()
+        if sys.platform.startswith("linux"):
+            self.assertEqual(facts.distro, "ubuntu")
+        self.assertIsNotNone(facts.tool_paths["sh"])
+        with patch.object(host_facts, "detect", side_effect=AssertionError("cache not used")):
+            self.assertEqual(self.load(), facts)
+
+        # A changed os-release invalidates the cache
+        stat = os.stat(self.os_release)
+        os.utime(self.os_release, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        with patch.object(host_facts, "detect", wraps=host_facts.detect) as detect:
+            self.load()
+            detect.assert_called_once()
+
+    def test_corrupt_cache_redetected(self):
+        with open(self.cache, "w") as f:
+            f.write("{not json")
+        self.assertIsNotNone(self.load().tool_paths["sh"])
+
+class TestStartup(unittest.TestCase):
+    def test_cli_never_imports_tk(self):
+        code = ("import sys, security_cli; security_cli.main(['--simulate', '--startup-only']); "
+                "print('tkinter' in sys.modules)")
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertEqual(proc.stdout.strip(), "False")
+
+    def test_parse_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     _io\n"
+            "import time:       800 |       2300 |   logging\n"
+            "import time:      1500 |       5000 | security_core\n"
+            "unrelated line\n"
+        )
+        timings = parse_importtime(stderr)
+        self.assertEqual([(t.module, t.depth) for t in timings],
+                         [("_io", 2), ("logging", 1), ("security_core", 0)])
+        self.assertEqual(timings[-1].cumulative_us, 5000)
+
+class TestJobScheduler(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.scheduler = JobScheduler(max_workers=2, reserved_high=1)
+
+    def tearDown(self):
+        self.release.set()
+        self.scheduler.shutdown()
+
+    def test_quick_checks_bypass_long_scans(self):
+        order = []
+        scan = self.scheduler.submit(lambda: self.release.wait(5), "scan", PRIORITY_LOW)
+        queued_scan = self.scheduler.submit(lambda: order.append("scan2"), "scan2", PRIORITY_LOW)
+        check = self.scheduler.submit(lambda: order.append("check") or "ok", "check", PRIORITY_HIGH)
+        self.assertTrue(check.wait(2))
+        self.assertEqual((check.state, check.result), ("done", "ok"))
+        # The second scan waits for a non-reserved worker
+        self.assertEqual(queued_scan.state, "queued")
+        self.release.set()
+        self.assertTrue(queued_scan.wait(2))
+        self.assertEqual(order, ["check", "scan2"])
+        self.assertEqual(scan.state, "done")
+
+    def test_identical_jobs_are_deduplicated(self):
+        first = self.scheduler.submit(lambda: self.release.wait(5), "scan", PRIORITY_LOW)
+        self.assertIs(self.scheduler.submit(lambda: None, "scan", PRIORITY_LOW), first)
+        self.release.set()
+        first.wait(2)
+        self.assertIsNot(self.scheduler.submit(lambda: None, "scan", PRIORITY_LOW), first)
+
+    def test_cancel_queued_and_failed_jobs(self):
+        blocker = self.scheduler.submit(lambda: self.release.wait(5), "scan", PRIORITY_LOW)
+        queued = self.scheduler.submit(lambda: None, "scan2", PRIORITY_LOW)
+        self.assertTrue(self.scheduler.cancel(queued.id))
+        self.assertEqual(queued.state, "cancelled")
+        self.assertFalse(self.scheduler.cancel(queued.id))
+        failing = self.scheduler.submit(lambda: 1 / 0, "broken", PRIORITY_HIGH)
+        failing.wait(2)
+        self.assertEqual(failing.state, "failed")
+        self.assertIn("division", failing.error)
+        self.release.set()
+        self.assertTrue(blocker.wait(2))
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "Requires real command execution")
+    def test_cancel_kills_process_group(self):
+        detector = SystemDetector(facts_cache=None, stats_path=None)
+        with tempfile.TemporaryDirectory() as tmp:
+            pid_file = os.path.join(tmp, "grandchild.pid")
+            # The shell's background child would survive a kill of the shell alone
+            command = ["sh", "-c", f"sleep 30 & echo $! > {pid_file}; wait"]
+            job = self.scheduler.submit(lambda: detector.run_command(command, timeout=30), "sleepy", PRIORITY_LOW)
+            deadline = time.monotonic() + 5
+            while not os.path.exists(pid_file) and time.monotonic() < deadline:
+                time.sleep(0.02)
+            with open(pid_file) as f:
+                grandchild = int(f.read())
+            self.scheduler.cancel(job.id)
+            self.assertTrue(job.wait(5))
+        self.assertEqual(job.state, "cancelled")
+        self.assertEqual(job.result.stderr, "Command cancelled")
+        time.sleep(0.1)
+        # Gone, or a zombie waiting for init to reap it
+        try:
+            with open(f"/proc/{grandchild}/stat") as f:
+                self.assertEqual(f.read().rsplit(")", 1)[1].split()[0], "Z")
+        except FileNotFoundError:
+            pass
+
+class TestAgentDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp.name, "agent.sock")
+        self.release = threading.Event()
+        self.samples = iter(range(1000))
+
+        def slow_scan(progress_callback=None):
+            progress_callback("scanning")
+            self.release.wait(5)
+            progress_callback("finished")
+            return "Scan Completed Successfully."
+
+        jobs = {"scan.slow": slow_scan, "check.fail": lambda progress_callback=None: "Error: nope"}
+        self.agent = AgentDaemon(jobs, self.socket_path, sampler=lambda: {"n": next(self.samples)},
+                                 sample_interval=0.01)
+        self.agent.start()
+        self.client = AgentClient(self.socket_path, timeout=5)
+
+    def tearDown(self):
+        self.release.set()
+        self.agent.stop()
+        self.tmp.cleanup()
+
+    def test_run_streams_output_and_dedupes(self):
+        first = self.agent.runner.submit("scan.slow")
+        self.assertIs(self.agent.runner.submit("scan.slow"), first)
+        events = []
+        threading.Timer(0.1, self.release.set).start()
+        result = self.client.call("run", on_event=lambda e, d: events.append((e, d)), job="scan.slow")
+        self.assertEqual(result["id"], first.id)
+        self.assertEqual(result["state"], "done")
+        self.assertEqual(events, [("line", "scanning"), ("line", "finished")])
+        self.assertEqual(self.client.call("run", job="check.fail")["state"], "failed")
+
+    def test_metrics_shared_by_subscribers(self):
+        samples = []
+        self.client.call("subscribe", on_event=lambda e, d: samples.append(d["n"]), count=3)
+        self.assertEqual(len(samples), 3)
+        self.assertEqual(samples, sorted(set(samples)))
+        self.assertIn("n", self.client.call("metrics"))
+
+    def test_errors_and_socket_handling(self):
+        with self.assertRaises(AgentError):
+            self.client.call("no.such.method")
+        with self.assertRaises(AgentError):
+            self.client.call("run", job="no.such.job")
+        with self.assertRaises(AgentError):
+            self.client.call("stats")  # No detector behind this agent
+        self.assertEqual(os.stat(self.socket_path).st_mode & 0o777, 0o600)
+        with self.assertRaises(RuntimeError):
+            AgentDaemon({}, self.socket_path).start()
+
+    def test_socket_directory_is_private(self):
+        socket_path = os.path.join(self.tmp.name, "private", "agent.sock")
+        agent = AgentDaemon({}, socket_path)
+        agent.start()
+        try:
+            self.assertEqual(os.stat(os.path.dirname(socket_path)).st_mode & 0o777, 0o700)
+            self.assertEqual(os.stat(socket_path).st_mode & 0o777, 0o600)
+        finally:
+            agent.stop()
+
+    def test_proc_sampler(self):
+        proc = os.path.join(self.tmp.name, "proc")
+        os.makedirs(os.path.join(proc, "net"))
+        def write(name, text):
+            with open(os.path.join(proc, name), "w") as f:
+                f.write(text)
+        write("stat", "cpu  100 0 100 700 100 0 0 0\n")
+        write("meminfo", "MemTotal: 1000 kB\nMemAvailable: 250 kB\n")
+        write("net/dev", "h1\nh2\n  eth0: 5000 50 0 0 0 0 0 0 3000 30 0 0 0 0 0 0\n")
+        sample = metrics_sampler(("cpu", "memory", "network"), proc=proc)
+        write("stat", "cpu  150 0 150 1000 100 0 0 0\n")
+        self.assertEqual(sample(), {"cpu_percent": 25.0, "mem_total": 1024000, "mem_used": 768000,
+                                    "mem_percent": 75.0, "net_bytes_sent": 3000, "net_bytes_recv": 5000})
+
+class TestCommandStats(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "stats", "command_stats.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_totals_persist(self):
+        stats = CommandStats(self.path)
+        stats.record(CommandResult(0, "ok", "", "lynis audit system", 2.0, cpu_user=1.5, max_rss_kb=900), "scan.lynis")
+        stats.record(CommandResult(1, "", "err", "lynis audit system", 4.0, cpu_system=0.5, max_rss_kb=600), "scan.lynis")
+        stats.save()
+        loaded = CommandStats(self.path).get("scan.lynis")
+        self.assertEqual((loaded.commands, loaded.failures), (2, 1))
+        self.assertEqual((loaded.wall_time, loaded.max_wall_time), (6.0, 4.0))
+        self.assertEqual((loaded.cpu_time, loaded.max_rss_kb, loaded.output_bytes), (2.0, 900, 5))
+
+    def test_unreadable_file_is_ignored(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        self.assertEqual(CommandStats(self.path).snapshot(), {})
+
+class TestReportPipeline(unittest.TestCase):
+    def test_sections_run_concurrently_in_order(self):
+        release = threading.Event()
+        def slow():
+            release.wait(5)
+            return "late\n"
+        sections = [
+            Section("Slow", slow, timeout=0.3),
+            Section("Fast", lambda: "fast", timeout=2),
+            Section("Broken", lambda: 1 / 0, timeout=2),
+            Section("Timed out", lambda: subprocess.run(["sleep", "5"], timeout=0.1), timeout=2),
+        ]
+        start = time.monotonic()
+        results = ReportPipeline(sections).run()
+        release.set()
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertEqual([r.title for r in results], ["Slow", "Fast", "Broken", "Timed out"])
+        self.assertEqual([r.state for r in results], ["pending", "done", "failed", "timeout"])
+        self.assertEqual(results[1].text, "fast")
+
+    def test_render_numbers_sections(self):
+        text = ReportPipeline([Section("One", lambda: "a\n"), Section("Two", lambda: "b")]).render("Report")
+        self.assertTrue(text.startswith("Report - "))
+        self.assertIn("1. One\na\n", text)
+        self.assertTrue(text.endswith("2. Two\nb\n"))
+
+class TestProcCollectors(unittest.TestCase):
+    TCP = (
+        "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+        "   0: 0100007F:0035 00000000:0000 0A 00000000:00000000 00:00000000 00000000   101        0 1234 1\n"
+        "   1: 0100007F:9C40 0100007F:0016 01 00000000:00000000 00:00000000 00000000  1000        0 5678 1\n"
+    )
+    TCP6 = (
+        "  sl  local_address                         remote_address                        st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+        "   0: 00000000000000000000000001000000:0016 00000000000000000000000000000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 42 1\n"
+    )
+
+    def test_socket_tables(self):
+        tcp = proc_collectors.parse_socket_table(self.TCP, "tcp")
+        self.assertEqual((tcp[0].local_address, tcp[0].local_port, tcp[0].state, tcp[0].uid), ("127.0.0.1", 53, "LISTEN", 101))
+        self.assertEqual((tcp[1].remote_port, tcp[1].state, tcp[1].listening), (22, "ESTABLISHED", False))
+        tcp6 = proc_collectors.parse_socket_table(self.TCP6, "tcp6")
+        self.assertEqual((tcp6[0].local_address, tcp6[0].local_port, tcp6[0].inode), ("::1", 22, 42))
+        listeners = proc_collectors.render_listeners(tcp + tcp6)
+        self.assertIn("127.0.0.1:53", listeners)
+        self.assertIn("[::1]:22", listeners)
+        self.assertNotIn(":40000", listeners)
+
+    def test_parse_stat_with_odd_command_name(self):
+        fields = ["S", "1"] + ["0"] * 9 + ["250", "50"] + ["0"] * 4 + ["3", "0", "1000", "8192", "10"]
+        info = proc_collectors.parse_stat(f"42 (a) b (c)) {' '.join(fields)}\n")
+        self.assertEqual((info.pid, info.name, info.state, info.ppid, info.num_threads), (42, "a) b (c)", "S", 1, 3))
+        self.assertAlmostEqual(info.cpu_time, 300 / proc_collectors.CLK_TCK)
+        self.assertEqual(info.rss, 10 * proc_collectors.PAGE_SIZE)
+
+    def test_passwd(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".passwd", delete=False) as f:
+            f.write("root:x:0:0:root:/root:/bin/bash\n# comment\nbroken\nalice:x:1000:1000::/home/alice:/bin/sh\n")
+        self.addCleanup(os.unlink, f.name)
+        accounts = proc_collectors.read_passwd(f.name)
+        self.assertEqual([(a.name, a.uid, a.shell) for a in accounts], [("root", 0, "/bin/bash"), ("alice", 1000, "/bin/sh")])
+        self.assertEqual(proc_collectors.render_accounts(accounts), "root:0:0\nalice:1000:1000\n")
+
+    @unittest.skipUnless(os.path.exists("/proc/self/stat"), "needs /proc")
+    def test_live_system(self):
+        me = proc_collectors.read_process(os.getpid())
+        self.assertEqual(me.ppid, os.getppid())
+        self.assertGreater(me.rss, 0)
+        self.assertIn(os.getpid(), [p.pid for p in proc_collectors.read_processes(cmdline=False)])
+        self.assertGreater(proc_collectors.read_meminfo()["MemTotal"], 0)
+        self.assertGreater(proc_collectors.read_cpuinfo().logical_cpus, 0)
+        self.assertIn("lo", [i.name for i in proc_collectors.read_interfaces()])
+
+class TestProcessTable(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.proc = self.tmp.name
+        self.now = 0.0
+        with open(os.path.join(self.proc, "uptime"), "w") as f:
+            f.write("1000.0 900.0\n")
+        with open(os.path.join(self.proc, "meminfo"), "w") as f:
+            f.write("MemTotal:       1000 kB\n")
+        self.table = ProcessTable(self.proc, clock=lambda: self.now)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, pid, name, cpu_ticks, rss_pages=1, start_ticks=0, cmdline=None):
+        base = os.path.join(self.proc, str(pid))
+        os.makedirs(base, exist_ok=True)
+        fields = ["S", "1"] + ["0"] * 9 + [str(cpu_ticks), "0"] + ["0"] * 4 + ["1", "0", str(start_ticks), "0", str(rss_pages)]
+        with open(os.path.join(base, "stat"), "w") as f:
+            f.write(f"{pid} ({name}) {' '.join(fields)}\n")
+        if cmdline is not None:
+            with open(os.path.join(base, "cmdline"), "wb") as f:
+                f.write(cmdline)
+
+    def test_cpu_deltas_and_top_n(self):
+        tck = proc_collectors.CLK_TCK
+        self.write(1, "idle", 100 * tck, rss_pages=50, cmdline=b"idle\0--forever\0")
+        self.write(2, "busy", 0, rss_pages=10, cmdline=b"busy\0")
+        self.write(3, "kworker", 0)
+        self.assertEqual(self.table.refresh(), 3)
+        # First sample: lifetime average (100s of CPU over 1000s)
+        self.assertEqual(self.table.top(1)[0].cpu_percent, 10.0)
+
+        self.now = 2.0
+        self.write(2, "busy", 1 * tck, rss_pages=10)
+        self.table.refresh()
+        top = self.table.top(2)
+        self.assertEqual([(r.pid, r.cpu_percent) for r in top], [(2, 50.0), (1, 0.0)])
+        self.assertEqual(top[1].command, "idle --forever")
+        self.assertEqual(self.table.top(1, "mem")[0].pid, 1)
+        self.assertEqual(self.table.top(3)[2].command, "[kworker]")
+
+    def test_static_data_cached_per_process(self):
+        self.write(7, "app", 0, cmdline=b"app\0")
+        self.table.refresh()
+        self.assertEqual(self.table.top(1)[0].command, "app")
+        self.write(7, "app", 0, cmdline=b"changed\0")
+        self.now = 1.0
+        self.table.refresh()
+        self.assertEqual(self.table.top(1)[0].command, "app")
+        # Same pid, new process
+        self.write(7, "other", 0, start_ticks=500, cmdline=b"other\0")
+        self.now = 2.0
+        self.table.refresh()
+        self.assertEqual(self.table.top(1)[0].command, "other")
+        os.remove(os.path.join(self.proc, "7", "stat"))
+        self.now = 3.0
+        self.assertEqual(self.table.refresh(), 0)
+        self.assertEqual(self.table.top(), [])
+
+class TestPortInventory(unittest.TestCase):
+    HEADER = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.proc = os.path.join(self.tmp.name, "proc")
+        self.state = os.path.join(self.tmp.name, "ports.json")
+        os.makedirs(os.path.join(self.proc, "net"))
+        # sshd (pid 10) owns inode 100, a stray server (pid 20) inode 200
+        for pid, name, inode in ((10, "sshd", 100), (20, "nc", 200)):
+            os.makedirs(os.path.join(self.proc, str(pid), "fd"))
+            os.symlink(f"socket:[{inode}]", os.path.join(self.proc, str(pid), "fd", "3"))
+            with open(os.path.join(self.proc, str(pid), "comm"), "w") as f:
+                f.write(name + "\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def sockets(self, *rows):
+        with open(os.path.join(self.proc, "net", "tcp"), "w") as f:
+            f.write(self.HEADER)
+            for i, (address, port, state, inode) in enumerate(rows):
+                f.write(f"   {i}: {address}:{port:04X} 00000000:0000 {state} 00000000:00000000 00:00000000 00000000     0        0 {inode} 1\n")
+
+    def inventory(self):
+        return PortInventory([22], proc=self.proc, state_path=self.state)
+
+    def test_reports_only_changes(self):
+        ssh = ("00000000", 22, "0A", 100)
+        local = ("0100007F", 631, "0A", 300)
+        self.sockets(ssh, local, ("0100007F", 5000, "01", 400))  # An established connection is not a listener
+        inventory = self.inventory()
+        snapshot, changes = inventory.check()
+        self.assertEqual(len(snapshot), 2)
+        self.assertEqual(snapshot.by_pid[10][0].port, 22)
+        self.assertEqual([(c.action, c.listener.port, c.allowed) for c in changes], [("opened", 22, True), ("opened", 631, True)])
+        self.assertEqual(inventory.check()[1], [])
+
+        self.sockets(ssh, local, ("00000000", 4444, "0A", 200))
+        snapshot, changes = inventory.check()
+        self.assertEqual(len(changes), 1)
+        self.assertEqual((changes[0].action, changes[0].allowed), ("opened", False))
+        self.assertEqual((changes[0].listener.pid, changes[0].listener.process), (20, "nc"))
+        self.assertIn("[NOT ALLOWED]", changes[0].render())
+        self.assertEqual([l.port for l in inventory.unauthorized(snapshot)], [4444])
+
+        # A fresh inventory diffs against the persisted snapshot
+        self.sockets(ssh, local)
+        changes = self.inventory().check()[1]
+        self.assertEqual([(c.action, c.listener.port) for c in changes], [("closed", 4444)])
+        self.assertIn("No changes", self.inventory().report())
+
+class TestServiceWatcher(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.blocks = {
+            "sshd.service": "LoadState=loaded\nActiveState=active\nSubState=running\nMainPID=812",
+            "ufw.service": "LoadState=loaded\nActiveState=active\nSubState=exited\nMainPID=0",
+            "fail2ban.service": "LoadState=not-found\nActiveState=inactive\nSubState=dead\nMainPID=0",
+        }
+
+    def run_show(self, command):
+        self.calls.append(command)
+        return "\n\n".join(self.blocks[unit] for unit in command if unit in self.blocks) + "\n"
+
+    def test_one_query_per_poll_and_only_changes(self):
+        watcher = ServiceWatcher(["sshd", "ufw", "fail2ban"], self.run_show)
+        events = watcher.poll()
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.calls[0][:2], ["systemctl", "show"])
+        self.assertEqual([e.current.unit for e in events], ["sshd.service", "ufw.service", "fail2ban.service"])
+        states = watcher.states()
+        self.assertEqual(states["sshd.service"].main_pid, 812)
+        self.assertFalse(states["fail2ban.service"].exists)
+        self.assertEqual(watcher.poll(), [])
+
+        seen = []
+        watcher.subscribe(seen.append)
+        self.blocks["sshd.service"] = "LoadState=loaded\nActiveState=failed\nSubState=failed\nMainPID=0"
+        events = watcher.poll()
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(seen, events)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].render(), "⚠️ sshd.service: active (running), pid 812 -> failed (failed)")
+
+    def test_aliases_match_by_position(self):
+        # An alias reports the Id of the unit it points to; blocks still come back in request order
+        text = "Id=ssh.service\nLoadState=loaded\nActiveState=active\n\nId=ufw.service\nLoadState=loaded\nActiveState=inactive\n"
+        states = parse_show(text, ["sshd.service", "ufw.service"])
+        self.assertTrue(states["sshd.service"].healthy)
+        self.assertFalse(states["ufw.service"].healthy)
+
+    def test_no_systemctl(self):
+        watcher = ServiceWatcher(["sshd"], lambda command: None)
+        self.assertEqual(watcher.poll(), [])
+        self.assertIsNone(watcher.last_poll)
+
+class TestConsoleHistory(unittest.TestCase):
+    def setUp(self):
+        self.history = ConsoleHistory(max_lines=3)
+
+    def tearDown(self):
+        self.history.close()
+
+    def test_recent_window_is_bounded(self):
+        for i in range(10):
+            self.history.append(f"line {i}", "info")
+        self.assertEqual(len(self.history), 10)
+        self.assertEqual(len(self.history._recent), 3)
+        self.assertEqual([t for _, t, _ in self.history.tail(3)], ["line 7", "line 8", "line 9"])
+
+    def test_read_spilled_lines_from_disk(self):
+        for i in range(10):
+            self.history.append(f"line {i}\twith tab", "warning", "[12:00:00]" if i == 2 else "")
+        lines = self.history.read(1, 3)
+        self.assertEqual(lines[0], ("", "line 1\twith tab", "warning"))
+        self.assertEqual(lines[1], ("[12:00:00]", "line 2\twith tab", "warning"))
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(self.history.read(8, 10), self.history.tail(2))
+
+    def test_read_spilled_carriage_returns(self):
+        self.history.append("progress 10%\rprogress 20%", "info")
+        self.history.append("form\x0cfeed\u2028separator", "info")
+        for i in range(5):
+            self.history.append(f"line {i}", "info")
+        self.assertEqual(self.history.read(0, 2), [("", "progress 10%\rprogress 20%", "info"),
+                                                   ("", "form\x0cfeed\u2028separator", "info")])
+
 if __name__ == '__main__':
     unittest.main()
@@ -3,6 +3,7 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, font
 import threading
+import queue
 import subprocess
 import os
 import sys
@@ -11,10 +12,129 @@ import json
 import random
 from datetime import datetime
 import platform
-import shutil
+
+# Shared helpers from the Security package
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Security"))
+from clamav_index import ScanIndex, parse_db_version
+from lynis_report import DEFAULT_REPORT_PATH, LynisCache, load_report, parse_report
+from tool_registry import ToolRegistry
+from host_facts import load_host_facts
+from install_planner import INDEX_PATHS, index_age, missing_packages
+from report_pipeline import ReportPipeline, Section
+import proc_collectors
+from process_table import ProcessTable
+from port_inventory import PortInventory
+from service_watcher import ServiceWatcher, query_services, unit_name
 
 # This script will request sudo privileges for specific commands when needed.
 
+
+class MetricsSampler(threading.Thread):
+    """Collects system metrics on a background thread.
+
+    The Tk event loop only reads the latest snapshot, so slow probes
+    (cpu_percent intervals, df forks) never block the UI.
+    """
+
+    def __init__(self, collect, interval=5.0):
+        super().__init__(name="MetricsSampler", daemon=True)
+        self._collect = collect
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._snapshot = {}
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                snapshot = self._collect()
+            except Exception as e:
+                print(f"Error sampling system metrics: {e}")
+            else:
+                with self._lock:
+                    self._snapshot = snapshot
+            self._stop_event.wait(self.interval)
+
+    def snapshot(self):
+        """Return a copy of the most recent sample (empty until the first one completes)"""
+        with self._lock:
+            return dict(self._snapshot)
+
+    def stop(self):
+        self._stop_event.set()
+
+class OutputSink:
+    """Thread-safe, batched writer for a console Text widget.
+
+    Worker threads call insert()/delete() as they would on the widget
+    itself; the calls are queued and applied on the Tk main thread every
+    FLUSH_INTERVAL_MS, with consecutive chunks merged into a single
+    insert and one scroll per batch.
+    """
+
+    FLUSH_INTERVAL_MS = 33  # ~30 frames per second
+    MAX_BATCH = 5000        # queue items applied per frame
+
+    def __init__(self, widget):
+        self.widget = widget
+        self._queue = queue.Queue()
+
+    def start(self):
+        """Begin flushing on the Tk event loop (call from the main thread)"""
+        self.widget.after(self.FLUSH_INTERVAL_MS, self.flush)
+
+    def insert(self, index, text, *tags):
+        """Queue text for appending; the index is ignored since consoles only append"""
+        self._queue.put((text, tags))
+
+    def write_output(self, line):
+        """Queue a line of command output, classifying it in the calling thread"""
+        lowered = line.lower()
+        if "error" in lowered or "warning" in lowered:
+            self._queue.put((f"! {line}", ("warning",)))
+        else:
+            self._queue.put((line, ()))
+
+    def delete(self, *args):
+        """Queue clearing the console"""
+        self._queue.put((None, ()))
+
+    def see(self, index):
+        """No-op: scrolling happens once per flush"""
+
+    def update_idletasks(self):
+        """No-op: redraws happen once per flush"""
+
+    def flush(self):
+        """Apply queued writes to the widget (runs on the main thread)"""
+        segments = []
+        wrote = False
+        try:
+            for _ in range(self.MAX_BATCH):
+                text, tags = self._queue.get_nowait()
+                if text is None:
+                    segments = []
+                    self.widget.delete(1.0, tk.END)
+                    wrote = True
+                elif segments and segments[-1][1] == tags:
+                    segments[-1][0].append(text)
+                else:
+                    segments.append(([text], tags))
+        except queue.Empty:
+            pass
+        
+        if segments:
+            args = []
+            for chunks, tags in segments:
+                args.extend(("".join(chunks), tags))
+            self.widget.insert(tk.END, *args)
+            wrote = True
+        if wrote:
+            self.widget.see(tk.END)
+        
+        self.widget.after(self.FLUSH_INTERVAL_MS, self.flush)
+
+
 class EnterpriseSecurityDashboard(tk.Tk):
     """Enterprise-grade Security Dashboard with responsive design,
     platform-specific styling, and professional UI components.
@@ -58,6 +178,17 @@ class EnterpriseSecurityDashboard(tk.Tk):
         super().__init__()
         self.title("Enterprise Security Dashboard")
         
+        # Tool paths are detected once and cached between runs; availability checks hit the cache
+        self.host_facts = load_host_facts()
+        self.tools = ToolRegistry()
+        self.tools.seed(self.host_facts.tool_paths)
+        
+        # Incremental /proc scanner behind the process views (keeps CPU times between refreshes)
+        self.process_table = ProcessTable()
+        self.port_inventory = None
+        self.service_watcher = None
+        self.process_watch_generation = 0
+        
         # Set up initial system information and state
         self.initialize_system_info()
         
@@ -622,8 +753,12 @@ class EnterpriseSecurityDashboard(tk.Tk):
         output_console.insert(tk.END, "Results and information will appear in this console.\n\n", "info")
         output_console.insert(tk.END, "Click the '?' button for help and explanations.\n", "info")
         
-        # Store output reference
-        setattr(tab, "output", output_console)
+        # Store output references: workers write through the batched sink,
+        # the widget itself is only touched on the main thread
+        output_sink = OutputSink(output_console)
+        output_sink.start()
+        setattr(tab, "console", output_console)
+        setattr(tab, "output", output_sink)
         
         return tab
         
@@ -636,7 +771,8 @@ class EnterpriseSecurityDashboard(tk.Tk):
                 "• Full Security Scan: Comprehensive security audit using Lynis\n"
                 "• Malware Detection: Scans for viruses and malicious software\n"
                 "• Rootkit Detection: Checks for hidden malicious software\n"
-                "• Network Security Scan: Identifies open ports and potential network vulnerabilities\n\n"
+                "• Network Security Scan: Identifies open ports and potential network vulnerabilities\n"
+                "• Open Ports Check: Lists new and closed listening ports instantly, flagging unexpected ones\n\n"
                 "These scans may take several minutes to complete. Regular security scanning is recommended as part of "
                 "good security practices."
             )
@@ -656,6 +792,8 @@ class EnterpriseSecurityDashboard(tk.Tk):
                 "Available operations:\n\n"
                 "• Network Bandwidth: Monitor network traffic patterns\n"
                 "• System Resources: Check CPU, memory and disk usage\n"
+                "• Live Processes: Watch the busiest processes, refreshed every few seconds\n"
+                "• Critical Services: Check the state of essential services and what changed since the last check\n"
                 "• Security Log Analysis: Analyze system logs for security events\n\n"
                 "Regular monitoring helps detect security incidents and performance issues before they become critical problems."
             )
@@ -680,7 +818,8 @@ class EnterpriseSecurityDashboard(tk.Tk):
             ("Full Security Scan", self.run_lynis),
             ("Malware Detection", self.run_clamav),
             ("Rootkit Detection", self.run_rkhunter),
-            ("Network Security Scan", self.run_nmap)
+            ("Network Security Scan", self.run_nmap),
+            ("Open Ports Check", self.check_open_ports)
         ]
         return self.create_tab_content(actions, "Security Scans")
     
@@ -688,6 +827,7 @@ class EnterpriseSecurityDashboard(tk.Tk):
         """Create the system hardening tab"""
         actions = [
             ("Update System", self.update_system),
+            ("Install Security Tools", self.install_security_tools),
             ("Harden SSH Configuration", self.harden_ssh),
             ("Configure Firewall", self.setup_ufw),
             ("Secure Web Directories", self.secure_web)
@@ -699,6 +839,8 @@ class EnterpriseSecurityDashboard(tk.Tk):
         actions = [
             ("Network Bandwidth", self.monitor_bandwidth),
             ("System Resources", self.check_resources),
+            ("Live Processes", self.watch_processes),
+            ("Critical Services", self.check_critical_services),
             ("Security Log Analysis", self.analyze_logs)
         ]
         return self.create_tab_content(actions, "System Monitoring")
@@ -745,9 +887,16 @@ class EnterpriseSecurityDashboard(tk.Tk):
     
     def start_periodic_tasks(self):
         """Initialize and schedule periodic tasks"""
-        # Start updating system metrics
+        # Sample metrics off the main thread; the UI only reads snapshots
+        self.metrics_sampler = MetricsSampler(self.collect_system_metrics, interval=5.0)
+        self.metrics_sampler.start()
         self.update_system_metrics()
         
+        # Show findings from the last audit until a new scan runs
+        cached = LynisCache().get()
+        if cached:
+            self.vuln_var.set(str(cached.vulnerability_count))
+        
         # Check for security updates periodically
         self.check_security_updates()
         
@@ -755,35 +904,34 @@ class EnterpriseSecurityDashboard(tk.Tk):
         if os.environ.get("DEMO_MODE") == "1":
             self.simulate_activity()
     
+    def collect_system_metrics(self):
+        """Gather all system metrics (runs on the sampler thread, must not touch Tk)"""
+        net_in, net_out = self.get_network_traffic()
+        return {
+            "cpu_usage": self.get_cpu_usage(),
+            "memory_usage": self.get_memory_usage(),
+            "disk_usage": self.get_disk_usage(),
+            "uptime": self.get_system_uptime(),
+            "network_traffic_in": net_in,
+            "network_traffic_out": net_out,
+        }
+    
     def update_system_metrics(self):
-        """Update all system metrics"""
-        try:
-            # CPU Usage
-            cpu_usage = self.get_cpu_usage()
-            self.update_metric("cpu_usage", cpu_usage, "%")
-            
-            # Memory Usage
-            memory_usage = self.get_memory_usage()
-            self.update_metric("memory_usage", memory_usage, "%")
-            
-            # Disk Usage
-            disk_usage = self.get_disk_usage()
-            self.update_metric("disk_usage", disk_usage, "%")
-            
-            # Uptime
-            uptime = self.get_system_uptime()
-            self.uptime_var.set(uptime)
-            
-            # Network traffic
-            net_in, net_out = self.get_network_traffic()
-            self.net_in_var.set(f"{net_in} KB/s")
-            self.net_out_var.set(f"{net_out} KB/s")
-            
-        except Exception as e:
-            print(f"Error updating system metrics: {e}")
-        
-        # Schedule next update
-        self.after(5000, self.update_system_metrics)
+        """Refresh the metric widgets from the latest sampler snapshot"""
+        snapshot = self.metrics_sampler.snapshot()
+        if snapshot:
+            try:
+                self.update_metric("cpu_usage", snapshot["cpu_usage"], "%")
+                self.update_metric("memory_usage", snapshot["memory_usage"], "%")
+                self.update_metric("disk_usage", snapshot["disk_usage"], "%")
+                self.uptime_var.set(snapshot["uptime"])
+                self.net_in_var.set(f"{snapshot['network_traffic_in']} KB/s")
+                self.net_out_var.set(f"{snapshot['network_traffic_out']} KB/s")
+            except Exception as e:
+                print(f"Error updating system metrics: {e}")
+        
+        # Schedule next update (cheap: only reads the shared snapshot)
+        self.after(1000, self.update_system_metrics)
     
     def update_metric(self, key, value, unit):
         """Update a specific metric value and progress bar"""
@@ -808,14 +956,18 @@ class EnterpriseSecurityDashboard(tk.Tk):
             if platform.system() == "Linux":
                 try:
                     with open("/proc/stat", "r") as f:
-                        lines = f.readlines()
-                    cpu_stats = lines[0].split()
-                    user = float(cpu_stats[1])
-                    nice = float(cpu_stats[2])
-                    system = float(cpu_stats[3])
-                    idle = float(cpu_stats[4])
-                    total = user + nice + system + idle
-                    return round((1 - (idle / total)) * 100)
+                        cpu_stats = f.readline().split()
+                    # user nice system idle iowait irq softirq steal
+                    values = [int(v) for v in cpu_stats[1:9]]
+                    idle = values[3] + values[4]
+                    total = sum(values)
+                    
+                    # Counters are cumulative since boot; usage is the delta between samples
+                    prev = getattr(self, "_prev_cpu_times", None)
+                    self._prev_cpu_times = (idle, total)
+                    if prev is None or total == prev[1]:
+                        return 0
+                    return round((1 - (idle - prev[0]) / (total - prev[1])) * 100)
                 except:
                     pass
             
@@ -867,13 +1019,7 @@ class EnterpriseSecurityDashboard(tk.Tk):
         except ImportError:
             # Fallback for Unix systems
             try:
-                output = subprocess.check_output(["df", "-h", "/"]).decode("utf-8")
-                lines = output.strip().split("\n")
-                if len(lines) >= 2:
-                    parts = lines[1].split()
-                    if len(parts) >= 5:
-                        usage = parts[4].replace("%", "")
-                        return int(usage)
+                return round(proc_collectors.disk_usage("/").percent)
             except:
                 pass
             
@@ -906,10 +1052,16 @@ class EnterpriseSecurityDashboard(tk.Tk):
     def get_network_traffic(self):
         """Get current network traffic in/out"""
         try:
-            import psutil
-            net_io = psutil.net_io_counters()
-            curr_bytes_sent = net_io.bytes_sent
-            curr_bytes_recv = net_io.bytes_recv
+            try:
+                import psutil
+                net_io = psutil.net_io_counters()
+                curr_bytes_sent = net_io.bytes_sent
+                curr_bytes_recv = net_io.bytes_recv
+            except ImportError:
+                # Same counters from /proc/net/dev, loopback excluded
+                interfaces = [i for i in proc_collectors.read_net_dev() if i.name != "lo"]
+                curr_bytes_sent = sum(i.tx_bytes for i in interfaces)
+                curr_bytes_recv = sum(i.rx_bytes for i in interfaces)
             
             # Store previous values
             if not hasattr(self, "_prev_net_io"):
@@ -1014,14 +1166,9 @@ class EnterpriseSecurityDashboard(tk.Tk):
                 process.stdin.write(input_text)
                 process.stdin.close()
 
-            # Read and display output in real-time
+            # Read output in real-time; the sink batches it onto the widget
             for line in process.stdout:
-                if "error" in line.lower() or "warning" in line.lower():
-                    output.insert(tk.END, f"! {line}", "warning")
-                else:
-                    output.insert(tk.END, line)
-                output.see(tk.END)  # Auto-scroll
-                output.update_idletasks()
+                output.write_output(line)
             
             # Wait for process to complete
             process.wait()
@@ -1087,6 +1234,20 @@ class EnterpriseSecurityDashboard(tk.Tk):
             return process.returncode
         else:
             return -1
+    
+    def show_text(self, tab_name, description, text):
+        """Display already collected output in the specified tab, like run_command does for commands"""
+        if tab_name not in self.tab_contents:
+            self.status_message.set(f"Error: Tab {tab_name} not found")
+            return
+        output = self.tab_contents[tab_name].output
+        output.delete(1.0, tk.END)
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        output.insert(tk.END, f"=== {description} ===\n")
+        output.insert(tk.END, f"Started at {timestamp}\n\n")
+        output.insert(tk.END, text)
+        output.insert(tk.END, "\n=== Operation completed successfully ===\n")
+        self.status_message.set("Operation completed successfully")
 
     def add_operation_explanation(self, output, description):
         """Add user-friendly explanation of security operations"""
@@ -1160,49 +1321,94 @@ class EnterpriseSecurityDashboard(tk.Tk):
             output.insert(tk.END, "✅ Operation completed successfully.\n")
             output.insert(tk.END, "Your system security has been improved.\n")
 
+    # Package metadata younger than this is not refreshed again before installs
+    INDEX_TTL = 3600
+    
+    # Longest a full-tree clamd MULTISCAN may run before it is abandoned
+    CLAMD_SCAN_TIMEOUT = 3600
+    
+    # Tools the dashboard operations shell out to
+    SECURITY_TOOLS = ("lynis", "clamscan", "rkhunter", "nmap", "ufw", "vnstat", "logwatch")
+    
+    # Listeners on other ports (except loopback) are flagged; same defaults as security.allowed_ports in Security/config.yaml
+    ALLOWED_PORTS = (22, 80, 443)
+    
+    # Own snapshot, so checks from the Security CLI/dashboard don't use up this app's "changes since the last check"
+    PORT_INVENTORY_PATH = os.path.expanduser("~/.cache/security-dashboard/gui_listening_ports.json")
+    
+    # Services whose state is watched; same defaults as security.critical_services in Security/config.yaml
+    CRITICAL_SERVICES = ("sshd", "ufw", "fail2ban")
+    
     def install_package(self, package):
         """Install a package using the appropriate package manager"""
-        package_manager = None
-        install_cmd = []
+        return self.install_packages([package])
+    
+    def install_packages(self, packages):
+        """Install several packages in one package manager transaction"""
+        packages = list(dict.fromkeys(packages))
+        label = ", ".join(packages)
+        refresh_cmd = None
         
         if self.check_tool_installed("apt"):
             package_manager = "apt"
-            self.run_command(["sudo", "apt", "update"], "Installation", f"Updating package lists to install {package}")
-            install_cmd = ["sudo", "apt", "install", "-y", package]
+            refresh_cmd = ["sudo", "apt", "update"]
+            install_cmd = ["sudo", "apt", "install", "-y"] + packages
         elif self.check_tool_installed("dnf"):
             package_manager = "dnf"
-            install_cmd = ["sudo", "dnf", "install", "-y", package]
+            install_cmd = ["sudo", "dnf", "install", "-y"] + packages
         elif self.check_tool_installed("yum"):
             package_manager = "yum"
-            install_cmd = ["sudo", "yum", "install", "-y", package]
+            install_cmd = ["sudo", "yum", "install", "-y"] + packages
         elif self.check_tool_installed("pacman"):
             package_manager = "pacman"
-            install_cmd = ["sudo", "pacman", "-S", "--noconfirm", package]
+            install_cmd = ["sudo", "pacman", "-S", "--noconfirm", "--needed"] + packages
         elif self.check_tool_installed("zypper"):
             package_manager = "zypper"
-            install_cmd = ["sudo", "zypper", "install", "-y", package]
+            install_cmd = ["sudo", "zypper", "install", "-y"] + packages
         elif self.check_tool_installed("brew") and platform.system() == "Darwin":
             package_manager = "brew"
-            install_cmd = ["brew", "install", package]
+            install_cmd = ["brew", "install"] + packages
         else:
-            self.status_message.set(f"Error: Cannot install {package}, unsupported package manager")
+            self.status_message.set(f"Error: Cannot install {label}, unsupported package manager")
             return False
         
+        # apt needs fresh package lists, but one refresh per hour is plenty (counting refreshes by anyone)
+        age = index_age(INDEX_PATHS.get(package_manager), getattr(self, "_index_refreshed", None))
+        if refresh_cmd and (age is None or age > self.INDEX_TTL):
+            self.status_message.set(f"Updating package lists to install {label}...")
+            try:
+                if subprocess.run(refresh_cmd, capture_output=True, text=True, timeout=300).returncode == 0:
+                    self._index_refreshed = time.time()
+            except subprocess.TimeoutExpired:
+                # Install from the lists we have rather than hang the operation
+                print("apt update timed out; installing with the current package lists")
+        
         try:
-            self.status_message.set(f"Installing {package} using {package_manager}... This may take a moment.")
+            self.status_message.set(f"Installing {label} using {package_manager}... This may take a moment.")
             result = subprocess.run(install_cmd, check=True, capture_output=True, text=True)
+            # Newly installed binaries were cached as missing
+            self.tools.invalidate()
             if result.returncode == 0:
-                self.status_message.set(f"{package} installed successfully")
+                self.status_message.set(f"{label} installed successfully")
                 return True
             else:
-                self.status_message.set(f"Error: Failed to install {package}")
+                self.status_message.set(f"Error: Failed to install {label}")
                 return False
         except subprocess.CalledProcessError as e:
-            self.status_message.set(f"Error: Failed to install {package}: {e.stderr}")
+            self.status_message.set(f"Error: Failed to install {label}: {e.stderr}")
             return False
         except Exception as e:
-            self.status_message.set(f"Error: Failed to install {package}: {str(e)}")
+            self.status_message.set(f"Error: Failed to install {label}: {str(e)}")
             return False
+    
+    def install_security_tools(self):
+        """Install every missing security tool in a single batch"""
+        packages = missing_packages(self.tools.resolve_many(self.SECURITY_TOOLS), self.host_facts.pkg_mgr)
+        if not packages:
+            self.run_command(["echo", "All security tools are already installed."], "System Hardening", "Install Security Tools")
+            return
+        if self.install_packages(packages):
+            self.run_command(["echo", f"Installed: {' '.join(packages)}"], "System Hardening", "Install Security Tools")
 
     # Add these new helper methods to display status information
     def show_help_popup(self, title, message):
@@ -1262,14 +1468,8 @@ class EnterpriseSecurityDashboard(tk.Tk):
         self.run_command(["sudo", "sed", "-i", "s/#PermitRootLogin prohibit-password/PermitRootLogin no/", "/etc/ssh/sshd_config"], "System Hardening", "Disabling root login")
         self.run_command(["sudo", "sed", "-i", "s/#PubkeyAuthentication yes/PubkeyAuthentication yes/", "/etc/ssh/sshd_config"], "System Hardening", "Enabling public key authentication")
 
-        # Detect SSH service name
-        ssh_service_name = "sshd"
-        if self.check_service_exists("ssh.service"):
-            ssh_service_name = "ssh"
-        elif self.check_service_exists("sshd.service"):
-            ssh_service_name = "sshd"
-        elif self.check_service_exists("openssh.service"):
-            ssh_service_name = "openssh"
+        # Detect SSH service name (all candidates in one systemctl call)
+        ssh_service_name = self.find_service(["ssh", "sshd", "openssh"]) or "sshd"
         
         if self.run_command(["sudo", "systemctl", "restart", f"{ssh_service_name}.service"], "System Hardening", "Restarting SSH service") != 0:
             self.run_command(["sudo", "service", ssh_service_name, "restart"], "System Hardening", "Restarting SSH service (fallback)")
@@ -1325,6 +1525,36 @@ class EnterpriseSecurityDashboard(tk.Tk):
         self.run_command(["sudo", "find", web_root, "-type", "f", "-exec", "chmod", "640", "{{}}", ";"], "System Hardening", "Securing web files")
         self.run_command(["sudo", "chown", "-R", "www-data:www-data", web_root], "System Hardening", "Setting web directory ownership")
     
+    @staticmethod
+    def systemctl_output(command):
+        """stdout of a systemctl command, or None if systemctl is unavailable or failed"""
+        try:
+            result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        return result.stdout if result.returncode == 0 else None
+    
+    def find_service(self, candidates):
+        """First of the candidate service names that exists on this system, or None"""
+        states = query_services(candidates, self.systemctl_output)
+        if states is None:
+            # No systemd: check the candidates one by one
+            return next((name for name in candidates if self.check_service_exists(f"{name}.service")), None)
+        return next((name for name in candidates if unit_name(name) in states and states[unit_name(name)].exists), None)
+    
+    def check_critical_services(self):
+        """Show the state of the critical services and what changed since the last check"""
+        if self.service_watcher is None:
+            self.service_watcher = ServiceWatcher(self.CRITICAL_SERVICES, self.systemctl_output)
+        events = self.service_watcher.poll()
+        if self.service_watcher.last_poll is None:
+            self.show_text("Monitoring", "Critical Services", "Could not query services (systemctl not available).\n")
+            return
+        report = self.service_watcher.render() + "\n"
+        if events:
+            report += "\nChanges since the last check:\n" + "\n".join(e.render() for e in events) + "\n"
+        self.show_text("Monitoring", "Critical Services", report)
+    
     def check_service_exists(self, service_name):
         """Check if a system service exists"""
         try:
@@ -1428,12 +1658,44 @@ class EnterpriseSecurityDashboard(tk.Tk):
         self.run_command(command, "System Hardening", "Web Directory Security")
     
     def check_resources(self):
-        """Check system resource usage"""
-        self.run_command(["lscpu"], "Monitoring", "CPU Information")
-        self.run_command(["free", "-h"], "Monitoring", "Memory Usage")
-        self.run_command(["df", "-h"], "Monitoring", "Disk Usage")
-        self.run_command(["ps", "aux", "--sort=-%cpu"], "Monitoring", "Top Processes by CPU")
-        self.run_command(["ps", "aux", "--sort=-%mem"], "Monitoring", "Top Processes by Memory")
+        """Check system resource usage (read from /proc, no child processes)"""
+        try:
+            # CPU usage is measured between two samples taken a second apart
+            self.process_table.refresh()
+            time.sleep(1)
+            self.process_table.refresh()
+            sections = [
+                ("CPU Information", proc_collectors.render_cpu(proc_collectors.read_cpuinfo())),
+                ("Memory Usage", proc_collectors.render_memory(proc_collectors.read_meminfo())),
+                ("Disk Usage", proc_collectors.render_disks(proc_collectors.read_disks())),
+                ("Top Processes by CPU", self.process_table.render(15, "cpu")),
+                ("Top Processes by Memory", self.process_table.render(15, "mem")),
+            ]
+        except OSError:
+            # No /proc (e.g. macOS): fall back to the tools
+            self.run_command(["df", "-h"], "Monitoring", "Disk Usage")
+            return
+        self.show_text("Monitoring", "System Resources",
+                       "\n".join(f"--- {title} ---\n{text}" for title, text in sections))
+    
+    def watch_processes(self, interval=2.0, ticks=30):
+        """Show the top processes by CPU, refreshed every `interval` seconds for a minute"""
+        self.process_watch_generation += 1
+        generation = self.process_watch_generation
+        try:
+            self.process_table.refresh()
+        except OSError:
+            self.show_text("Monitoring", "Live Processes", "Process monitoring needs /proc (Linux).\n")
+            return
+        for _ in range(ticks):
+            time.sleep(interval)
+            # A newer watch replaces this one
+            if generation != self.process_watch_generation:
+                return
+            count = self.process_table.refresh()
+            self.show_text("Monitoring", "Live Processes",
+                           f"{count} processes, top 20 by CPU over the last {interval:.0f}s\n\n"
+                           + self.process_table.render(20, "cpu"))
     
     def analyze_logs(self):
         """Analyze system logs for security issues"""
@@ -1443,49 +1705,42 @@ class EnterpriseSecurityDashboard(tk.Tk):
         command = ["sudo", "logwatch", "--output", "stdout", "--format", "text", "--detail", "high", "--range", "today"]
         self.run_command(command, "Monitoring", "Security Log Analysis")
     
+    def report_sections(self):
+        """Sections of the security report; each is collected on its own thread with its own timeout"""
+        def updates():
+            if not self.check_tool_installed("apt"):
+                return ""
+            return subprocess.run(["apt", "list", "--upgradable"], stdout=subprocess.PIPE,
+                                  stderr=subprocess.DEVNULL, text=True, timeout=60).stdout
+
+        def recommendations():
+            if not self.check_tool_installed("lynis"):
+                return "Lynis not installed\n"
+            return self.lynis_findings() + "\n"
+
+        return [
+            # Read in-process; only apt and Lynis still need child processes
+            Section("System Information", lambda: " ".join(os.uname()) + "\n", timeout=10),
+            Section("User Accounts", lambda: proc_collectors.render_accounts(proc_collectors.read_passwd()), timeout=10),
+            Section("Network Configuration", lambda: proc_collectors.render_interfaces(proc_collectors.read_interfaces()), timeout=10),
+            Section("Listening Ports", lambda: proc_collectors.render_listeners(proc_collectors.read_sockets()), timeout=15),
+            Section("System Updates", updates, timeout=60),
+            # A full audit takes minutes when nothing is cached; it finishes in the background
+            Section("Security Recommendations", recommendations, timeout=120),
+        ]
+
     def generate_report(self):
         """Generate a comprehensive security report"""
         report_file = f"security_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
         
         try:
+            self.status_message.set("Collecting report sections...")
+            report = ReportPipeline(self.report_sections()).render()
             with open(report_file, "w") as f:
-                f.write(f"Security Report - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write("======================================================\n")
-                f.write("1. System Information\n")
-                result = subprocess.run(["uname", "-a"], capture_output=True, text=True)
-                f.write(result.stdout)
-                f.write("======================================================\n")
-                f.write("2. User Accounts\n")
-                result = subprocess.run(["cat", "/etc/passwd"], capture_output=True, text=True)
-                for line in result.stdout.splitlines():
-                    parts = line.split(":")
-                    if len(parts) >= 4:
-                        f.write(f"{parts[0]}:{parts[2]}:{parts[3]}\n")
-                f.write("======================================================\n")
-                f.write("3. Network Configuration\n")
-                result = subprocess.run(["ip", "addr", "show"], capture_output=True, text=True)
-                for line in result.stdout.splitlines():
-                    if "inet" in line or "ether" in line:
-                        f.write(line + "\n")
-                f.write("======================================================\n")
-                f.write("4. Listening Ports\n")
-                result = subprocess.run(["netstat", "-tuln"], capture_output=True, text=True)
-                f.write(result.stdout)
-                f.write("======================================================\n")
-                f.write("5. System Updates\n")
-                if self.check_tool_installed("apt"):
-                    result = subprocess.run(["apt", "list", "--upgradable"], capture_output=True, text=True, stderr=subprocess.DEVNULL)
-                    f.write(result.stdout)
-                f.write("======================================================\n")
-                f.write("6. Security Recommendations\n")
-                if self.check_tool_installed("lynis"):
-                    result = subprocess.run(["sudo", "lynis", "audit", "system", "--no-colors", "--quiet"], capture_output=True, text=True)
-                    f.write(result.stdout)
-                else:
-                    f.write("Lynis not installed\n")
+                f.write(report)
             
             # Display the report in the text widget
-            self.run_command(["cat", report_file], "Reports", f"Generated Security Report: {report_file}")
+            self.show_text("Reports", f"Generated Security Report: {report_file}", report)
         except Exception as e:
             self.status_message.set(f"Error generating report: {e}")
     
@@ -1498,7 +1753,7 @@ class EnterpriseSecurityDashboard(tk.Tk):
     # Utility methods
     def check_tool_installed(self, tool_name):
         """Check if a tool is installed in the system"""
-        return shutil.which(tool_name) is not None
+        return self.tools.resolve(tool_name) is not None
     
     def on_resize(self, event):
         """Handle window resize events"""
@@ -1515,6 +1770,9 @@ class EnterpriseSecurityDashboard(tk.Tk):
         """Handle application exit"""
         if messagebox.askokcancel("Exit", "Are you sure you want to exit the Security Dashboard?"):
             # Clean up any resources or temporary files
+            self.metrics_sampler.stop()
+            if getattr(self, "clamd", None):
+                self.clamd.close()
             self.destroy()
 
     # Security operation implementations
@@ -1542,11 +1800,109 @@ class EnterpriseSecurityDashboard(tk.Tk):
                 return
         
         command = ["sudo", "lynis", "audit", "system", "--no-colors"]
-        self.run_command(command, "Security Scan", "Comprehensive Security Scan")
+        if self.run_command(command, "Security Scan", "Comprehensive Security Scan") == 0:
+            self.store_lynis_report()
+    
+    def read_lynis_report(self):
+        """Parse the report lynis wrote as root, reading it through sudo when it is not readable by us (0640 root)"""
+        if os.access(DEFAULT_REPORT_PATH, os.R_OK):
+            return load_report(DEFAULT_REPORT_PATH)
+        try:
+            # The audit just ran through sudo, so cached credentials normally let this pass without a prompt
+            result = subprocess.run(["sudo", "-n", "cat", DEFAULT_REPORT_PATH], capture_output=True, text=True, timeout=30)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Could not read the Lynis report {DEFAULT_REPORT_PATH}: {e}")
+            return None
+        if result.returncode != 0:
+            print(f"Could not read the Lynis report {DEFAULT_REPORT_PATH} through sudo: {result.stderr.strip()}")
+            return None
+        return parse_report(result.stdout)
+    
+    def store_lynis_report(self):
+        """Parse the report of the audit that just finished and cache it for reuse"""
+        report = self.read_lynis_report()
+        if report is None:
+            return None
+        LynisCache().put(report)
+        self.vuln_var.set(str(report.vulnerability_count))
+        return report
+    
+    def lynis_findings(self):
+        """Findings of the last Lynis audit, re-running it only when the cache is stale"""
+        report = LynisCache().get()
+        if report is None:
+            result = subprocess.run(["sudo", "lynis", "audit", "system", "--no-colors", "--quiet"], capture_output=True, text=True)
+            report = self.store_lynis_report() if result.returncode == 0 else None
+            if report is None:
+                return result.stdout
+        return report.render()
+    
+    def get_clamd(self):
+        """Return a pooled client for a running clamd, or None to use clamscan"""
+        client = getattr(self, "clamd", None)
+        if client is not None:
+            if client.ping():
+                return client
+            client.close()
+        # Only loaded once a scan needs it, to keep the socket/pool machinery out of startup
+        from clamd_client import connect as clamd_connect
+        self.clamd = clamd_connect()
+        return self.clamd
+    
+    def run_clamd_scan(self, clamd, description, paths=None, root=None):
+        """Scan files (or a whole tree with MULTISCAN) through clamd.
+        
+        Returns (infected, errors), or None if clamd failed and the caller
+        should fall back to clamscan.
+        """
+        from clamd_client import ClamdError, ClamdTimeout
+        tab_name = "Security Scan"
+        output = self.tab_contents[tab_name].output
+        output.delete(1.0, tk.END)
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        output.insert(tk.END, f"=== {description} ===\n")
+        output.insert(tk.END, f"Started at {timestamp}\n\n")
+        self.add_operation_explanation(output, description)
+        output.insert(tk.END, f"Scanning through clamd at {clamd.socket_path}\n\n")
+        
+        # Like clamscan -i, only infected files and errors are listed
+        def on_result(path, signature, error):
+            if signature:
+                output.write_output(f"{path}: {signature} FOUND\n")
+            elif error:
+                output.write_output(f"{path}: {error} ERROR\n")
+        
+        try:
+            if paths is None:
+                infected, errors = clamd.multiscan(root, on_result, timeout=self.CLAMD_SCAN_TIMEOUT)
+            else:
+                infected, errors = clamd.scan_files(paths, on_result)
+        except ClamdTimeout as e:
+            # A clamscan of the same tree would be just as slow, so don't start over
+            output.insert(tk.END, f"\n=== Scan timed out: {e} ===\n", "error_header")
+            self.status_message.set("Malware scan timed out")
+            return {}, {root: str(e)}
+        except ClamdError as e:
+            output.insert(tk.END, f"\nclamd scan failed ({e}), falling back to clamscan...\n")
+            return None
+        
+        if infected:
+            output.insert(tk.END, f"\n=== Malware found in {len(infected)} files ===\n", "error_header")
+            self.status_message.set("Malware found - check output for details")
+        else:
+            output.insert(tk.END, "\n=== Operation completed successfully ===\n")
+            self.status_message.set("Operation completed successfully")
+            self.last_scan_var.set(timestamp)
+            self.add_success_summary(output, description)
+        if errors:
+            output.insert(tk.END, f"{len(errors)} files could not be scanned (see ERROR lines above)\n")
+        return infected, errors
     
     def run_clamav(self):
         """Run malware scan using ClamAV"""
-        if not self.check_tool_installed("clamscan"):
+        # A running clamd already has the signatures loaded; clamscan reloads them every time
+        clamd = self.get_clamd()
+        if clamd is None and not self.check_tool_installed("clamscan"):
             if not self.install_package("clamav"):
                 tab_name = "Security Scan"
                 if tab_name in self.tab_contents:
@@ -1571,8 +1927,62 @@ class EnterpriseSecurityDashboard(tk.Tk):
             self.run_command(["sudo", "freshclam"], "Security Scan", "Updating Virus Definitions")
         
         # Choose a reasonable path to scan to avoid excessive time
-        command = ["sudo", "clamscan", "-r", "/home", "--bell", "-i", "--max-filesize=100M", "--max-scansize=500M"]
-        self.run_command(command, "Security Scan", "Malware Detection Scan")
+        scan_path = "/home"
+        limits = ["--bell", "-i", "--max-filesize=100M", "--max-scansize=500M"]
+        
+        # Only rescan files that are new or changed since the last clean scan.
+        # Falls back to a full scan if parts of the tree are unreadable to us.
+        from clamd_client import ClamdError
+        index = ScanIndex()
+        try:
+            if clamd:
+                version = clamd.version()
+            else:
+                version = subprocess.run(["clamscan", "--version"], capture_output=True, text=True, timeout=30).stdout
+            db_version = parse_db_version(version)
+            changed, complete = index.changed_files(scan_path, db_version)
+        except (OSError, subprocess.SubprocessError, ClamdError) as e:
+            print(f"Incremental ClamAV scan unavailable: {e}")
+            complete = False
+        
+        if not complete:
+            if clamd and self.run_clamd_scan(clamd, "Malware Detection Scan", root=scan_path):
+                return
+            command = ["sudo", "clamscan", "-r", scan_path] + limits
+            self.run_command(command, "Security Scan", "Malware Detection Scan")
+            return
+        
+        if not changed:
+            index.commit(db_version, [])
+            index.save()
+            self.run_command(
+                ["echo", f"No new or modified files under {scan_path} since the last scan."],
+                "Security Scan", "Malware Detection Scan"
+            )
+            return
+        
+        description = f"Malware Detection Scan ({len(changed)} new or modified files)"
+        result = self.run_clamd_scan(clamd, description, paths=changed) if clamd else None
+        if result:
+            infected, errors = result
+            index.commit(db_version, [p for p in changed if p not in infected and p not in errors])
+            index.save()
+            return
+        
+        os.makedirs(os.path.dirname(index.path), exist_ok=True)
+        list_path = os.path.join(os.path.dirname(index.path), "clamav_filelist.lst")
+        with open(list_path, "w") as f:
+            f.write("\n".join(changed) + "\n")
+        try:
+            command = ["sudo", "clamscan", f"--file-list={list_path}"] + limits
+            returncode = self.run_command(command, "Security Scan", description)
+        finally:
+            os.unlink(list_path)
+        
+        # -i only prints infected files, so only a fully clean run can be recorded
+        if returncode == 0:
+            index.commit(db_version, changed)
+            index.save()
     
     def run_rkhunter(self):
         """Run rootkit detection using RKHunter"""
@@ -1601,27 +2011,32 @@ class EnterpriseSecurityDashboard(tk.Tk):
         command = ["sudo", "rkhunter", "--check", "--skip-keypress"]
         self.run_command(command, "Security Scan", "Rootkit Detection Scan")
     
+    def check_open_ports(self, prefix=""):
+        """List listening ports and what changed since the last check, read from /proc/net"""
+        if self.port_inventory is None:
+            self.port_inventory = PortInventory(self.ALLOWED_PORTS, state_path=self.PORT_INVENTORY_PATH)
+        try:
+            report = self.port_inventory.report()
+        except OSError as e:
+            report = f"Could not read the socket tables: {e}\n"
+        self.show_text("Security Scan", "Open Ports Check", prefix + report + "\n")
+    
     def run_nmap(self):
         """Run network security scan using Nmap"""
         if not self.check_tool_installed("nmap"):
             if not self.install_package("nmap"):
-                tab_name = "Security Scan"
-                if tab_name in self.tab_contents:
-                    output = self.tab_contents[tab_name].output
-                    output.delete(1.0, tk.END)
-                    output.insert(tk.END, "=== Error: Could not install Nmap ===\n\n")
-                    output.insert(tk.END, "Nmap is a network scanner needed to check for open ports and services.\n\n")
-                    output.insert(tk.END, "📋 What this means:\n", "error_header")
-                    output.insert(tk.END, "The network scanner couldn't be installed on your system.\n\n")
-                    output.insert(tk.END, "🔧 How to fix this:\n", "fix_header")
-                    output.insert(tk.END, "Try manually installing Nmap:\n")
-                    output.insert(tk.END, "1. sudo apt install nmap (for Debian/Ubuntu)\n")
-                    output.insert(tk.END, "2. sudo dnf install nmap (for Fedora/RHEL)\n\n")
-                    output.insert(tk.END, "Using netstat for basic port information instead...\n\n")
-                    
-                    # Use netstat as a fallback
-                    fallback_cmd = "netstat -tuln | grep LISTEN"
-                    self.run_command(fallback_cmd, "Security Scan", "Open Ports Check")
+                # Port inventory as a fallback (no nmap or netstat needed), below the explanation
+                self.check_open_ports(prefix=(
+                    "Error: Could not install Nmap\n\n"
+                    "Nmap is a network scanner needed to check for open ports and services.\n\n"
+                    "📋 What this means:\n"
+                    "The network scanner couldn't be installed on your system.\n\n"
+                    "🔧 How to fix this:\n"
+                    "Try manually installing Nmap:\n"
+                    "1. sudo apt install nmap (for Debian/Ubuntu)\n"
+                    "2. sudo dnf install nmap (for Fedora/RHEL)\n\n"
+                    "Listing listening ports from the kernel socket tables instead:\n\n"
+                ))
                 return
         
         # Scan localhost with service version detection for commonly used ports
@@ -1634,18 +2049,18 @@ if __name__ == "__main__":
     
     # Set up text tags for output formatting
     for tab_name, tab in app.tab_contents.items():
-        if hasattr(tab, "output"):
-            tab.output.tag_configure("warning", foreground="orange")
-            tab.output.tag_configure("error", foreground="red")
-            tab.output.tag_configure("success", foreground="green")
+        if hasattr(tab, "console"):
+            tab.console.tag_configure("warning", foreground="orange")
+            tab.console.tag_configure("error", foreground="red")
+            tab.console.tag_configure("success", foreground="green")
             # Add new style tags
-            tab.output.tag_configure("info_header", foreground="#3182CE", font=(app.system_font, app.font_sizes['md'], "bold"))
-            tab.output.tag_configure("error_header", foreground="#E53E3E", font=(app.system_font, app.font_sizes['md'], "bold"))
-            tab.output.tag_configure("success_header", foreground="#38A169", font=(app.system_font, app.font_sizes['md'], "bold"))
-            tab.output.tag_configure("fix_header", foreground="#DD6B20", font=(app.system_font, app.font_sizes['md'], "bold"))
-            tab.output.tag_configure("progress_note", foreground="#718096", font=(app.system_font, app.font_sizes['sm'], "italic"))
-            tab.output.tag_configure("welcome", foreground="#4299E1", font=(app.system_font, app.font_sizes['lg'], "bold"))
-            tab.output.tag_configure("info", foreground="#4A5568")
+            tab.console.tag_configure("info_header", foreground="#3182CE", font=(app.system_font, app.font_sizes['md'], "bold"))
+            tab.console.tag_configure("error_header", foreground="#E53E3E", font=(app.system_font, app.font_sizes['md'], "bold"))
+            tab.console.tag_configure("success_header", foreground="#38A169", font=(app.system_font, app.font_sizes['md'], "bold"))
+            tab.console.tag_configure("fix_header", foreground="#DD6B20", font=(app.system_font, app.font_sizes['md'], "bold"))
+            tab.console.tag_configure("progress_note", foreground="#718096", font=(app.system_font, app.font_sizes['sm'], "italic"))
+            tab.console.tag_configure("welcome", foreground="#4299E1", font=(app.system_font, app.font_sizes['lg'], "bold"))
+            tab.console.tag_configure("info", foreground="#4A5568")
     
     # Start the application main loop
     app.mainloop()